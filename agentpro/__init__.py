@@ -1,4 +1,8 @@
 from .agent import AgentPro
+from .routing import ModelRouter
 from typing import Any
-from agentpro.tools import AresInternetTool, CodeEngine, YouTubeSearchTool, SlideGenerationTool, DataScienceTool # add more tools when available
-__all__ = ['AgentPro', 'ares_tool', 'code_tool', 'youtube_tool', 'slide_tool', 'data_tool'] # add more tools when available
+def __getattr__(name: str) -> Any:
+    # Tool classes stay importable from the package root, loaded on first access (see agentpro.tools).
+    from . import tools
+    return getattr(tools, name)
+__all__ = ['AgentPro', 'ModelRouter', 'ares_tool', 'code_tool', 'youtube_tool', 'slide_tool', 'data_tool'] # add more tools when available
@@ -1,10 +1,23 @@
-from openai import OpenAI
-from typing import List, Dict, Union
+from typing import Iterator, List, Dict, Union
+import asyncio
+import copy
+import itertools
 import json
+import logging
 import os
 import re
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from .clients import get_openai_client, get_async_openai_client
+from .history import HistoryManager
+from .llm import chat_completion, achat_completion
+from .routing import ModelRouter
+from .scheduler import is_rate_limit
+from .streaming import ActionStreamParser
 from .tools.base import Tool
+from .tracing import current_span, get_tracer, in_current_context
+logger = logging.getLogger(__name__)
 REACT_AGENT_SYSTEM_PROMPT = """
 Answer the following questions as best you can. You have access to the following tools:
 
@@ -38,6 +51,14 @@ Observation: the result of the action if applicable
 Thought: I now know the final answer
 Final Answer: the final answer to the original input question
 """
+
+TOOL_CALLING_SYSTEM_PROMPT = """
+Answer the following questions as best you can, calling the provided tools whenever they are relevant.
+When you receive real-time information from the tools, trust that information and include it in your final answer, even if it concerns events beyond your training cutoff.
+Tools that do not depend on each other's results can be called together in one turn.
+Once you have everything you need, reply with the final answer to the original question.
+"""
+TOOL_CALLING_MODES = ("react", "native")
 class AgentPro:
     def __init__(
         self,
@@ -51,19 +72,49 @@ class AgentPro:
         max_tokens: int = 4000,
         max_steps: int = 10,
         max_tool_calls: int = 12,
+        parallel_tool_calls: bool = False,
+        max_workers: int = 4,
+        tool_concurrency: Dict[str, int] = None,
+        tool_timeout: float = None,
+        async_llm=None,
+        history: HistoryManager = None,
+        tool_calling: str = "react",
+        tool_calling_prompt: str = TOOL_CALLING_SYSTEM_PROMPT,
+        router: ModelRouter = None,
     ):
-        self.client = (llm if llm else OpenAI(api_key=client_details.get("api_key"), base_url=client_details.get("api_base")))
-        self.model = client_details.get("MODEL", "gpt-4o-mini") if client_details else "gpt-4o-mini"
-        print(f"Using model: {self.model} for AgentPro")
+        if tool_calling not in TOOL_CALLING_MODES:
+            raise ValueError(f"tool_calling must be one of {TOOL_CALLING_MODES}, got {tool_calling!r}")
+        client_details = client_details or {}
+        self.client = (llm if llm else get_openai_client(client_details.get("api_key"), client_details.get("api_base")))
+        self.aclient = async_llm
+        if not llm and not async_llm:
+            self.aclient = get_async_openai_client(client_details.get("api_key"), client_details.get("api_base"))
+        self.model = client_details.get("MODEL", "gpt-4o-mini") or "gpt-4o-mini"
+        logger.debug("Using model %s for AgentPro", self.model)
         self.tools = {tool.name.lower().replace(" ", "_"): tool for tool in tools}
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.router = router
         self.max_steps = max_steps
         self.max_tool_calls = max_tool_calls
+        self.parallel_tool_calls = parallel_tool_calls
+        self.max_workers = max_workers
+        self.tool_timeout = tool_timeout
+        self.tool_concurrency = {name.lower().replace(" ", "_"): limit for name, limit in (tool_concurrency or {}).items()}
+        self.tool_limits = {name: threading.BoundedSemaphore(limit) for name, limit in self.tool_concurrency.items()}
+        self._executor = None
+        self._async_limits = {}
+        self.history = history if history is not None else HistoryManager(model=self.model)
+        self.token_usage = []
         tool_descriptions = "\n\n".join(tool.get_tool_description() for tool in tools)
         tool_names = ", ".join(self.tools.keys())
         self.react_prompt = react_prompt.format(tools=tool_descriptions, tool_names=tool_names)
         self.final_prompt = final_prompt.format(tools=tool_descriptions, tool_names=tool_names)
+        # Native mode sends the tools as JSON schemas with every request, so its system prompt carries no format instructions.
+        self.tool_calling = tool_calling
+        self.tool_schemas = [tool.get_tool_schema() for tool in self.tools.values()]
+        if tool_calling == "native":
+            self.react_prompt = tool_calling_prompt
         self.system_prompt = system_prompt
         self.messages = []
         if system_prompt:
@@ -72,9 +123,20 @@ class AgentPro:
     def clear_history(self): 
         """Resets the conversation to the initial system prompts."""
         self.messages = []
+        self.token_usage = []
         if self.system_prompt:
             self.messages.append({"role": "system", "content": self.system_prompt})
         self.messages.append({"role": "system", "content": self.react_prompt})
+    def fork(self) -> "AgentPro":
+        """A new agent sharing this one's clients, tools, settings and tool executor, with its own empty history,
+        history cache and per-tool concurrency limits."""
+        self._get_executor()
+        agent = copy.copy(self)
+        agent.history = self.history.fork()
+        agent.tool_limits = {name: threading.BoundedSemaphore(limit) for name, limit in self.tool_concurrency.items()}
+        agent._async_limits = {}
+        agent.clear_history()
+        return agent
     def safe_parse_input(self, input_str: str) -> Union[dict, str]:
         input_str = input_str.strip()
         if input_str.startswith("```"):
@@ -85,91 +147,605 @@ class AgentPro:
         except json.JSONDecodeError:
             return input_str
     def parse_actions(self, response: str) -> List[tuple]:
-        lines = response.splitlines()
+        """The (action, action_input) pairs of a whole ReAct completion, parsed with the grammar streamed steps use
+        (see ActionStreamParser). An Action Input ends at the next Action, Observation, Thought or Final Answer
+        line, and a Final Answer given before any action ends the step, so actions after it are not run."""
+        return ActionStreamParser.parse(response, self.safe_parse_input)
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="agentpro-tool")
+        return self._executor
+    def run_tool(self, action: str, action_input, temperature: float = None, max_tokens: int = None) -> str:
+        """Runs a single tool call, holding the tool's concurrency slot if one is configured."""
+        tool = self.tools[action]
+        limit = self.tool_limits.get(action)
+        if limit: limit.acquire()
+        try:
+            logger.info("Calling tool %s", action)
+            logger.debug("Tool %s input: %.1000s", action, action_input)
+            tool_result = tool.run(action_input, temperature, max_tokens)
+            logger.debug("Tool %s result: %.1000s", action, tool_result)
+        except Exception as e:
+            logger.warning("Error while calling tool %s: %s", action, e)
+            tool_result = f"Error while calling tool: {e}"
+        finally:
+            if limit: limit.release()
+        return tool_result
+    def _plan_actions(self, actions: List[tuple], budget: int = None) -> tuple:
+        budget = self.max_tool_calls if budget is None else budget
+        planned, calls, exhausted = [], 0, False
+        for action, action_input in actions:
+            known = action in self.tools
+            if known and calls >= budget:
+                exhausted = True
+                break
+            planned.append((action, action_input, known))
+            calls += known
+        return planned, calls, exhausted
+    def _missing_tool(self, action: str) -> str:
+        error_message = f"Observation: Tool '{action}' not found. Available tools: {list(self.tools.keys())}"
+        logger.warning(error_message)
+        return error_message
+    def dispatch_actions(self, actions: List[tuple], temperature: float = None, max_tokens: int = None, budget: int = None) -> tuple:
+        """Runs the parsed actions of one step and returns (observations, tool_calls_made, budget_exhausted).
+        Observations always follow the order of `actions`, whether the tools ran one by one or concurrently."""
+        planned, calls, exhausted = self._plan_actions(actions, budget)
+        use_pool = self.tool_timeout is not None or (self.parallel_tool_calls and calls > 1)
+        if use_pool and self.parallel_tool_calls:
+            futures = [self._get_executor().submit(in_current_context(self.run_tool, action, action_input, temperature, max_tokens)) if known else None for action, action_input, known in planned]
+        else:
+            futures = [None] * len(planned)
+        deadline = time.monotonic() + self.tool_timeout if self.tool_timeout is not None else None
+        observations = []
+        for (action, action_input, known), future in zip(planned, futures):
+            if not known:
+                observations.append(self._missing_tool(action))
+                continue
+            if not use_pool:
+                observations.append(f"Observation: {self.run_tool(action, action_input, temperature, max_tokens)}")
+                continue
+            if future is None:
+                future = self._get_executor().submit(in_current_context(self.run_tool, action, action_input, temperature, max_tokens))
+                deadline = time.monotonic() + self.tool_timeout
+            observations.append(f"Observation: {self._tool_result(action, future, deadline)}")
+        return observations, calls, exhausted
+    def _tool_result(self, action: str, future, deadline: float = None) -> str:
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()) if deadline is not None else None)
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning("Tool %s timed out after %ss", action, self.tool_timeout)
+            return f"Error while calling tool: timed out after {self.tool_timeout}s"
+    async def arun_tool(self, action: str, action_input, temperature: float = None, max_tokens: int = None) -> str:
+        """Async counterpart of run_tool; awaits Tool.arun under the tool's concurrency slot and the per-call timeout."""
+        tool = self.tools[action]
+        if action in self.tool_concurrency and action not in self._async_limits:
+            self._async_limits[action] = asyncio.Semaphore(self.tool_concurrency[action])
+        limit = self._async_limits.get(action)
+        try:
+            if limit: await limit.acquire()
+            try:
+                logger.info("Calling tool %s", action)
+                logger.debug("Tool %s input: %.1000s", action, action_input)
+                tool_result = await asyncio.wait_for(tool.arun(action_input, temperature, max_tokens), timeout=self.tool_timeout)
+                logger.debug("Tool %s result: %.1000s", action, tool_result)
+            finally:
+                if limit: limit.release()
+        except asyncio.TimeoutError:
+            logger.warning("Tool %s timed out after %ss", action, self.tool_timeout)
+            tool_result = f"Error while calling tool: timed out after {self.tool_timeout}s"
+        except Exception as e:
+            logger.warning("Error while calling tool %s: %s", action, e)
+            tool_result = f"Error while calling tool: {e}"
+        return tool_result
+    async def adispatch_actions(self, actions: List[tuple], temperature: float = None, max_tokens: int = None, budget: int = None) -> tuple:
+        """Async counterpart of dispatch_actions with the same budget and ordering guarantees."""
+        planned, calls, exhausted = self._plan_actions(actions, budget)
+        async def observe(action, action_input, known):
+            if not known: return self._missing_tool(action)
+            return f"Observation: {await self.arun_tool(action, action_input, temperature, max_tokens)}"
+        if self.parallel_tool_calls:
+            observations = list(await asyncio.gather(*(observe(*item) for item in planned)))
+        else:
+            observations = [await observe(*item) for item in planned]
+        return observations, calls, exhausted
+    def _request_messages(self, model: str = None) -> List[Dict]:
+        """Compacts the history for the next request and records its size and model in token_usage."""
+        messages = self.history.compact(self.messages, self.final_prompt)
+        self.token_usage.append({"step": len(self.token_usage), "model": model or self.model, "history_tokens": self.history.tokens(self.messages), "sent_tokens": self.history.tokens(messages)})
+        return messages
+    def _record_usage(self, response, started: float = None) -> None:
+        if not self.token_usage: return
+        if started is not None: self.token_usage[-1]["seconds"] = time.perf_counter() - started
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.token_usage[-1].update(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+    def generate_response(self, prompt: str = None, temperature: float = None, max_tokens: int = None, model: str = None) -> str:
+        if prompt:
+            self.messages.append({"role": "user", "content": prompt})
+        started = time.perf_counter()
+        try:
+            response = chat_completion(
+                self.client,
+                model=model or self.model,
+                messages=self._request_messages(model),
+                temperature=temperature if temperature is not None else self.temperature,
+                max_tokens=max_tokens if max_tokens is not None else self.max_tokens
+            )
+        except Exception as e:
+            if is_rate_limit(e): return "Error: Rate limit exceeded multiple times."
+            raise e
+        self._record_usage(response, started)
+        return response.choices[0].message.content.strip()
+    def generate_stream(self, prompt: str = None, temperature: float = None, max_tokens: int = None, model: str = None) -> Iterator[str]:
+        """Like generate_response, but yields the completion text chunk by chunk as the model produces it. Token
+        usage comes from the stream's final chunk and is recorded once the stream is exhausted."""
+        if prompt:
+            self.messages.append({"role": "user", "content": prompt})
+        started = time.perf_counter()
+        try:
+            stream = chat_completion(
+                self.client,
+                model=model or self.model,
+                messages=self._request_messages(model),
+                temperature=temperature if temperature is not None else self.temperature,
+                max_tokens=max_tokens if max_tokens is not None else self.max_tokens,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+        except Exception as e:
+            if not is_rate_limit(e): raise e
+            yield "Error: Rate limit exceeded multiple times."
+            return
+        last = None
+        for chunk in stream:
+            last = chunk
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+        self._record_usage(last, started)
+    async def agenerate_response(self, prompt: str = None, temperature: float = None, max_tokens: int = None, model: str = None) -> str:
+        if self.aclient is None:
+            return await asyncio.get_running_loop().run_in_executor(None, in_current_context(self.generate_response, prompt, temperature, max_tokens, model))
+        if prompt:
+            self.messages.append({"role": "user", "content": prompt})
+        started = time.perf_counter()
+        try:
+            response = await achat_completion(
+                self.aclient,
+                model=model or self.model,
+                messages=self._request_messages(model),
+                temperature=temperature if temperature is not None else self.temperature,
+                max_tokens=max_tokens if max_tokens is not None else self.max_tokens
+            )
+        except Exception as e:
+            if is_rate_limit(e): return "Error: Rate limit exceeded multiple times."
+            raise e
+        self._record_usage(response, started)
+        return response.choices[0].message.content.strip()
+    def _tool_request(self, temperature: float = None, max_tokens: int = None, final: bool = False, model: str = None) -> Dict:
+        """Completion arguments for native tool calling; `final` keeps the tools declared but forbids calling them."""
+        request = {"model": model or self.model, "messages": self._request_messages(model), "temperature": temperature if temperature is not None else self.temperature, "max_tokens": max_tokens if max_tokens is not None else self.max_tokens}
+        if self.tool_schemas:
+            request["tools"] = self.tool_schemas
+            if final: request["tool_choice"] = "none"
+        return request
+    @staticmethod
+    def _parse_message(message) -> tuple:
+        calls = [{"id": call.id, "name": call.function.name, "arguments": call.function.arguments} for call in message.tool_calls or []]
+        return (message.content or "").strip(), calls
+    def generate_message(self, temperature: float = None, max_tokens: int = None, final: bool = False, model: str = None) -> tuple:
+        """Native tool-calling counterpart of generate_response. Returns (content, tool_calls), each call a dict
+        with the id, name and JSON arguments the model produced."""
+        started = time.perf_counter()
+        try:
+            response = chat_completion(self.client, **self._tool_request(temperature, max_tokens, final, model))
+        except Exception as e:
+            if is_rate_limit(e): return "Error: Rate limit exceeded multiple times.", []
+            raise e
+        self._record_usage(response, started)
+        return self._parse_message(response.choices[0].message)
+    async def agenerate_message(self, temperature: float = None, max_tokens: int = None, final: bool = False, model: str = None) -> tuple:
+        if self.aclient is None:
+            return await asyncio.get_running_loop().run_in_executor(None, in_current_context(self.generate_message, temperature, max_tokens, final, model))
+        started = time.perf_counter()
+        try:
+            response = await achat_completion(self.aclient, **self._tool_request(temperature, max_tokens, final, model))
+        except Exception as e:
+            if is_rate_limit(e): return "Error: Rate limit exceeded multiple times.", []
+            raise e
+        self._record_usage(response, started)
+        return self._parse_message(response.choices[0].message)
+    def _stream_message(self, temperature: float = None, max_tokens: int = None, final: bool = False, model: str = None, draft: bool = False) -> Iterator[tuple]:
+        """Streams one native tool-calling completion as ("token", text) events, also sent as ("final_token", text)
+        until the first tool call appears, unless it is a `draft` the router may replace. Tool call deltas are
+        assembled by index; (content, tool_calls) is the generator's return value. Token usage is recorded from the
+        stream's final chunk."""
+        started = time.perf_counter()
+        try:
+            stream = chat_completion(self.client, stream=True, stream_options={"include_usage": True}, **self._tool_request(temperature, max_tokens, final, model))
+        except Exception as e:
+            if not is_rate_limit(e): raise e
+            yield ("token", "Error: Rate limit exceeded multiple times.")
+            return "Error: Rate limit exceeded multiple times.", []
+        parts, calls, last = [], {}, None
+        for chunk in stream:
+            last = chunk
+            if not chunk.choices: continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                parts.append(delta.content)
+                yield ("token", delta.content)
+                if not calls and not draft: yield ("final_token", delta.content)
+            for part in delta.tool_calls or []:
+                call = calls.setdefault(part.index, {"id": "", "name": "", "arguments": ""})
+                call["id"] = part.id or call["id"]
+                if part.function is not None:
+                    call["name"] += part.function.name or ""
+                    call["arguments"] += part.function.arguments or ""
+        self._record_usage(last, started)
+        return "".join(parts).strip(), [calls[index] for index in sorted(calls)]
+    def _tool_call_actions(self, calls: List[Dict]) -> List[tuple]:
+        """(tool, input) pairs for dispatch_actions. The `input` argument is decoded like a ReAct Action Input;
+        arguments that do not follow the schema are passed on as they are."""
         actions = []
-        current_action = None
-        current_input = ""
-        inside_input = False
-        inside_observation = False
-        print("Parsing actions from response...")
-        for line in lines:
-            if line.strip().startswith("Action:"):
-                if current_action and current_input:
-                    actions.append((current_action, self.safe_parse_input(current_input)))
-                current_action = line.replace("Action:", "").strip().lower()
-                current_input = ""
-                inside_input = False
-                inside_observation = False
-            elif line.strip().startswith("Action Input:"):
-                current_input = line.replace("Action Input:", "").strip()
-                inside_input = True
-                inside_observation = False
-            elif line.strip().startswith("Observation:"):
-                inside_observation = True
-            elif inside_input and not inside_observation:
-                current_input += "\n" + line
-        if current_action and current_input:
-            actions.append((current_action, self.safe_parse_input(current_input)))
+        for call in calls:
+            try:
+                arguments = json.loads(call["arguments"] or "{}")
+            except json.JSONDecodeError:
+                arguments = call["arguments"]
+            if isinstance(arguments, dict) and "input" in arguments: arguments = arguments["input"]
+            actions.append((call["name"].lower(), self.safe_parse_input(arguments) if isinstance(arguments, str) else arguments))
         return actions
-    def generate_response(self, prompt: str = None, temperature: float = None, max_tokens: int = None) -> str:
-        retries = 5
+    def _append_tool_turn(self, content: str, calls: List[Dict], observations: List[str]) -> None:
+        """Records the assistant's tool calls and one tool message per call. Calls cut off by max_tool_calls
+        still get a reply, since the API rejects tool calls left unanswered."""
+        self.messages.append({"role": "assistant", "content": content or None, "tool_calls": [{"id": call["id"], "type": "function", "function": {"name": call["name"], "arguments": call["arguments"]}} for call in calls]})
+        for i, call in enumerate(calls):
+            result = observations[i].removeprefix("Observation: ") if i < len(observations) else "Error: tool call limit reached, answer with the information gathered so far."
+            self.messages.append({"role": "tool", "tool_call_id": call["id"], "content": result})
+    def _escalate(self, reason: str) -> None:
+        self.token_usage[-1]["escalated"] = reason
+        current_span().add("escalations")
+        logger.info("Escalating step to %s: %s", self.model, reason)
+    def _final_tokens(self, max_tokens: int) -> int:
+        return self.router.final_tokens(max_tokens) if self.router is not None else max_tokens
+    def _react_escalation(self, response: str) -> str:
+        actions = self.parse_actions(response)
+        final = "Final Answer:" in response and not actions
+        return self.router.escalation(final, bool(actions) or final)
+    def _calls_escalation(self, calls: List[Dict]) -> str:
+        def decodes(arguments: str) -> bool:
+            try:
+                json.loads(arguments or "{}")
+                return True
+            except json.JSONDecodeError:
+                return False
+        return self.router.escalation(not calls, all(decodes(call["arguments"]) for call in calls))
+    def _step_response(self, prompt: str, temperature: float, max_tokens: int) -> str:
+        """generate_response for one ReAct step. With a router the small model drafts it under the step cap, and
+        the main model re-runs it when the router escalates."""
+        if self.router is None: return self.generate_response(prompt, temperature, max_tokens)
+        response = self.generate_response(prompt, temperature, self.router.step_tokens(max_tokens), self.router.small_model)
+        reason = self._react_escalation(response)
+        if reason is None: return response
+        self._escalate(reason)
+        return self.generate_response(None, temperature, self.router.final_tokens(max_tokens))
+    async def _astep_response(self, prompt: str, temperature: float, max_tokens: int) -> str:
+        if self.router is None: return await self.agenerate_response(prompt, temperature, max_tokens)
+        response = await self.agenerate_response(prompt, temperature, self.router.step_tokens(max_tokens), self.router.small_model)
+        reason = self._react_escalation(response)
+        if reason is None: return response
+        self._escalate(reason)
+        return await self.agenerate_response(None, temperature, self.router.final_tokens(max_tokens))
+    def _step_message(self, temperature: float, max_tokens: int) -> tuple:
+        """generate_message for one native tool-calling step, routed like _step_response."""
+        if self.router is None: return self.generate_message(temperature, max_tokens)
+        content, calls = self.generate_message(temperature, self.router.step_tokens(max_tokens), model=self.router.small_model)
+        reason = self._calls_escalation(calls)
+        if reason is None: return content, calls
+        self._escalate(reason)
+        return self.generate_message(temperature, self.router.final_tokens(max_tokens))
+    async def _astep_message(self, temperature: float, max_tokens: int) -> tuple:
+        if self.router is None: return await self.agenerate_message(temperature, max_tokens)
+        content, calls = await self.agenerate_message(temperature, self.router.step_tokens(max_tokens), model=self.router.small_model)
+        reason = self._calls_escalation(calls)
+        if reason is None: return content, calls
+        self._escalate(reason)
+        return await self.agenerate_message(temperature, self.router.final_tokens(max_tokens))
+    @staticmethod
+    def _hold(events: Iterator[tuple], held: list):
+        """Runs the `events` generator to its end, keeping its events in `held` instead of yielding them; returns its value."""
+        while True:
+            try:
+                held.append(next(events))
+            except StopIteration as done:
+                return done.value
+    def _stream_step_message(self, temperature: float, max_tokens: int) -> Iterator[tuple]:
+        """_stream_message for one native tool-calling step, routed like _step_response. Whether a draft is kept
+        is only known once its tool calls are complete, so its events are held back until then."""
+        if self.router is None: return (yield from self._stream_message(temperature, max_tokens))
+        held = []
+        content, calls = self._hold(self._stream_message(temperature, self.router.step_tokens(max_tokens), model=self.router.small_model, draft=self.router.replaces_final), held)
+        reason = self._calls_escalation(calls)
+        if reason is None:
+            yield from held
+            return content, calls
+        self._escalate(reason)
+        return (yield from self._stream_message(temperature, self.router.final_tokens(max_tokens)))
+    def _stream_step(self, prompt: str, temperature: float, max_tokens: int, pending: list, tool_usage_count: int) -> Iterator[tuple]:
+        """Streams one ReAct step, dispatching actions as soon as they are complete, routed like _step_response.
+        A draft's events are held back while the router may still replace it, and a draft whose final answer the
+        router would replace never sends final_token events. Returns (parser, exhausted)."""
+        if self.router is None:
+            parser, exhausted, _ = yield from self._stream_completion(prompt, temperature, max_tokens, max_tokens, None, pending, tool_usage_count)
+            return parser, exhausted
+        parser, exhausted, held = yield from self._stream_completion(prompt, temperature, max_tokens, self.router.step_tokens(max_tokens), self.router.small_model, pending, tool_usage_count, self.router.replaces_final, hold=True)
+        # Escalation only happens for drafts without actions, so no tool has been started for them.
+        reason = self._react_escalation(parser.text.strip())
+        if reason is None:
+            yield from held
+            return parser, exhausted
+        self._escalate(reason)
+        parser, exhausted, _ = yield from self._stream_completion(None, temperature, max_tokens, self.router.final_tokens(max_tokens), None, pending, tool_usage_count)
+        return parser, exhausted
+    def _stream_completion(self, prompt: str, temperature: float, max_tokens: int, completion_tokens: int, model: str, pending: list, tool_usage_count: int, draft: bool = False, hold: bool = False) -> Iterator[tuple]:
+        """Streams one ReAct completion. With `hold`, events are kept back until an action, or a final answer
+        that is not a `draft`, shows the step cannot be escalated. Returns (parser, exhausted, events still held)."""
+        parser = ActionStreamParser(self.safe_parse_input)
+        exhausted = False
+        held = [] if hold else None
+        for chunk in itertools.chain(self.generate_stream(prompt, temperature, completion_tokens, model), [None]):
+            events = [] if chunk is None else [("token", chunk)]
+            for event in parser.close() if chunk is None else parser.feed(chunk):
+                exhausted = self._stream_event(event, pending, tool_usage_count, temperature, max_tokens) or exhausted
+                if not (draft and event[0] == "final_token"): events.append(event)
+            if held is not None:
+                held.extend(events)
+                if not parser.actions and not (parser.final_text and not draft): continue
+                events, held = held, None
+            yield from events
+        return parser, exhausted, held or []
+    def _run_native(self, prompt: str, temperature: float, max_tokens: int, run_span) -> str:
+        """__call__ in native tool-calling mode. A reply without tool calls is the final answer; when steps or
+        tool calls run out, one more completion with tool_choice="none" answers from what was gathered."""
+        tracer = get_tracer()
         if prompt:
             self.messages.append({"role": "user", "content": prompt})
-        for _ in range(retries):
-            try:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=self.messages,
-                    temperature=temperature if temperature is not None else self.temperature,
-                    max_tokens=max_tokens if max_tokens is not None else self.max_tokens
-                ).choices[0].message.content.strip()
-                return response
-            except Exception as e:
-                if "Rate limit" in str(e):
-                    print("Rate limited, retrying...")
-                    time.sleep(10)
-                else: raise e
-        return "Error: Rate limit exceeded multiple times."
-    def __call__(self, prompt: str, temperature: float = None, max_tokens: int = None, clear_history:bool=False) -> str:
-        if clear_history: self.clear_history()
-        temperature = temperature if temperature is not None else self.temperature
-        max_tokens = max_tokens if max_tokens is not None else self.max_tokens
-        response = self.generate_response(prompt, temperature, max_tokens)
-        last_valid_response = response
         tool_usage_count = 0
         for step in range(self.max_steps):
-            self.messages.append({"role": "assistant", "content": response})
-            print("=" * 80)
-            print(response)
-            print("=" * 80)
-            if "Final Answer:" in response and not self.parse_actions(response):
-                print("Final answer found in response.")
-                return response.split("Final Answer:")[-1].strip()
-            actions = self.parse_actions(response)
-            if not actions:
-                print("No actions found and no final answer.")
-                break
-            for action, action_input in actions:
-                tool = self.tools.get(action)
-                if tool:
-                    if tool_usage_count >= self.max_tool_calls:
-                        print("Max tool usage reached.")
+            with tracer.span("agent.step", step=step) as step_span:
+                run_span.add("steps")
+                content, calls = self._step_message(temperature, max_tokens)
+                logger.debug("Step %d response:\n%.2000s\nTool calls: %.1000s", step, content, calls)
+                if not calls:
+                    self.messages.append({"role": "assistant", "content": content})
+                    run_span.set(tool_calls=tool_usage_count, outcome="final_answer")
+                    return content
+                observations, made, exhausted = self.dispatch_actions(self._tool_call_actions(calls), temperature, max_tokens, self.max_tool_calls - tool_usage_count)
+                step_span.set(actions=len(calls), tool_calls=made)
+                tool_usage_count += made
+                self._append_tool_turn(content, calls, observations)
+                if exhausted:
+                    logger.info("Max tool usage reached.")
+                    run_span.set(outcome="max_tool_calls")
+                    break
+        else:
+            logger.info("Max steps reached. Asking for a final answer.")
+            run_span.set(outcome="max_steps")
+        run_span.set(tool_calls=tool_usage_count)
+        content, _ = self.generate_message(temperature, self._final_tokens(max_tokens), final=True)
+        self.messages.append({"role": "assistant", "content": content})
+        return content
+    async def _arun_native(self, prompt: str, temperature: float, max_tokens: int, run_span) -> str:
+        """Async counterpart of _run_native."""
+        tracer = get_tracer()
+        if prompt:
+            self.messages.append({"role": "user", "content": prompt})
+        tool_usage_count = 0
+        for step in range(self.max_steps):
+            with tracer.span("agent.step", step=step) as step_span:
+                run_span.add("steps")
+                content, calls = await self._astep_message(temperature, max_tokens)
+                logger.debug("Step %d response:\n%.2000s\nTool calls: %.1000s", step, content, calls)
+                if not calls:
+                    self.messages.append({"role": "assistant", "content": content})
+                    run_span.set(tool_calls=tool_usage_count, outcome="final_answer")
+                    return content
+                observations, made, exhausted = await self.adispatch_actions(self._tool_call_actions(calls), temperature, max_tokens, self.max_tool_calls - tool_usage_count)
+                step_span.set(actions=len(calls), tool_calls=made)
+                tool_usage_count += made
+                self._append_tool_turn(content, calls, observations)
+                if exhausted:
+                    logger.info("Max tool usage reached.")
+                    run_span.set(outcome="max_tool_calls")
+                    break
+        else:
+            logger.info("Max steps reached. Asking for a final answer.")
+            run_span.set(outcome="max_steps")
+        run_span.set(tool_calls=tool_usage_count)
+        content, _ = await self.agenerate_message(temperature, self._final_tokens(max_tokens), final=True)
+        self.messages.append({"role": "assistant", "content": content})
+        return content
+    def _stream_native(self, prompt: str, temperature: float, max_tokens: int, run_span) -> Iterator[tuple]:
+        """stream() in native tool-calling mode, with the same events. Tools start once the completion has ended."""
+        tracer = get_tracer()
+        if prompt:
+            self.messages.append({"role": "user", "content": prompt})
+        tool_usage_count = 0
+        for step in range(self.max_steps):
+            with tracer.span("agent.step", step=step) as step_span:
+                run_span.add("steps")
+                content, calls = yield from self._stream_step_message(temperature, max_tokens)
+                logger.debug("Step %d response:\n%.2000s\nTool calls: %.1000s", step, content, calls)
+                if not calls:
+                    self.messages.append({"role": "assistant", "content": content})
+                    run_span.set(tool_calls=tool_usage_count, outcome="final_answer")
+                    yield ("final", content)
+                    return
+                actions = self._tool_call_actions(calls)
+                for action in actions:
+                    yield ("action", action)
+                observations, made, exhausted = self.dispatch_actions(actions, temperature, max_tokens, self.max_tool_calls - tool_usage_count)
+                step_span.set(actions=len(calls), tool_calls=made)
+                tool_usage_count += made
+                self._append_tool_turn(content, calls, observations)
+                for observation in observations:
+                    yield ("observation", observation)
+                if exhausted:
+                    logger.info("Max tool usage reached.")
+                    run_span.set(outcome="max_tool_calls")
+                    break
+        else:
+            logger.info("Max steps reached. Asking for a final answer.")
+            run_span.set(outcome="max_steps")
+        run_span.set(tool_calls=tool_usage_count)
+        content, _ = yield from self._stream_message(temperature, self._final_tokens(max_tokens), final=True)
+        self.messages.append({"role": "assistant", "content": content})
+        yield ("final", content)
+    def __call__(self, prompt: str, temperature: float = None, max_tokens: int = None, clear_history:bool=False) -> str:
+        tracer = get_tracer()
+        with tracer.span("agent.run", model=self.model) as run_span:
+            if clear_history: self.clear_history()
+            temperature = temperature if temperature is not None else self.temperature
+            max_tokens = max_tokens if max_tokens is not None else self.max_tokens
+            if self.tool_calling == "native": return self._run_native(prompt, temperature, max_tokens, run_span)
+            response = self._step_response(prompt, temperature, max_tokens)
+            last_valid_response = response
+            tool_usage_count = 0
+            for step in range(self.max_steps):
+                with tracer.span("agent.step", step=step) as step_span:
+                    run_span.add("steps")
+                    self.messages.append({"role": "assistant", "content": response})
+                    logger.debug("Step %d response:\n%.2000s", step, response)
+                    if "Final Answer:" in response and not self.parse_actions(response):
+                        logger.debug("Final answer found in response.")
+                        run_span.set(tool_calls=tool_usage_count, outcome="final_answer")
+                        return response.split("Final Answer:")[-1].strip()
+                    actions = self.parse_actions(response)
+                    if not actions:
+                        logger.info("No actions found and no final answer.")
+                        run_span.set(outcome="no_action")
+                        break
+                    observations, calls, exhausted = self.dispatch_actions(actions, temperature, max_tokens, self.max_tool_calls - tool_usage_count)
+                    step_span.set(actions=len(actions), tool_calls=calls)
+                    tool_usage_count += calls
+                    for observation in observations:
+                        self.messages.append({"role": "assistant", "content": observation})
+                    if exhausted:
+                        logger.info("Max tool usage reached.")
+                        run_span.set(tool_calls=tool_usage_count, outcome="max_tool_calls")
+                        return last_valid_response
+                    response = self._step_response(self.final_prompt, temperature, max_tokens)
+                    if response:
+                        last_valid_response = response
+            else:
+                logger.info("Max steps reached. Returning best attempt.")
+                run_span.set(outcome="max_steps")
+            run_span.set(tool_calls=tool_usage_count)
+            return last_valid_response
+    def stream(self, prompt: str, temperature: float = None, max_tokens: int = None, clear_history:bool=False) -> Iterator[tuple]:
+        """Streaming version of __call__. Yields (event, payload) tuples:
+        ("token", text) for every completion chunk, ("action", (tool, input)) when a tool is dispatched,
+        ("observation", text) once its result is in, ("final_token", text) for Final Answer text as it is generated,
+        and a closing ("final", answer). Tools start as soon as their Action Input is complete, while the model
+        is still generating, and their Observations are appended in the order the actions appeared."""
+        tracer = get_tracer()
+        with tracer.span("agent.run", model=self.model, stream=True) as run_span:
+            if clear_history: self.clear_history()
+            temperature = temperature if temperature is not None else self.temperature
+            max_tokens = max_tokens if max_tokens is not None else self.max_tokens
+            if self.tool_calling == "native":
+                yield from self._stream_native(prompt, temperature, max_tokens, run_span)
+                return
+            last_valid_response = None
+            tool_usage_count = 0
+            for step in range(self.max_steps):
+                with tracer.span("agent.step", step=step) as step_span:
+                    run_span.add("steps")
+                    pending = []
+                    parser, exhausted = yield from self._stream_step(prompt if step == 0 else self.final_prompt, temperature, max_tokens, pending, tool_usage_count)
+                    response = parser.text.strip()
+                    if response or last_valid_response is None:
+                        last_valid_response = response
+                    self.messages.append({"role": "assistant", "content": response})
+                    logger.debug("Step %d response:\n%.2000s", step, response)
+                    if "Final Answer:" in response and not parser.actions:
+                        logger.debug("Final answer found in response.")
+                        run_span.set(tool_calls=tool_usage_count, outcome="final_answer")
+                        yield ("final", response.split("Final Answer:")[-1].strip())
+                        return
+                    if not parser.actions:
+                        logger.info("No actions found and no final answer.")
+                        run_span.set(outcome="no_action")
+                        break
+                    for action, future, submitted in pending:
+                        observation = self._missing_tool(action) if future is None else f"Observation: {self._tool_result(action, future, submitted + self.tool_timeout if self.tool_timeout is not None else None)}"
+                        self.messages.append({"role": "assistant", "content": observation})
+                        yield ("observation", observation)
+                    calls = sum(1 for _, future, _ in pending if future is not None)
+                    step_span.set(actions=len(parser.actions), tool_calls=calls)
+                    tool_usage_count += calls
+                    if exhausted:
+                        logger.info("Max tool usage reached.")
+                        run_span.set(tool_calls=tool_usage_count, outcome="max_tool_calls")
+                        yield ("final", last_valid_response)
+                        return
+            else:
+                logger.info("Max steps reached. Returning best attempt.")
+                run_span.set(outcome="max_steps")
+            run_span.set(tool_calls=tool_usage_count)
+            yield ("final", last_valid_response)
+    def _stream_event(self, event: tuple, pending: list, tool_usage_count: int, temperature: float, max_tokens: int) -> bool:
+        """Dispatches a streamed action right away. Returns True once max_tool_calls would be exceeded."""
+        kind, payload = event
+        if kind != "action": return False
+        action, action_input = payload
+        if action not in self.tools:
+            pending.append((action, None, None))
+            return False
+        if tool_usage_count + sum(1 for _, future, _ in pending if future is not None) >= self.max_tool_calls:
+            return True
+        pending.append((action, self._get_executor().submit(in_current_context(self.run_tool, action, action_input, temperature, max_tokens)), time.monotonic()))
+        return False
+    async def arun(self, prompt: str, temperature: float = None, max_tokens: int = None, clear_history:bool=False) -> str:
+        """Async version of __call__. Never blocks the event loop, so many agents (one per session) can share a loop."""
+        tracer = get_tracer()
+        with tracer.span("agent.run", model=self.model) as run_span:
+            if clear_history: self.clear_history()
+            temperature = temperature if temperature is not None else self.temperature
+            max_tokens = max_tokens if max_tokens is not None else self.max_tokens
+            if self.tool_calling == "native": return await self._arun_native(prompt, temperature, max_tokens, run_span)
+            response = await self._astep_response(prompt, temperature, max_tokens)
+            last_valid_response = response
+            tool_usage_count = 0
+            for step in range(self.max_steps):
+                with tracer.span("agent.step", step=step) as step_span:
+                    run_span.add("steps")
+                    self.messages.append({"role": "assistant", "content": response})
+                    logger.debug("Step %d response:\n%.2000s", step, response)
+                    if "Final Answer:" in response and not self.parse_actions(response):
+                        logger.debug("Final answer found in response.")
+                        run_span.set(tool_calls=tool_usage_count, outcome="final_answer")
+                        return response.split("Final Answer:")[-1].strip()
+                    actions = self.parse_actions(response)
+                    if not actions:
+                        logger.info("No actions found and no final answer.")
+                        run_span.set(outcome="no_action")
+                        break
+                    observations, calls, exhausted = await self.adispatch_actions(actions, temperature, max_tokens, self.max_tool_calls - tool_usage_count)
+                    step_span.set(actions=len(actions), tool_calls=calls)
+                    tool_usage_count += calls
+                    for observation in observations:
+                        self.messages.append({"role": "assistant", "content": observation})
+                    if exhausted:
+                        logger.info("Max tool usage reached.")
+                        run_span.set(tool_calls=tool_usage_count, outcome="max_tool_calls")
                         return last_valid_response
-                    print(f"\U0001f6e0\ufe0f Calling tool: {action} with input: {action_input}")
-                    try:
-                        tool_result = tool.run(action_input, temperature, max_tokens)
-                        print(f"Tool result: {tool_result}")
-                    except Exception as e:
-                        print(f"Error while calling tool: {e}")
-                        tool_result = f"Error while calling tool: {e}"
-                    tool_usage_count += 1
-                    self.messages.append({"role": "assistant", "content": f"Observation: {tool_result}"})
-                else:
-                    error_message = f"Observation: Tool '{action}' not found. Available tools: {list(self.tools.keys())}"
-                    print(error_message)
-                    self.messages.append({"role": "assistant", "content": error_message})
-            response = self.generate_response(self.final_prompt, temperature, max_tokens)
-            if response:
-                last_valid_response = response
-        print("Max steps reached. Returning best attempt.")
-        return last_valid_response
+                    response = await self._astep_response(self.final_prompt, temperature, max_tokens)
+                    if response:
+                        last_valid_response = response
+            else:
+                logger.info("Max steps reached. Returning best attempt.")
+                run_span.set(outcome="max_steps")
+            run_span.set(tool_calls=tool_usage_count)
+            return last_valid_response
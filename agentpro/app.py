@@ -1,8 +1,33 @@
+import os
+import threading
+import dotenv
 import gradio as gr
-from run_agent_once import run_agent_once
-def gradio_interface(user_input):
-    output = run_agent_once(user_input)
+from agentpro.serving import AgentService, QueueTimeout, ServiceOverloaded, build_agent
+from agentpro.tracing import configure_logging
+dotenv.load_dotenv()
+POOL_SIZE = int(os.environ.get("AGENTPRO_POOL_SIZE", 4))
+MAX_QUEUE = int(os.environ.get("AGENTPRO_MAX_QUEUE", 32))
+_service = None
+_service_lock = threading.Lock()
+def get_service() -> AgentService:
+    """The app's AgentService, built on first use so importing this module needs no API keys."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = AgentService(build_agent, pool_size=POOL_SIZE, max_queue=MAX_QUEUE)
+    return _service
+def run_agent_once(user_input: str, session_id: str = None) -> str:
+    """Runs one query on a pooled agent; with a session_id, earlier turns of that session are kept."""
+    try:
+        return get_service().run(user_input, session_id=session_id)["response"]
+    except (ServiceOverloaded, QueueTimeout) as e:
+        return f"The agent is busy right now, please try again shortly. ({e})"
+def gradio_interface(user_input, request: gr.Request):
+    output = run_agent_once(user_input, session_id=getattr(request, "session_hash", None))
     return output
-demo = gr.Interface(fn=gradio_interface, inputs=gr.Textbox(lines=3, placeholder="Input here.."), outputs="text", title="Agent-Pro : M2ai", description="A Gradio demo for our optimized agent pipeline forked from traversaal.ai")
+demo = gr.Interface(fn=gradio_interface, inputs=gr.Textbox(lines=3, placeholder="Input here.."), outputs="text", title="Agent-Pro : M2ai", description="A Gradio demo for our optimized agent pipeline forked from traversaal.ai", concurrency_limit=POOL_SIZE)
 if __name__ == "__main__":
-    demo.launch()
+    configure_logging()
+    get_service()
+    demo.queue(max_size=MAX_QUEUE).launch()
@@ -0,0 +1,156 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Set, Tuple
+from .agent import AgentPro
+from .pool import AgentPool
+from .tracing import configure_logging
+logger = logging.getLogger(__name__)
+def read_prompts(path: str, prompt_field: str = "prompt", id_field: str = "id") -> Iterator[Tuple[str, str]]:
+    """Streams (id, prompt) pairs from a JSONL file; rows without `id_field` are numbered by line."""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line: continue
+            row = json.loads(line)
+            if isinstance(row, str): row = {prompt_field: row}
+            yield str(row.get(id_field, line_number)), row[prompt_field]
+def completed_ids(output_path: str, retry_errors: bool = False) -> Set[str]:
+    """Ids already written to `output_path`.
+
+    Blank lines are skipped. An unterminated last line, left by a killed run, is cut off; a corrupt line
+    anywhere else raises ValueError instead of discarding the results after it. With `retry_errors`, error
+    rows are removed from the file, so every id appears once after the retried prompts are appended.
+    """
+    done = set()
+    if not os.path.exists(output_path): return done
+    valid_bytes, failed, last = 0, 0, b"\n"
+    with open(output_path, "rb") as f:
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    if line.endswith(b"\n"): raise ValueError(f"{output_path}:{line_number} is not a JSON row; fix or remove it before resuming")
+                    break
+                if retry_errors and "error" in row: failed += 1
+                else: done.add(str(row["id"]))
+            valid_bytes += len(line)
+            last = line
+    if valid_bytes < os.path.getsize(output_path):
+        with open(output_path, "r+b") as f:
+            f.truncate(valid_bytes)
+    if not last.endswith(b"\n"):
+        # A complete last row without its newline would otherwise run into the next appended row.
+        with open(output_path, "ab") as f:
+            f.write(b"\n")
+    if failed: _drop_error_rows(output_path)
+    return done
+def _drop_error_rows(output_path: str) -> None:
+    partial = output_path + ".partial"
+    with open(output_path, "rb") as source, open(partial, "wb") as target:
+        for line in source:
+            if line.strip() and "error" in json.loads(line): continue
+            target.write(line)
+    os.replace(partial, output_path)
+def _percentile(values: List[float], q: float) -> float:
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+class BatchRunner:
+    """Runs a JSONL file of prompts through a pool of `concurrency` isolated agents.
+
+    Each result is appended to the output JSONL as soon as it finishes, so the output file is the
+    checkpoint: rerunning with the same output skips ids already in it (and, with `retry_errors`, drops
+    the rows of the ones that failed and reruns them). Input is streamed with at most `2 * concurrency` prompts in flight, so files of
+    any size run in constant memory. `run` returns throughput, latency percentiles and token totals.
+    """
+    def __init__(self, factory: Callable[[], AgentPro], concurrency: int = 8, prompt_field: str = "prompt", id_field: str = "id", retry_errors: bool = False, progress_every: int = 100):
+        self.pool = AgentPool(factory, concurrency)
+        self.concurrency = concurrency
+        self.prompt_field = prompt_field
+        self.id_field = id_field
+        self.retry_errors = retry_errors
+        self.progress_every = progress_every
+        self._lock = threading.Lock()
+    def _run_one(self, prompt_id: str, prompt: str) -> dict:
+        start = time.monotonic()
+        with self.pool.acquire() as agent:
+            try:
+                row = {"id": prompt_id, "response": agent(prompt)}
+            except Exception as e:
+                row = {"id": prompt_id, "error": f"{type(e).__name__}: {e}"}
+            usage = getattr(agent, "token_usage", [])
+            row["prompt_tokens"] = sum(step.get("prompt_tokens", 0) for step in usage)
+            row["completion_tokens"] = sum(step.get("completion_tokens", 0) for step in usage)
+            row["llm_calls"] = len(usage)
+        row["seconds"] = round(time.monotonic() - start, 3)
+        return row
+    def run(self, input_path: str, output_path: str, limit: Optional[int] = None) -> dict:
+        done = completed_ids(output_path, self.retry_errors)
+        if done: logger.info("Resuming: %d prompts already in %s", len(done), output_path)
+        report = {"completed": 0, "errors": 0, "skipped": len(done), "prompt_tokens": 0, "completion_tokens": 0}
+        latencies = []
+        in_flight = threading.BoundedSemaphore(2 * self.concurrency)
+        start = time.monotonic()
+        with open(output_path, "a", encoding="utf-8") as output, ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            def finished(future):
+                # The permit goes back even if recording the row fails, or the submit loop would stall for good.
+                try:
+                    try:
+                        row = future.result()
+                    except Exception as e:
+                        row = {"id": getattr(future, "prompt_id", "?"), "error": f"{type(e).__name__}: {e}", "seconds": 0.0}
+                    with self._lock:
+                        output.write(json.dumps(row, ensure_ascii=False) + "\n")
+                        output.flush()
+                        report["errors" if "error" in row else "completed"] += 1
+                        report["prompt_tokens"] += row.get("prompt_tokens", 0)
+                        report["completion_tokens"] += row.get("completion_tokens", 0)
+                        latencies.append(row["seconds"])
+                        total = report["completed"] + report["errors"]
+                        if self.progress_every and total % self.progress_every == 0:
+                            logger.info("%d prompts done (%.2f/s)", total, total / (time.monotonic() - start))
+                except Exception:
+                    logger.exception("Could not record the result for prompt %s", getattr(future, "prompt_id", "?"))
+                finally:
+                    in_flight.release()
+            submitted = 0
+            for prompt_id, prompt in read_prompts(input_path, self.prompt_field, self.id_field):
+                if prompt_id in done: continue
+                if limit is not None and submitted >= limit: break
+                in_flight.acquire()
+                future = executor.submit(self._run_one, prompt_id, prompt)
+                future.prompt_id = prompt_id
+                future.add_done_callback(finished)
+                submitted += 1
+        elapsed = time.monotonic() - start
+        latencies.sort()
+        processed = report["completed"] + report["errors"]
+        report.update(seconds=round(elapsed, 3), throughput_per_second=processed / elapsed if elapsed else 0.0, latency_p50=_percentile(latencies, 0.5), latency_p95=_percentile(latencies, 0.95), latency_p99=_percentile(latencies, 0.99), latency_max=latencies[-1] if latencies else 0.0)
+        return report
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a JSONL file of prompts through AgentPro, resumably.")
+    parser.add_argument("input", help="JSONL file, one {\"id\": ..., \"prompt\": ...} object per line")
+    parser.add_argument("output", help="results JSONL; rerun with the same file to resume")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--prompt-field", default="prompt")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--retry-errors", action="store_true", help="rerun prompts whose earlier result was an error")
+    parser.add_argument("--limit", type=int, help="stop after this many new prompts")
+    parser.add_argument("--report", help="also write the final report to this JSON file")
+    args = parser.parse_args(argv)
+    configure_logging()
+    import dotenv
+    dotenv.load_dotenv()
+    from .serving import build_agent
+    runner = BatchRunner(build_agent, args.concurrency, args.prompt_field, args.id_field, args.retry_errors)
+    report = runner.run(args.input, args.output, args.limit)
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+class CompletionCache:
+    """Two-tier cache of serialized chat completions: an in-memory LRU in front of an optional SQLite file.
+
+    Keys are content hashes of the request (model, messages, temperature, max_tokens and any other request
+    parameters), so identical calls from the agent and from any tool share entries. Both tiers are bounded by
+    the byte size of the stored values; least recently used entries are evicted first. Entries older than
+    `ttl` seconds are treated as misses.
+    """
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float = None, path: str = None, disk_max_bytes: int = 1024 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.path = path
+        self.disk_max_bytes = disk_max_bytes
+        self.stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "evictions": 0, "expired": 0}
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, value TEXT, size INTEGER, created REAL, accessed REAL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS completions_accessed ON completions (accessed)")
+            self._db.commit()
+    @staticmethod
+    def make_key(**request: Any) -> str:
+        payload = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created = entry
+                if not self._expired(created):
+                    self._memory.move_to_end(key)
+                    self.stats["hits"] += 1
+                    self.stats["memory_hits"] += 1
+                    return value
+                self._drop(key)
+                self.stats["expired"] += 1
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created FROM completions WHERE key = ?", (key,)).fetchone()
+                if row and not self._expired(row[1]):
+                    self._db.execute("UPDATE completions SET accessed = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    self._remember(key, row[0], row[1])
+                    self.stats["hits"] += 1
+                    self.stats["disk_hits"] += 1
+                    return row[0]
+                if row:
+                    self._db.execute("DELETE FROM completions WHERE key = ?", (key,))
+                    self._db.commit()
+                    self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return None
+    def set(self, key: str, value: str) -> None:
+        created = time.time()
+        with self._lock:
+            self._remember(key, value, created)
+            if self._db is not None:
+                size = len(value.encode("utf-8"))
+                self._db.execute("INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?)", (key, value, size, created, created))
+                self._evict_disk()
+                self._db.commit()
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM completions")
+                self._db.commit()
+    def info(self) -> dict:
+        """Counters plus current tier sizes."""
+        with self._lock:
+            disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0] if self._db is not None else 0
+            return {**self.stats, "memory_entries": len(self._memory), "memory_bytes": self._memory_bytes, "disk_bytes": disk_bytes}
+    def _remember(self, key: str, value: str, created: float) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes: return
+        self._drop(key)
+        self._memory[key] = (value, created)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_bytes:
+            self._drop(next(iter(self._memory)))
+            self.stats["evictions"] += 1
+    def _drop(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= len(entry[0].encode("utf-8"))
+    def _evict_disk(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        if total <= self.disk_max_bytes: return
+        for key, size in self._db.execute("SELECT key, size FROM completions ORDER BY accessed ASC").fetchall():
+            self._db.execute("DELETE FROM completions WHERE key = ?", (key,))
+            self.stats["evictions"] += 1
+            total -= size
+            if total <= self.disk_max_bytes: break
+_default_cache = None
+_default_cache_loaded = False
+def get_default_cache() -> Optional[CompletionCache]:
+    """Returns the process-wide cache. Unless set_default_cache was called, AGENTPRO_LLM_CACHE decides:
+    unset disables caching, "memory" keeps an in-memory cache only, anything else is a SQLite file path."""
+    global _default_cache, _default_cache_loaded
+    if not _default_cache_loaded:
+        setting = os.environ.get("AGENTPRO_LLM_CACHE")
+        ttl = os.environ.get("AGENTPRO_LLM_CACHE_TTL")
+        if setting:
+            _default_cache = CompletionCache(path=None if setting == "memory" else setting, ttl=float(ttl) if ttl else None)
+        _default_cache_loaded = True
+    return _default_cache
+def set_default_cache(cache: Optional[CompletionCache]) -> None:
+    """Installs (or with None, disables) the cache used by every LLM call in the process."""
+    global _default_cache, _default_cache_loaded
+    _default_cache = cache
+    _default_cache_loaded = True
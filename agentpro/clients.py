@@ -0,0 +1,94 @@
+import asyncio
+import importlib.util
+import os
+import threading
+import weakref
+from typing import Dict, Tuple
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from openai import OpenAI, AsyncOpenAI
+POOL_SETTINGS = {
+    "max_connections": 100,
+    "max_keepalive_connections": 20,
+    "keepalive_expiry": 30.0,
+    "timeout": 600.0,
+    "http2": importlib.util.find_spec("h2") is not None,
+}
+_clients: Dict[Tuple, object] = {}
+_loop_clients = weakref.WeakKeyDictionary()
+_async_origins = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+_base_url_override = os.environ.get("AGENTPRO_API_BASE_OVERRIDE")
+def configure(**settings) -> None:
+    """Updates POOL_SETTINGS. Only clients created afterwards pick the new values up, so call it at startup."""
+    unknown = set(settings) - set(POOL_SETTINGS)
+    if unknown: raise ValueError(f"Unknown pool settings: {sorted(unknown)}")
+    POOL_SETTINGS.update(settings)
+def set_base_url_override(api_base: str = None) -> None:
+    """Points every LLM client handed out from now on at `api_base` (e.g. a local mock server); None restores the real endpoints."""
+    global _base_url_override
+    _base_url_override = api_base
+    reset()
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=POOL_SETTINGS["max_connections"], max_keepalive_connections=POOL_SETTINGS["max_keepalive_connections"], keepalive_expiry=POOL_SETTINGS["keepalive_expiry"])
+def _get_or_create(key: Tuple, factory):
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = factory()
+    return client
+def _get_or_create_async(key: Tuple, factory):
+    """Async clients are kept per event loop, since their connection pools only work on the loop that opened
+    them; outside a running loop the shared one is returned, and for_running_loop swaps it when it is used."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    with _lock:
+        clients = _clients if loop is None else _loop_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = clients[key] = factory()
+            _async_origins[client] = (key, factory)
+    return client
+def for_running_loop(client):
+    """The running loop's counterpart of an async client from this registry (other clients are returned as
+    they are), so a client kept by an agent or tool keeps working across asyncio.run() calls."""
+    origin = _async_origins.get(client)
+    return client if origin is None else _get_or_create_async(*origin)
+def get_openai_client(api_key: str = None, api_base: str = None) -> OpenAI:
+    """Shared OpenAI client for (api_key, api_base), backed by one pooled keep-alive HTTP connection pool."""
+    base_url = _base_url_override or api_base
+    return _get_or_create(("openai", api_key, base_url), lambda: OpenAI(api_key=api_key, base_url=base_url, http_client=httpx.Client(limits=_limits(), http2=POOL_SETTINGS["http2"], timeout=POOL_SETTINGS["timeout"])))
+def get_async_openai_client(api_key: str = None, api_base: str = None) -> AsyncOpenAI:
+    """Shared AsyncOpenAI client for (api_key, api_base) and the running event loop (see for_running_loop)."""
+    base_url = _base_url_override or api_base
+    return _get_or_create_async(("async_openai", api_key, base_url), lambda: AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=httpx.AsyncClient(limits=_limits(), http2=POOL_SETTINGS["http2"], timeout=POOL_SETTINGS["timeout"])))
+def get_http_session() -> requests.Session:
+    """Shared requests.Session for plain HTTP tools, with keep-alive pools sized from POOL_SETTINGS."""
+    def factory():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SETTINGS["max_keepalive_connections"], pool_maxsize=POOL_SETTINGS["max_connections"])
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    return _get_or_create(("http",), factory)
+def get_async_http_client() -> httpx.AsyncClient:
+    """Shared httpx.AsyncClient for async HTTP tools, one per event loop."""
+    return _get_or_create_async(("async_http",), lambda: httpx.AsyncClient(limits=_limits(), http2=POOL_SETTINGS["http2"], timeout=POOL_SETTINGS["timeout"]))
+def register_client(key: Tuple, client) -> None:
+    """Installs a ready-made client under a registry key, e.g. ("openai", api_key, api_base) or ("http",) in tests."""
+    with _lock:
+        _clients[key] = client
+def reset() -> None:
+    """Drops every cached client (closing the sync ones) so the next lookup builds fresh ones."""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        _loop_clients.clear()
+    for client in clients:
+        if isinstance(client, (OpenAI, requests.Session, httpx.Client)):
+            client.close()
@@ -0,0 +1,122 @@
+import importlib
+import importlib.metadata
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List
+logger = logging.getLogger(__name__)
+try:
+    from packaging.requirements import Requirement
+except ImportError:
+    Requirement = None
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*")
+def parse_pip_line(line: str) -> List[str]:
+    """Requirements from a `# pip install a, b>=1.0 c` style line; flags and stdlib module names are dropped."""
+    packages = line.split("pip install", 1)[-1]
+    requirements = []
+    for token in re.split(r"[,\s]+", packages):
+        token = token.strip().strip("'\"`")
+        match = NAME_PATTERN.match(token)
+        if not token or token.startswith("-") or not match: continue
+        if match.group(0).lower() in sys.stdlib_module_names: continue
+        requirements.append(token)
+    return requirements
+def canonical_name(requirement: str) -> str:
+    return re.sub(r"[-_.]+", "-", NAME_PATTERN.match(requirement).group(0)).lower()
+class DependencyManager:
+    """Installs the packages generated code asks for, once per environment instead of once per run.
+
+    Requirements already satisfied (checked with importlib.metadata) are skipped; the rest are installed in
+    a single batched pip call, from `wheel_dir` (--find-links) and/or `index_url`, or with `offline=True`
+    from the wheel cache only. Outcomes are remembered in memory and in `state_path`, so a package that
+    failed to install is not retried on every tool call.
+    """
+    def __init__(self, wheel_dir: str = None, index_url: str = None, offline: bool = False, state_path: str = None, retry_failed_after: float = 3600.0):
+        self.wheel_dir = wheel_dir or os.environ.get("AGENTPRO_WHEEL_DIR")
+        self.index_url = index_url or os.environ.get("AGENTPRO_PIP_INDEX_URL")
+        self.offline = offline or os.environ.get("AGENTPRO_PIP_OFFLINE", "").lower() in ("1", "true", "yes")
+        self.state_path = state_path or os.path.join(os.path.expanduser("~"), ".cache", "agentpro", "deps.json")
+        self.retry_failed_after = retry_failed_after
+        self._lock = threading.Lock()
+        self._satisfied = set()
+        self._failed: Dict[str, float] = self._load_state().get("failed", {})
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    def _save_state(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with open(self.state_path, "w") as f:
+                json.dump({"failed": self._failed}, f)
+        except OSError as e:
+            logger.warning("Could not save dependency state: %s", e)
+    def is_satisfied(self, requirement: str) -> bool:
+        if requirement in self._satisfied: return True
+        try:
+            version = importlib.metadata.version(canonical_name(requirement))
+        except importlib.metadata.PackageNotFoundError:
+            return False
+        if Requirement is not None:
+            try:
+                if not Requirement(requirement).specifier.contains(version, prereleases=True): return False
+            except Exception:
+                pass
+        self._satisfied.add(requirement)
+        return True
+    def _recently_failed(self, requirement: str) -> bool:
+        failed_at = self._failed.get(requirement)
+        return failed_at is not None and time.time() - failed_at < self.retry_failed_after
+    def _pip_command(self, requirements: List[str]) -> List[str]:
+        command = [sys.executable, "-m", "pip", "install", "--disable-pip-version-check", "-q"]
+        if self.wheel_dir: command += ["--find-links", self.wheel_dir]
+        if self.offline: command += ["--no-index"]
+        elif self.index_url: command += ["--index-url", self.index_url]
+        return command + requirements
+    def ensure(self, requirements: List[str]) -> dict:
+        """Installs whatever in `requirements` is missing. Returns {"installed", "satisfied", "failed"} lists."""
+        with self._lock:
+            satisfied = [r for r in requirements if self.is_satisfied(r)]
+            skipped = [r for r in requirements if r not in satisfied and self._recently_failed(r)]
+            missing = [r for r in requirements if r not in satisfied and r not in skipped]
+            report = {"installed": [], "satisfied": satisfied, "failed": skipped}
+            if not missing: return report
+            logger.info("Installing packages: %s", missing)
+            try:
+                subprocess.check_call(self._pip_command(missing))
+                report["installed"] = missing
+            except subprocess.CalledProcessError:
+                if len(missing) == 1:
+                    self._failed[missing[0]] = time.time()
+                    report["failed"].append(missing[0])
+                else:
+                    # One bad name fails the whole batch; retry individually so the good ones still install.
+                    for requirement in missing:
+                        try:
+                            subprocess.check_call(self._pip_command([requirement]))
+                            report["installed"].append(requirement)
+                        except subprocess.CalledProcessError:
+                            self._failed[requirement] = time.time()
+                            report["failed"].append(requirement)
+            importlib.invalidate_caches()
+            for requirement in report["installed"]:
+                self._failed.pop(requirement, None)
+                self._satisfied.add(requirement)
+            self._save_state()
+            return report
+_default_manager = None
+_default_lock = threading.Lock()
+def get_dependency_manager() -> DependencyManager:
+    global _default_manager
+    if _default_manager is None:
+        with _default_lock:
+            if _default_manager is None:
+                _default_manager = DependencyManager()
+    return _default_manager
@@ -0,0 +1,96 @@
+import copy
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, List
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+def count_tokens(text: str, model: str = None) -> int:
+    """Token count from tiktoken when it is installed, otherwise the usual ~4 characters per token estimate."""
+    if not text: return 0
+    if tiktoken is not None:
+        try:
+            encoding = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("cl100k_base")
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+MODEL_CONTEXT_WINDOWS = {"gpt-4o": 128000, "gpt-4.1": 1000000, "gpt-4-turbo": 128000, "gpt-4": 8192, "gpt-3.5-turbo": 16385, "o1": 200000, "o3": 200000, "o4": 200000, "claude": 200000, "gemini": 1000000, "qwen": 32768, "llama-3": 128000, "mistral": 32768, "deepseek": 64000}
+def context_window(model: str, default: int = 16000) -> int:
+    """Context size for a model id, matched by the longest known prefix (provider prefixes like "openai/" ignored)."""
+    name = (model or "").lower().split("/")[-1]
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if name.startswith(prefix)]
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)] if matches else default
+class HistoryManager:
+    """Builds the message list actually sent to the model from AgentPro.messages.
+
+    - The leading system messages are sent untouched, so providers can cache that prefix.
+    - Repeated copies of the final prompt are dropped; only the latest one is sent.
+    - Observations from earlier steps are cut to `max_observation_tokens` (or passed through `summarizer`).
+      An observation is compacted once, as soon as a newer step starts, and stays identical afterwards,
+      which keeps the sent prefix stable from one step to the next. The last `max_compacted` compacted
+      observations are remembered.
+    - If the result is still above `token_budget`, the oldest turns after the first question are dropped.
+    """
+    def __init__(self, token_budget: int = None, max_observation_tokens: int = None, summarizer: Callable[[str], str] = None, model: str = None, max_compacted: int = 1024):
+        self.token_budget = token_budget
+        self.max_observation_tokens = max_observation_tokens
+        self.summarizer = summarizer
+        self.model = model
+        self.max_compacted = max_compacted
+        self._compacted = OrderedDict()
+    def fork(self) -> "HistoryManager":
+        """Same settings, with its own compacted-observation cache."""
+        history = copy.copy(self)
+        history._compacted = OrderedDict()
+        return history
+    def tokens(self, messages: List[Dict]) -> int:
+        return sum(count_tokens(message.get("content") or "", self.model) + sum(count_tokens(call["function"]["arguments"], self.model) for call in message.get("tool_calls") or []) + 4 for message in messages)
+    def compact_observation(self, content: str) -> str:
+        key = hashlib.sha1(content.encode("utf-8")).hexdigest()
+        if key in self._compacted:
+            self._compacted.move_to_end(key)
+            return self._compacted[key]
+        if self.summarizer is not None:
+            compacted = "Observation (summarized): " + self.summarizer(content)
+        else:
+            tokens = count_tokens(content, self.model)
+            if tokens <= self.max_observation_tokens:
+                compacted = content
+            else:
+                keep = int(len(content) * self.max_observation_tokens / tokens)
+                compacted = content[:keep] + f"\n...[truncated {tokens - self.max_observation_tokens} tokens]"
+        self._compacted[key] = compacted
+        if len(self._compacted) > self.max_compacted: self._compacted.popitem(last=False)
+        return compacted
+    def compact(self, messages: List[Dict], final_prompt: str = None) -> List[Dict]:
+        prefix_end = 0
+        while prefix_end < len(messages) and messages[prefix_end]["role"] == "system":
+            prefix_end += 1
+        prefix, turns = messages[:prefix_end], messages[prefix_end:]
+        if final_prompt:
+            final_indexes = [i for i, message in enumerate(turns) if message["role"] == "user" and message["content"] == final_prompt]
+            stale = set(final_indexes[:-1])
+            turns = [message for i, message in enumerate(turns) if i not in stale]
+        is_observation = lambda message: message["role"] == "tool" or (message["role"] == "assistant" and str(message.get("content", "")).startswith("Observation:"))
+        last_response = max((i for i, message in enumerate(turns) if message["role"] == "assistant" and not is_observation(message)), default=-1)
+        compacting = self.summarizer is not None or self.max_observation_tokens is not None
+        turns = [
+            {**message, "content": self.compact_observation(message["content"])}
+            if compacting and i < last_response and is_observation(message)
+            else message
+            for i, message in enumerate(turns)
+        ]
+        if self.token_budget is not None:
+            first_user = next((i for i, message in enumerate(turns) if message["role"] == "user"), None)
+            sizes = [self.tokens([message]) for message in turns]
+            total = self.tokens(prefix) + sum(sizes)
+            while first_user is not None and first_user + 1 < len(turns) - 1 and total > self.token_budget:
+                # A tool-calling assistant message goes together with its tool results, which must never be orphaned.
+                end = first_user + 2
+                while end < len(turns) and turns[end]["role"] == "tool": end += 1
+                if end >= len(turns): break
+                total -= sum(sizes[first_user + 1:end])
+                del sizes[first_user + 1:end], turns[first_user + 1:end]
+        return prefix + turns
@@ -1,4 +1,5 @@
+cd "$(dirname "$0")/.."
 echo "Installing dependencies..."
 pip install -r requirements.txt
 echo "Launching Gradio app..."
-python app.py
+python -m agentpro.app
@@ -0,0 +1,55 @@
+from typing import Any
+from openai.types.chat import ChatCompletion
+from .cache import get_default_cache
+from .clients import for_running_loop
+from .scheduler import PRIORITY_AGENT, get_default_scheduler, provider_for
+from .tracing import get_tracer
+_DEFAULT = object()
+def _cache_key(cache, client, request: dict) -> str:
+    return cache.make_key(base_url=str(getattr(client, "base_url", "")), **request)
+def _estimated_tokens(request: dict) -> int:
+    prompt_chars = sum(len(str(message.get("content") or "")) for message in request.get("messages", [])) + sum(len(str(tool)) for tool in request.get("tools") or [])
+    return prompt_chars // 4 + (request.get("max_tokens") or 0)
+def _record_usage(span, response) -> None:
+    usage = getattr(response, "usage", None)
+    if usage is not None: span.set(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+def chat_completion(client, cache=_DEFAULT, priority: int = PRIORITY_AGENT, **request: Any):
+    """Single entry point for chat completions made by AgentPro and the tools.
+
+    Takes the same keyword arguments as `client.chat.completions.create`. Non-streaming requests are served
+    from the completion cache when one is configured (see agentpro.cache); everything else is admitted by the
+    shared RequestScheduler (see agentpro.scheduler) at the given priority. Each call is traced as an "llm.call"
+    span with its queue time, cache hit and token usage (see agentpro.tracing).
+    """
+    cache = get_default_cache() if cache is _DEFAULT else cache
+    provider = provider_for(client)
+    with get_tracer().span("llm.call", model=request.get("model"), provider=provider, priority=priority, stream=bool(request.get("stream"))) as span:
+        key = None
+        if cache is not None and not request.get("stream"):
+            key = _cache_key(cache, client, request)
+            cached = cache.get(key)
+            span.set(cache_hit=cached is not None)
+            if cached is not None: return ChatCompletion.model_validate_json(cached)
+        response = get_default_scheduler().call(lambda: client.chat.completions.create(**request), provider=provider, model=request.get("model"), tokens=_estimated_tokens(request), priority=priority)
+        _record_usage(span, response)
+        if key is not None and isinstance(response, ChatCompletion):
+            cache.set(key, response.model_dump_json())
+        return response
+async def achat_completion(aclient, cache=_DEFAULT, priority: int = PRIORITY_AGENT, **request: Any):
+    """Async counterpart of chat_completion for AsyncOpenAI clients. Registry clients are swapped for the running
+    event loop's own (see clients.for_running_loop)."""
+    aclient = for_running_loop(aclient)
+    cache = get_default_cache() if cache is _DEFAULT else cache
+    provider = provider_for(aclient)
+    with get_tracer().span("llm.call", model=request.get("model"), provider=provider, priority=priority, stream=bool(request.get("stream"))) as span:
+        key = None
+        if cache is not None and not request.get("stream"):
+            key = _cache_key(cache, aclient, request)
+            cached = cache.get(key)
+            span.set(cache_hit=cached is not None)
+            if cached is not None: return ChatCompletion.model_validate_json(cached)
+        response = await get_default_scheduler().acall(lambda: aclient.chat.completions.create(**request), provider=provider, model=request.get("model"), tokens=_estimated_tokens(request), priority=priority)
+        _record_usage(span, response)
+        if key is not None and isinstance(response, ChatCompletion):
+            cache.set(key, response.model_dump_json())
+        return response
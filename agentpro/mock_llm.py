@@ -0,0 +1,150 @@
+import argparse
+import json
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Union
+def final_answer(messages: List[dict]) -> str:
+    """Default reply: a ReAct final answer echoing the last user message."""
+    question = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    return f"Thought: I now know the final answer\nFinal Answer: Mock answer to: {question[:200]}"
+class ScriptedReplies:
+    """Replays ReAct transcripts: a conversation whose latest user message containing a key of `scripts`
+    is the question gets that script's turns in order (the last one repeats); anything else is answered
+    by `fallback`."""
+    def __init__(self, scripts: Dict[str, List[Union[str, dict]]], fallback: Callable[[List[dict]], str] = final_answer):
+        self.scripts = scripts
+        self.fallback = fallback
+        self._turns = {}
+        self._lock = threading.Lock()
+    def __call__(self, messages: List[dict]) -> Union[str, dict]:
+        questions = (m["content"] for m in reversed(messages) if m.get("role") == "user")
+        question, key = next(((question, key) for question in questions for key in self.scripts if key in question), (None, None))
+        if key is None: return self.fallback(messages)
+        with self._lock:
+            turn = self._turns.get(question, 0)
+            self._turns[question] = turn + 1
+        script = self.scripts[key]
+        return script[min(turn, len(script) - 1)]
+class MockLLMServer:
+    """OpenAI-compatible /v1/chat/completions endpoint (plain and streaming) for load tests and benchmarks.
+
+    Every reply takes `latency` seconds (or `model_latency[model]` for the models listed there) plus
+    `per_token_latency` per completion token, so runs against it
+    measure the agent's own overhead and concurrency rather than a real provider. `reply(messages)` picks
+    the completion text (see ScriptedReplies), or returns {"content": ..., "tool_calls": [{"name": ...,
+    "arguments": {...}}]} to answer with native tool calls; `stats["busy_seconds"]` adds up the simulated
+    provider time.
+    Point agents at it with clients.set_base_url_override(server.url).
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.2, per_token_latency: float = 0.0, reply: Callable[[List[dict]], Union[str, dict]] = final_answer, record_intervals: bool = False, model_latency: Dict[str, float] = None):
+        self.latency = latency
+        self.model_latency = model_latency or {}
+        self.per_token_latency = per_token_latency
+        self.reply = reply
+        self.stats = {"requests": 0, "streamed": 0, "completion_tokens": 0, "busy_seconds": 0.0}
+        self.intervals = [] if record_intervals else None
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+    def _handler(self):
+        server = self
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            def setup(self):
+                super().setup()
+                # Headers and body go out as separate small writes; without this, Nagle's algorithm holds the body
+                # back until the client's delayed ACK (~40 ms), which would swamp the simulated latency.
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            def log_message(self, *args):
+                pass
+            def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"): return self._send(404, b'{"error": "not found"}')
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                started = time.perf_counter()
+                reply = server.reply(request.get("messages", []))
+                if not isinstance(reply, dict): reply = {"content": reply}
+                if request.get("tool_choice") == "none" or not request.get("tools"): reply = {"content": reply.get("content")}
+                text = reply.get("content") or ""
+                tool_calls = [{"id": f"call_{uuid.uuid4().hex[:12]}", "type": "function", "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))}} for call in reply.get("tool_calls") or []]
+                words = text.split(" ") if text else []
+                words += [word for call in tool_calls for word in call["function"]["arguments"].split(" ")]
+                latency = server.model_latency.get(request.get("model"), server.latency)
+                with server._lock:
+                    server.stats["requests"] += 1
+                    server.stats["completion_tokens"] += len(words)
+                    server.stats["busy_seconds"] += latency + server.per_token_latency * len(words)
+                    if request.get("stream"): server.stats["streamed"] += 1
+                time.sleep(latency)
+                completion_id, model, created = f"chatcmpl-{uuid.uuid4().hex[:12]}", request.get("model", "mock"), int(time.time())
+                usage = {"prompt_tokens": sum(len(str(m.get("content", ""))) // 4 for m in request.get("messages", [])), "completion_tokens": len(words)}
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+                if not request.get("stream"):
+                    time.sleep(server.per_token_latency * len(words))
+                    message = {"role": "assistant", "content": text or None}
+                    if tool_calls: message["tool_calls"] = tool_calls
+                    body = {"id": completion_id, "object": "chat.completion", "created": created, "model": model, "usage": usage, "choices": [{"index": 0, "finish_reason": "tool_calls" if tool_calls else "stop", "message": message}]}
+                    server._record(started)
+                    return self._send(200, json.dumps(body).encode("utf-8"))
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                def event(payload: str):
+                    data = f"data: {payload}\n\n".encode("utf-8")
+                    self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                    self.wfile.flush()
+                for i, word in enumerate(text.split(" ") if text else []):
+                    time.sleep(server.per_token_latency)
+                    delta = {"role": "assistant", "content": word if i == 0 else " " + word}
+                    event(json.dumps({"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}))
+                for index, call in enumerate(tool_calls):
+                    time.sleep(server.per_token_latency * len(call["function"]["arguments"].split(" ")))
+                    delta = {"role": "assistant", "tool_calls": [{"index": index, **call}]}
+                    event(json.dumps({"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}))
+                event(json.dumps({"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "tool_calls" if tool_calls else "stop"}]}))
+                if (request.get("stream_options") or {}).get("include_usage"):
+                    event(json.dumps({"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model, "choices": [], "usage": usage}))
+                event("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+                server._record(started)
+        return Handler
+    def _record(self, started: float) -> None:
+        if self.intervals is not None:
+            with self._lock: self.intervals.append((started, time.perf_counter()))
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+    def __enter__(self):
+        return self.start()
+    def __exit__(self, *exc):
+        self.stop()
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a mock OpenAI-compatible chat completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    parser.add_argument("--tokens-per-second", type=float, help="completion speed (default: instant)")
+    args = parser.parse_args(argv)
+    server = MockLLMServer(args.host, args.port, args.latency, 1.0 / args.tokens_per_second if args.tokens_per_second else 0.0)
+    print(f"Mock LLM listening on {server.url}")
+    server._server.serve_forever()
+if __name__ == "__main__":
+    main()
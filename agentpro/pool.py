@@ -0,0 +1,81 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator, List
+class AgentPool:
+    """Bounded pool of reusable agents, each with its own conversation history.
+
+    Agents are built by `factory` on demand, up to `size`, and handed out one caller at a time with their
+    history cleared, so concurrent callers never share a `messages` list and nobody pays for building an
+    agent twice. `acquire` blocks (up to `timeout`) while all agents are busy.
+    """
+    def __init__(self, factory: Callable[[], object], size: int = 4):
+        self.factory = factory
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self.stats = {"acquired": 0, "waited": 0, "created": 0}
+    @classmethod
+    def from_agent(cls, agent, size: int = 4) -> "AgentPool":
+        """Pool of forks of `agent` (see AgentPro.fork). The agent itself is not handed out and keeps its history."""
+        return cls(agent.fork, size)
+    def _get(self, timeout: float = None):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create: self._created += 1
+        if create:
+            try:
+                agent = self.factory()
+            except Exception:
+                with self._lock: self._created -= 1
+                raise
+            with self._lock: self.stats["created"] += 1
+            return agent
+        with self._lock: self.stats["waited"] += 1
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No agent became free within {timeout}s") from None
+    def prefill(self) -> None:
+        """Creates the remaining agents now instead of on first demand."""
+        while True:
+            with self._lock:
+                if self._created >= self.size: return
+                self._created += 1
+            try:
+                agent = self.factory()
+            except Exception:
+                with self._lock: self._created -= 1
+                raise
+            with self._lock: self.stats["created"] += 1
+            self._idle.put(agent)
+    def idle_agents(self) -> List[object]:
+        """The agents not handed out right now (a snapshot; use acquire to run one)."""
+        with self._idle.mutex:
+            return list(self._idle.queue)
+    @contextmanager
+    def acquire(self, timeout: float = None) -> Iterator[object]:
+        agent = self._get(timeout)
+        with self._lock: self.stats["acquired"] += 1
+        try:
+            yield agent
+        finally:
+            agent.clear_history()
+            self._idle.put(agent)
+    def run(self, prompt: str, **kwargs) -> str:
+        """Runs one prompt on a free agent."""
+        with self.acquire() as agent:
+            return agent(prompt, **kwargs)
+    def map(self, prompts: List[str], **kwargs) -> List[str]:
+        """Runs prompts concurrently (at most `size` at a time); results are in prompt order."""
+        with ThreadPoolExecutor(max_workers=max(1, min(self.size, len(prompts)))) as executor:
+            return list(executor.map(lambda prompt: self.run(prompt, **kwargs), prompts))
+    def info(self) -> dict:
+        with self._lock:
+            return {**self.stats, "size": self.size, "idle": self._idle.qsize(), "in_use": self._created - self._idle.qsize()}
@@ -0,0 +1,39 @@
+import os
+from typing import Optional
+class ModelRouter:
+    """Cascade routing policy for AgentPro.
+
+    Intermediate steps, where the model only decides which tool to call next, are drafted by `small_model` and
+    capped at `step_max_tokens`. A draft is re-run on the agent's main model, capped at `final_max_tokens`, when
+    it cannot be parsed (no action and no final answer, or undecodable tool arguments), and, with
+    `escalate_final`, when it is the final answer, so users always get the main model's answer. Without a
+    `small_model` every step runs on the main model and only the per-step caps and parse-failure retries apply.
+    The model that served each call is recorded in AgentPro.token_usage and on the "agent.step" spans.
+    """
+    def __init__(self, small_model: str = None, step_max_tokens: int = 512, final_max_tokens: int = None, escalate_final: bool = True):
+        self.small_model = small_model
+        self.step_max_tokens = step_max_tokens
+        self.final_max_tokens = final_max_tokens
+        self.escalate_final = escalate_final
+    @classmethod
+    def from_env(cls) -> Optional["ModelRouter"]:
+        """A router from AGENTPRO_ROUTER_MODEL (the small model), AGENTPRO_STEP_MAX_TOKENS and AGENTPRO_FINAL_MAX_TOKENS,
+        or None when none of them is set."""
+        small_model = os.environ.get("AGENTPRO_ROUTER_MODEL") or None
+        step_max_tokens = os.environ.get("AGENTPRO_STEP_MAX_TOKENS")
+        final_max_tokens = os.environ.get("AGENTPRO_FINAL_MAX_TOKENS")
+        if not (small_model or step_max_tokens or final_max_tokens): return None
+        return cls(small_model, int(step_max_tokens) if step_max_tokens else 512, int(final_max_tokens) if final_max_tokens else None)
+    def step_tokens(self, max_tokens: int) -> int:
+        return min(max_tokens, self.step_max_tokens) if self.step_max_tokens else max_tokens
+    def final_tokens(self, max_tokens: int) -> int:
+        return self.final_max_tokens or max_tokens
+    @property
+    def replaces_final(self) -> bool:
+        """Whether final answers drafted by the small model are re-run, so streams must not show them as final."""
+        return self.escalate_final and bool(self.small_model)
+    def escalation(self, final: bool, parsed: bool) -> Optional[str]:
+        """Why a drafted step must be re-run on the main model ("parse_failure" or "final_answer"), or None to keep it."""
+        if not parsed: return "parse_failure"
+        if final and self.replaces_final: return "final_answer"
+        return None
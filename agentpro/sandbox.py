@@ -0,0 +1,180 @@
+import contextlib
+import io
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Optional, Sequence
+try:
+    import resource
+except ImportError:
+    resource = None
+DEFAULT_PRELOAD = ("numpy", "pandas", "matplotlib", "matplotlib.pyplot", "requests")
+@dataclass
+class SandboxResult:
+    stdout: str = ""
+    stderr: str = ""
+    error: Optional[str] = None
+    timed_out: bool = False
+    duration: float = 0.0
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.timed_out
+def _limit_resources(memory_limit_mb: Optional[int], cpu_limit: Optional[int]) -> None:
+    if resource is None: return
+    if memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if cpu_limit:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit))
+def _worker_main(conn, preload: Sequence[str], memory_limit_mb: Optional[int], cpu_limit: Optional[int]) -> None:
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    # The memory cap goes on first so it covers what the preload imports take; CPU seconds start counting after.
+    _limit_resources(memory_limit_mb, None)
+    for module in preload:
+        try:
+            __import__(module)
+        except Exception:
+            pass
+    _limit_resources(None, cpu_limit)
+    conn.send("ready")
+    while True:
+        try:
+            code = conn.recv()
+        except EOFError:
+            return
+        if code is None: return
+        stdout, stderr, error = io.StringIO(), io.StringIO(), None
+        try:
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                exec(compile(code, "<generated>", "exec"), {"__name__": "__main__"})
+        except MemoryError:
+            error = "MemoryError: code exceeded the sandbox memory limit"
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}\n{traceback.format_exc()}"
+        conn.send({"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "error": error})
+class _Worker:
+    def __init__(self, context, preload, memory_limit_mb, cpu_limit):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child, tuple(preload), memory_limit_mb, cpu_limit), daemon=True)
+        self.process.start()
+        child.close()
+        self.runs = 0
+        self.ready = False
+    def wait_ready(self, timeout: float = 120.0) -> bool:
+        """Waits for the preload imports to finish, so start-up time never counts against a run's timeout.
+        False when the worker did not report ready in time or sent something else."""
+        if not self.ready and self.conn.poll(timeout):
+            self.ready = self.conn.recv() == "ready"
+        return self.ready
+    def stop(self, kill: bool = False) -> None:
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (OSError, BrokenPipeError):
+                pass
+            self.process.join(1)
+            if self.process.is_alive(): self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+class SandboxPool:
+    """Pool of warm worker processes that execute generated Python code outside the agent process.
+
+    Workers import `preload` once at start-up and run each snippet with captured stdout/stderr, under an
+    address-space limit (`memory_limit_mb`) and optional CPU-seconds limit via rlimits. A run that exceeds
+    `timeout` seconds has its worker killed and replaced, as does a worker that is not ready within
+    `start_timeout` seconds or dies; workers are also recycled after `max_runs` runs. The memory limit
+    includes the preloaded modules, so it must leave room for them (numpy and pandas take about 400 MB of
+    address space). Each run starts with a fresh globals dict, but module state lives on in a worker until it is recycled.
+    """
+    def __init__(self, workers: int = 2, timeout: float = 60.0, memory_limit_mb: int = 2048, cpu_limit: int = None, max_runs: int = 50, preload: Sequence[str] = DEFAULT_PRELOAD, start_timeout: float = 120.0):
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.cpu_limit = cpu_limit
+        self.max_runs = max_runs
+        self.preload = tuple(preload)
+        methods = multiprocessing.get_all_start_methods()
+        self._context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {"runs": 0, "errors": 0, "timeouts": 0, "crashes": 0, "recycled": 0}
+        for _ in range(workers):
+            self._idle.put(self._spawn())
+    def _spawn(self) -> _Worker:
+        return _Worker(self._context, self.preload, self.memory_limit_mb, self.cpu_limit)
+    def _get(self) -> _Worker:
+        while True:
+            if self._closed: raise RuntimeError("SandboxPool is shut down")
+            try:
+                return self._idle.get(timeout=0.5)
+            except queue.Empty:
+                pass
+    def _crashed(self, reason: str, start: float) -> SandboxResult:
+        with self._lock: self.stats["crashes"] += 1
+        return SandboxResult(error=reason, duration=time.monotonic() - start)
+    def run(self, code: str, timeout: float = None) -> SandboxResult:
+        """Executes `code` in a free worker, waiting for one if all are busy. Raises RuntimeError once the
+        pool is shut down, also for callers still waiting for a worker."""
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._get()
+        start = time.monotonic()
+        replace = False
+        try:
+            if not worker.wait_ready(self.start_timeout):
+                replace = True
+                return self._crashed(f"Sandbox worker did not start within {self.start_timeout}s", start)
+            start = time.monotonic()
+            worker.conn.send(code)
+            if not worker.conn.poll(timeout):
+                replace = True
+                with self._lock: self.stats["timeouts"] += 1
+                return SandboxResult(error=f"TimeoutError: execution exceeded {timeout}s and was stopped", timed_out=True, duration=time.monotonic() - start)
+            message = worker.conn.recv()
+            if not isinstance(message, dict):
+                replace = True
+                return self._crashed(f"Sandbox worker sent an unexpected reply ({type(message).__name__}) and was replaced", start)
+            result = SandboxResult(stdout=message["stdout"], stderr=message["stderr"], error=message["error"], duration=time.monotonic() - start)
+            if result.error:
+                with self._lock: self.stats["errors"] += 1
+            return result
+        except (EOFError, OSError, BrokenPipeError):
+            replace = True
+            worker.process.join(1)
+            return self._crashed(f"Sandbox worker died (exit code {worker.process.exitcode}); the code likely exceeded a resource limit", start)
+        finally:
+            worker.runs += 1
+            with self._lock: self.stats["runs"] += 1
+            if replace or worker.runs >= self.max_runs or not worker.process.is_alive():
+                if not replace:
+                    with self._lock: self.stats["recycled"] += 1
+                worker.stop(kill=replace)
+                worker = self._spawn() if not self._closed else None
+            if worker is not None:
+                with self._lock:
+                    closed = self._closed
+                    if not closed: self._idle.put(worker)
+                if closed: worker.stop()
+    def shutdown(self) -> None:
+        with self._lock: self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+_default_pool = None
+_default_lock = threading.Lock()
+def get_default_pool() -> SandboxPool:
+    """Process-wide pool shared by CodeEngine instances, sized by AGENTPRO_SANDBOX_WORKERS (default 2)."""
+    global _default_pool
+    if _default_pool is None:
+        with _default_lock:
+            if _default_pool is None:
+                _default_pool = SandboxPool(workers=int(os.environ.get("AGENTPRO_SANDBOX_WORKERS", 2)))
+    return _default_pool
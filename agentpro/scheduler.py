@@ -0,0 +1,201 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+from .tracing import current_span
+logger = logging.getLogger(__name__)
+PRIORITY_AGENT = 0
+PRIORITY_TOOL = 5
+PRIORITY_BACKGROUND = 10
+class RateLimited(Exception):
+    """Raised by call sites that see a rate limit as a response rather than an exception (e.g. an HTTP 429)."""
+    def __init__(self, message: str = "Rate limit", retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+def is_rate_limit(error: Exception) -> bool:
+    if isinstance(error, RateLimited): return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or "Rate limit" in str(error) or "rate_limit" in str(error)
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the provider asked us to wait, from RateLimited or the Retry-After / retry-after-ms headers."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if getattr(error, "retry_after", None) is not None: return float(error.retry_after)
+        if headers.get("retry-after-ms"): return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"): return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+def provider_for(client) -> str:
+    """Provider key for a client or HTTP tool: the host of its base URL (or url), e.g. "api.openai.com"."""
+    return urlparse(str(getattr(client, "base_url", None) or getattr(client, "url", None) or "")).hostname or "default"
+class TokenBucket:
+    """Refills `per_minute` units per minute up to `capacity` (one minute's worth by default)."""
+    def __init__(self, per_minute: float, capacity: float = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+    def delay(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they are available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.level = max(-self.capacity, self.level - amount)
+class RequestScheduler:
+    """Admission control shared by every LLM and search call in the process.
+
+    `limits` maps a provider ("api.openai.com") or a provider and model ("api.openai.com:gpt-4o-mini") to
+    {"rpm": ..., "tpm": ...}. A request must fit every bucket that applies to it. Waiting requests for the
+    same provider are admitted in priority order (lower first, FIFO within a priority). Rate-limit errors
+    are retried with jittered exponential backoff, or after the provider's Retry-After when it sends one.
+    """
+    def __init__(self, limits: Dict[str, Dict[str, float]] = None, max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.buckets: Dict[str, List[tuple]] = {}
+        self._queues: Dict[str, list] = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "failed": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+        for key, limit in (limits or {}).items():
+            self.set_limit(key, **limit)
+    def set_limit(self, key: str, rpm: float = None, tpm: float = None) -> None:
+        with self._cond:
+            self.buckets[key] = [(kind, TokenBucket(value)) for kind, value in (("rpm", rpm), ("tpm", tpm)) if value]
+    def _applicable(self, provider: str, model: str = None) -> List[tuple]:
+        return self.buckets.get(provider, []) + (self.buckets.get(f"{provider}:{model}", []) if model else [])
+    def _delay(self, buckets: List[tuple], tokens: float) -> float:
+        return max((bucket.delay(1 if kind == "rpm" else tokens) for kind, bucket in buckets), default=0.0)
+    def _try_admit(self, ticket: tuple, provider: str, buckets: List[tuple], tokens: float) -> Optional[float]:
+        """Called with the lock held. Admits the ticket and returns None, or returns how long to wait."""
+        queue = self._queues[provider]
+        if queue[0] is not ticket: return self.max_delay
+        delay = self._delay(buckets, tokens)
+        if delay > 0: return delay
+        for kind, bucket in buckets:
+            bucket.consume(1 if kind == "rpm" else tokens)
+        heapq.heappop(queue)
+        self._cond.notify_all()
+        return None
+    def _enqueue(self, provider: str, priority: int) -> tuple:
+        ticket = (priority, next(self._counter))
+        heapq.heappush(self._queues.setdefault(provider, []), ticket)
+        return ticket
+    def _record_wait(self, waited: float) -> None:
+        self.stats["requests"] += 1
+        self.stats["wait_seconds_total"] += waited
+        self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], waited)
+    def acquire(self, provider: str, model: str = None, tokens: float = 0, priority: int = PRIORITY_AGENT) -> float:
+        """Blocks until the request may be sent; returns the time spent queued."""
+        start = time.monotonic()
+        with self._cond:
+            buckets = self._applicable(provider, model)
+            ticket = self._enqueue(provider, priority)
+            while True:
+                delay = self._try_admit(ticket, provider, buckets, tokens)
+                if delay is None: break
+                self._cond.wait(delay)
+            waited = time.monotonic() - start
+            self._record_wait(waited)
+        return waited
+    async def aacquire(self, provider: str, model: str = None, tokens: float = 0, priority: int = PRIORITY_AGENT) -> float:
+        """Async acquire; waits with asyncio.sleep so the event loop keeps running."""
+        start = time.monotonic()
+        with self._cond:
+            buckets = self._applicable(provider, model)
+            ticket = self._enqueue(provider, priority)
+        try:
+            while True:
+                with self._cond:
+                    delay = self._try_admit(ticket, provider, buckets, tokens)
+                if delay is None: break
+                await asyncio.sleep(min(delay, 0.05))
+        except asyncio.CancelledError:
+            with self._cond:
+                queue = self._queues[provider]
+                if ticket in queue:
+                    queue.remove(ticket)
+                    heapq.heapify(queue)
+                    self._cond.notify_all()
+            raise
+        waited = time.monotonic() - start
+        with self._cond:
+            self._record_wait(waited)
+        return waited
+    def _backoff(self, error: Exception, attempt: int) -> float:
+        requested = retry_after(error)
+        if requested is not None: return requested
+        return min(self.max_delay, self.base_delay * (2 ** attempt)) * random.uniform(0.5, 1.5)
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        if not is_rate_limit(error): return False
+        with self._cond:
+            self.stats["rate_limited"] += 1
+            if attempt + 1 >= self.max_retries:
+                self.stats["failed"] += 1
+                return False
+            self.stats["retries"] += 1
+        return True
+    def call(self, fn: Callable[[], Any], provider: str = "default", model: str = None, tokens: float = 0, priority: int = PRIORITY_AGENT) -> Any:
+        """Runs fn() once admitted, retrying it on rate-limit errors."""
+        for attempt in range(self.max_retries):
+            current_span().add("queue_seconds", self.acquire(provider, model, tokens, priority))
+            try:
+                return fn()
+            except Exception as e:
+                if not self._should_retry(e, attempt): raise
+                delay = self._backoff(e, attempt)
+                current_span().add("retries")
+                logger.warning("Rate limited by %s, retrying in %.1fs", provider, delay)
+                time.sleep(delay)
+    async def acall(self, fn: Callable[[], Any], provider: str = "default", model: str = None, tokens: float = 0, priority: int = PRIORITY_AGENT) -> Any:
+        """Async call; `fn` returns an awaitable (e.g. a lambda around an AsyncOpenAI request)."""
+        for attempt in range(self.max_retries):
+            current_span().add("queue_seconds", await self.aacquire(provider, model, tokens, priority))
+            try:
+                return await fn()
+            except Exception as e:
+                if not self._should_retry(e, attempt): raise
+                delay = self._backoff(e, attempt)
+                current_span().add("retries")
+                logger.warning("Rate limited by %s, retrying in %.1fs", provider, delay)
+                await asyncio.sleep(delay)
+    def metrics(self) -> dict:
+        """Counters, current queue depth per provider and average queue wait."""
+        with self._cond:
+            queue_depth = {provider: len(queue) for provider, queue in self._queues.items()}
+            requests = self.stats["requests"]
+            return {**self.stats, "queue_depth": queue_depth, "wait_seconds_avg": self.stats["wait_seconds_total"] / requests if requests else 0.0}
+def _limits_from_env() -> Dict[str, Dict[str, float]]:
+    """Reads AGENTPRO_RATE_LIMITS, e.g. "api.openai.com:gpt-4o-mini=500/200000,openrouter.ai=200" (rpm/tpm)."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in os.environ.get("AGENTPRO_RATE_LIMITS", "").split(","))):
+        key, _, values = item.rpartition("=")
+        rpm, _, tpm = values.partition("/")
+        limits[key] = {"rpm": float(rpm) if rpm else None, "tpm": float(tpm) if tpm else None}
+    return limits
+_default_scheduler = None
+_default_lock = threading.Lock()
+def get_default_scheduler() -> RequestScheduler:
+    global _default_scheduler
+    if _default_scheduler is None:
+        with _default_lock:
+            if _default_scheduler is None:
+                _default_scheduler = RequestScheduler(_limits_from_env())
+    return _default_scheduler
+def set_default_scheduler(scheduler: RequestScheduler) -> None:
+    global _default_scheduler
+    _default_scheduler = scheduler
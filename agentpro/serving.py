@@ -0,0 +1,275 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List
+from .agent import AgentPro
+from .pool import AgentPool
+from .routing import ModelRouter
+from .tracing import configure, configure_logging, get_tracer
+class ServiceOverloaded(Exception):
+    """The request queue is full; the caller should back off and retry (HTTP 503)."""
+class QueueTimeout(Exception):
+    """The request waited longer than the queue-time limit for a free agent (HTTP 503)."""
+def default_client_details() -> dict:
+    """Client settings from the environment: OpenRouter when OPENROUTER_API_KEY is set, else OpenAI."""
+    if os.getenv("OPENROUTER_API_KEY"):
+        return {"api_key": os.getenv("OPENROUTER_API_KEY"), "api_base": "https://openrouter.ai/api/v1", "MODEL": os.getenv("MODEL_NAME", "gpt-4o-mini"), "api_type": "openrouter"}
+    if os.getenv("OPENAI_API_KEY"):
+        return {"api_key": os.getenv("OPENAI_API_KEY"), "api_base": "https://api.openai.com/v1/", "MODEL": os.getenv("MODEL_NAME", "gpt-4o-mini"), "api_type": "openai"}
+    raise EnvironmentError("No API key found in environment variables.")
+def default_tools(client_details: dict, temperature: float = 0.1, max_tokens: int = 4000) -> list:
+    """The standard tool set, configured from the *_MODEL_NAME environment variables. Each tool is a LazyTool,
+    so its dependencies load on first use (or when pre-warmed, see AGENTPRO_PREWARM_TOOLS)."""
+    from .tools import AresInternetTool, CodeEngine, LazyTool, YouTubeSearchTool, SlideGenerationTool, DataScienceTool
+    model = lambda env_key: os.getenv(env_key, "gpt-4o-mini")
+    tools = [
+        LazyTool.of(CodeEngine, client_details=client_details, model_name=model("CODE_MODEL_NAME"), temp=temperature, max_tokens=max_tokens),
+        LazyTool.of(YouTubeSearchTool, client_details=client_details, model_name=model("YT_MODEL_NAME")),
+        LazyTool.of(SlideGenerationTool, client_details=client_details, model_name=model("SLIDE_MODEL_NAME")),
+        LazyTool.of(DataScienceTool, client_details=client_details, model_name=model("DATA_MODEL_NAME"), temp=temperature, max_tokens=max_tokens),
+    ]
+    if os.getenv("TRAVERSAAL_ARES_API_KEY"):
+        tools.append(LazyTool.of(AresInternetTool, client_details=client_details))
+    return tools
+def build_agent(temperature: float = 0.1, max_tokens: int = 4000) -> AgentPro:
+    client_details = default_client_details()
+    return AgentPro(tools=default_tools(client_details, temperature, max_tokens), client_details=client_details if client_details["api_type"] == "openrouter" else None, temperature=temperature, max_tokens=max_tokens, tool_calling=os.getenv("AGENTPRO_TOOL_CALLING", "react"), router=ModelRouter.from_env())
+class AgentService:
+    """Serves agent requests from many concurrent callers.
+
+    Requests run on a pool of `pool_size` pre-initialized agents: `factory` builds one agent and the rest
+    are its forks (see AgentPro.fork), so all agents share its tool instances, which keep no per-request
+    state, as well as its LLM clients and tool executor. At most `max_queue` requests may
+    wait for an agent; beyond that, `run` raises ServiceOverloaded at once instead of piling up latency.
+    A request that waits longer than `queue_timeout` seconds raises QueueTimeout. With a `session_id`,
+    the session's conversation history is loaded into whichever agent serves the request and saved back
+    afterwards. Requests within one session run one at a time. Idle sessions expire after `session_ttl`
+    seconds, and at most `max_sessions` are kept.
+    """
+    def __init__(self, factory: Callable[[], AgentPro] = None, pool_size: int = 4, max_queue: int = 32, queue_timeout: float = 30.0, session_ttl: float = 1800.0, max_sessions: int = 10000, pool: AgentPool = None, warm: bool = True):
+        self.pool = pool if pool is not None else AgentPool.from_agent((factory or build_agent)(), pool_size)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        self.started = time.time()
+        self.stats = {"requests": 0, "completed": 0, "errors": 0, "rejected": 0, "timed_out": 0}
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._running = 0
+        self._sessions = OrderedDict()
+        self._latencies = deque(maxlen=1000)
+        self._queue_waits = deque(maxlen=1000)
+        if warm: self.warm()
+    @classmethod
+    def from_agent(cls, agent: AgentPro, pool_size: int = 4, **kwargs) -> "AgentService":
+        return cls(pool=AgentPool.from_agent(agent, pool_size), **kwargs)
+    def warm(self) -> None:
+        """Builds all pool agents up front so the first requests do not pay for it, and pre-warms their lazy
+        tools as AGENTPRO_PREWARM_TOOLS says (see agentpro.tools.registry.warm_tools)."""
+        from .tools import warm_tools
+        self.pool.prefill()
+        warm_tools({id(tool): tool for agent in self.pool.idle_agents() for tool in agent.tools.values()}.values())
+    def _session(self, session_id: str) -> dict:
+        with self._lock:
+            now = time.time()
+            for expired in [key for key, session in self._sessions.items() if now - session["last_used"] > self.session_ttl]:
+                del self._sessions[expired]
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = {"messages": None, "lock": threading.Lock(), "last_used": now, "turns": 0}
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session_id)
+            session["last_used"] = now
+            return session
+    def end_session(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+    def _admit(self) -> None:
+        with self._lock:
+            self.stats["requests"] += 1
+            if self._waiting >= self.max_queue and self._running >= self.pool.size:
+                self.stats["rejected"] += 1
+                raise ServiceOverloaded(f"Server busy: {self._waiting} requests already queued")
+            self._waiting += 1
+    def run(self, prompt: str, session_id: str = None, **kwargs) -> dict:
+        """Runs one request. Returns {"response", "session_id", "queue_seconds", "seconds"}."""
+        with get_tracer().span("service.request", session=session_id is not None) as span:
+            result = self._run(prompt, session_id, **kwargs)
+            span.set(queue_seconds=result["queue_seconds"])
+            return result
+    def _run(self, prompt: str, session_id: str = None, **kwargs) -> dict:
+        self._admit()
+        start = time.monotonic()
+        session = self._session(session_id) if session_id else None
+        acquired = False
+        try:
+            if session and not session["lock"].acquire(timeout=self.queue_timeout): raise TimeoutError
+            try:
+                remaining = self.queue_timeout - (time.monotonic() - start)
+                with self.pool.acquire(timeout=max(remaining, 0.001)) as agent:
+                    acquired = True
+                    queued = time.monotonic() - start
+                    with self._lock:
+                        self._waiting -= 1
+                        self._running += 1
+                    try:
+                        if session and session["messages"] is not None: agent.messages = list(session["messages"])
+                        response = agent(prompt, **kwargs)
+                        if session:
+                            session["messages"] = list(agent.messages)
+                            session["turns"] += 1
+                    finally:
+                        with self._lock: self._running -= 1
+            finally:
+                if session: session["lock"].release()
+        except TimeoutError:
+            if acquired:
+                with self._lock: self.stats["errors"] += 1
+                raise
+            with self._lock:
+                self._waiting -= 1
+                self.stats["timed_out"] += 1
+            raise QueueTimeout(f"No agent became free within {self.queue_timeout}s") from None
+        except Exception:
+            with self._lock:
+                if not acquired: self._waiting -= 1
+                self.stats["errors"] += 1
+            raise
+        seconds = time.monotonic() - start
+        with self._lock:
+            self.stats["completed"] += 1
+            self._latencies.append(seconds)
+            self._queue_waits.append(queued)
+        return {"response": response, "session_id": session_id, "queue_seconds": queued, "seconds": seconds}
+    def health(self) -> dict:
+        with self._lock:
+            waiting, running = self._waiting, self._running
+        status = "overloaded" if waiting >= self.max_queue else "busy" if running >= self.pool.size else "ok"
+        return {"status": status, "running": running, "queued": waiting, "pool_size": self.pool.size, "uptime_seconds": time.time() - self.started}
+    def metrics(self) -> dict:
+        from .scheduler import get_default_scheduler
+        with self._lock:
+            latencies, waits = sorted(self._latencies), sorted(self._queue_waits)
+            percentile = lambda values, q: values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+            metrics = {**self.stats, "running": self._running, "queued": self._waiting, "sessions": len(self._sessions), "latency_p50": percentile(latencies, 0.5), "latency_p95": percentile(latencies, 0.95), "queue_wait_p50": percentile(waits, 0.5), "queue_wait_p95": percentile(waits, 0.95)}
+        return {**metrics, "pool": self.pool.info(), "scheduler": get_default_scheduler().metrics()}
+    def prometheus(self) -> str:
+        """The tracer's span metrics plus this service's counters and gauges, in Prometheus text format."""
+        with self._lock:
+            counters = {f"agentpro_service_{key}_total": value for key, value in self.stats.items()}
+            gauges = {"agentpro_service_running": self._running, "agentpro_service_queued": self._waiting, "agentpro_service_sessions": len(self._sessions), "agentpro_service_pool_size": self.pool.size}
+        return get_tracer().render_prometheus(gauges, counters)
+def make_http_server(service: AgentService, host: str = "127.0.0.1", port: int = 8000) -> ThreadingHTTPServer:
+    """JSON over HTTP: POST /v1/run {"prompt", "session_id"?}, DELETE /v1/sessions/<id>, GET /healthz and
+    GET /metrics.json, plus GET /metrics in Prometheus text format."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        def log_message(self, *args):
+            pass
+        def _json(self, status: int, payload: dict, headers: dict = None):
+            self._send(status, json.dumps(payload, default=str).encode("utf-8"), "application/json", headers)
+        def _send(self, status: int, body: bytes, content_type: str, headers: dict = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+        def do_GET(self):
+            if self.path == "/healthz":
+                health = service.health()
+                return self._json(503 if health["status"] == "overloaded" else 200, health)
+            if self.path == "/metrics": return self._send(200, service.prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+            if self.path == "/metrics.json": return self._json(200, service.metrics())
+            self._json(404, {"error": "not found"})
+        def do_DELETE(self):
+            if self.path.startswith("/v1/sessions/"): return self._json(200, {"ended": service.end_session(self.path.rsplit("/", 1)[-1])})
+            self._json(404, {"error": "not found"})
+        def do_POST(self):
+            if self.path != "/v1/run": return self._json(404, {"error": "not found"})
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                prompt = request["prompt"]
+            except (ValueError, KeyError):
+                return self._json(400, {"error": "expected a JSON body with a 'prompt'"})
+            try:
+                self._json(200, service.run(prompt, session_id=request.get("session_id") or None))
+            except (ServiceOverloaded, QueueTimeout) as e:
+                self._json(503, {"error": str(e)}, {"Retry-After": "1"})
+            except Exception as e:
+                self._json(500, {"error": f"{type(e).__name__}: {e}"})
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+def load_test(url: str, requests_count: int = 100, concurrency: int = 16, prompt: str = "What is an agent?", sessions: int = 0) -> dict:
+    """Fires `requests_count` requests at a running server, `concurrency` at a time, and summarizes latency."""
+    from .clients import get_http_session
+    http = get_http_session()
+    def one(i: int):
+        start = time.monotonic()
+        payload = {"prompt": f"{prompt} #{i}", "session_id": f"load-{i % sessions}" if sessions else None}
+        try:
+            status = http.post(f"{url.rstrip('/')}/v1/run", json=payload, timeout=600).status_code
+        except Exception:
+            status = 0
+        return status, time.monotonic() - start
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, range(requests_count)))
+    elapsed = time.monotonic() - start
+    latencies = sorted(seconds for status, seconds in results if status == 200)
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    percentile = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+    return {"requests": requests_count, "statuses": statuses, "seconds": elapsed, "throughput_rps": len(latencies) / elapsed if elapsed else 0.0, "latency_p50": percentile(0.5), "latency_p95": percentile(0.95), "latency_max": latencies[-1] if latencies else 0.0}
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve AgentPro over HTTP, or load-test a running server.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run the HTTP server")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--pool-size", type=int, default=4)
+    serve.add_argument("--max-queue", type=int, default=32)
+    serve.add_argument("--queue-timeout", type=float, default=30.0)
+    serve.add_argument("--mock-llm", action="store_true", help="answer from a local mock LLM server (no API key needed)")
+    serve.add_argument("--mock-latency", type=float, default=0.2)
+    load = commands.add_parser("loadtest", help="load-test a running server")
+    load.add_argument("--url", default="http://127.0.0.1:8000")
+    load.add_argument("--requests", type=int, default=100)
+    load.add_argument("--concurrency", type=int, default=16)
+    load.add_argument("--sessions", type=int, default=0, help="spread requests over this many sessions")
+    args = parser.parse_args(argv)
+    configure_logging()
+    if args.command == "loadtest":
+        print(json.dumps(load_test(args.url, args.requests, args.concurrency, sessions=args.sessions), indent=2))
+        return
+    factory = build_agent
+    if args.mock_llm:
+        from .clients import set_base_url_override
+        from .mock_llm import MockLLMServer
+        mock = MockLLMServer(latency=args.mock_latency).start()
+        set_base_url_override(mock.url)
+        print(f"Using mock LLM at {mock.url}")
+        factory = lambda: AgentPro(tools=[], client_details={"api_key": "mock"})
+    else:
+        import dotenv
+        dotenv.load_dotenv()
+    configure(os.environ.get("AGENTPRO_TRACE") or None, metrics=True)
+    service = AgentService(factory, pool_size=args.pool_size, max_queue=args.max_queue, queue_timeout=args.queue_timeout)
+    server = make_http_server(service, args.host, args.port)
+    print(f"AgentPro serving on http://{args.host}:{args.port} ({args.pool_size} agents, queue {args.max_queue})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+if __name__ == "__main__":
+    main()
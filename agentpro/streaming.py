@@ -0,0 +1,93 @@
+from typing import Callable, List, Tuple
+ACTION_TERMINATORS = ("Action:", "Observation:", "Thought:", "Final Answer:")
+class ActionStreamParser:
+    """The ReAct action grammar, parsed incrementally; AgentPro.parse_actions runs whole completions through it
+    (see parse), so streamed and non-streamed steps agree on what the model asked for.
+
+    Feed it completion chunks as they arrive; feed() returns the events that became complete:
+    ("action", (action, action_input)) as soon as an Action Input is finished, and ("final_token", text)
+    for every piece of text that follows "Final Answer:" when no action preceded it.
+    An Action Input is finished when the next Action/Observation/Thought/Final Answer line starts, when it
+    already parses as a complete JSON object or list at a line break, or when the stream is closed. Once a
+    Final Answer starts before any action, the rest of the text is answer, not actions.
+    """
+    def __init__(self, parse_input: Callable):
+        self.parse_input = parse_input
+        self.text = ""
+        self.actions: List[tuple] = []
+        self.final_text = ""
+        self._line = ""
+        self._action = None
+        self._input = ""
+        self._inside_input = False
+        self._inside_final = False
+    @classmethod
+    def parse(cls, text: str, parse_input: Callable) -> List[tuple]:
+        """The (action, action_input) pairs of a complete text."""
+        parser = cls(parse_input)
+        parser.feed(text)
+        parser.close()
+        return parser.actions
+    def feed(self, chunk: str) -> List[Tuple[str, object]]:
+        if not chunk: return []
+        self.text += chunk
+        if self._inside_final:
+            token = chunk if self.final_text else chunk.lstrip()
+            if not token: return []
+            self.final_text += token
+            return [("final_token", token)]
+        events = []
+        self._line += chunk
+        while "\n" in self._line:
+            line, self._line = self._line.split("\n", 1)
+            events.extend(self._process_line(line))
+            if self._inside_final:
+                rest, self._line = ("\n" if self.final_text else "") + self._line, ""
+                if rest:
+                    self.final_text += rest
+                    events.append(("final_token", rest))
+                return events
+        if self._line.strip().startswith("Final Answer:") and not self.actions and not self._action:
+            events.extend(self._process_line(self._line))
+            self._line = ""
+        return events
+    def close(self) -> List[Tuple[str, object]]:
+        """Flushes the last partial line and any pending action at the end of the stream."""
+        events = []
+        if self._line and not self._inside_final:
+            events.extend(self._process_line(self._line))
+        self._line = ""
+        events.extend(self._flush())
+        return events
+    def _flush(self) -> List[Tuple[str, object]]:
+        events = []
+        if self._action and self._input:
+            action = (self._action, self.parse_input(self._input))
+            self.actions.append(action)
+            events.append(("action", action))
+        self._action, self._input, self._inside_input = None, "", False
+        return events
+    def _input_is_complete_json(self) -> bool:
+        candidate = self.parse_input(self._input)
+        return isinstance(candidate, (dict, list))
+    def _process_line(self, line: str) -> List[Tuple[str, object]]:
+        stripped = line.strip()
+        events = []
+        if stripped.startswith(ACTION_TERMINATORS):
+            events.extend(self._flush())
+        if stripped.startswith("Action Input:") and self._action:
+            self._input = stripped.replace("Action Input:", "", 1).strip()
+            self._inside_input = True
+        elif stripped.startswith("Action:"):
+            self._action = stripped.replace("Action:", "", 1).strip().lower()
+        elif stripped.startswith("Final Answer:") and not self.actions:
+            self._inside_final = True
+            answer = stripped.replace("Final Answer:", "", 1).lstrip()
+            if answer:
+                self.final_text += answer
+                events.append(("final_token", answer))
+        elif self._inside_input:
+            self._input += "\n" + line
+        if self._inside_input and self._input.lstrip().startswith(("{", "[")) and self._input_is_complete_json():
+            events.extend(self._flush())
+        return events
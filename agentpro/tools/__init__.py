@@ -1,7 +1,9 @@
+import importlib
 from .base import Tool
-from .ares_tool import AresInternetTool
-from .code_tool import CodeEngine
-from .youtube_tool import YouTubeSearchTool
-from .slide_tool import SlideGenerationTool
-from .data_tool import DataScienceTool
-__all__ = ['Tool', 'AresInternetTool', 'CodeEngine', 'YouTubeSearchTool', 'SlideGenerationTool', 'DataScienceTool'] # add more tools when available
+from .registry import LazyTool, warm_tools
+# Tool classes are imported on first access, so `import agentpro` does not load every tool's dependencies.
+_LAZY_EXPORTS = {"AresInternetTool": ".ares_tool", "CodeEngine": ".code_tool", "YouTubeSearchTool": ".youtube_tool", "SlideGenerationTool": ".slide_tool", "DataScienceTool": ".data_tool"}
+def __getattr__(name: str):
+    if name in _LAZY_EXPORTS: return getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+__all__ = ['Tool', 'LazyTool', 'warm_tools', 'AresInternetTool', 'CodeEngine', 'YouTubeSearchTool', 'SlideGenerationTool', 'DataScienceTool'] # add more tools when available
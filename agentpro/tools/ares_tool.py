@@ -1,7 +1,10 @@
-import requests
+import logging
 import os
 from pydantic import HttpUrl
 from .base import Tool
+from ..clients import get_http_session, get_async_http_client
+from ..scheduler import PRIORITY_TOOL, RateLimited, get_default_scheduler, provider_for
+logger = logging.getLogger(__name__)
 class AresInternetTool(Tool):
     name: str = "Ares Internet Search Tool"
     description: str = "Tool to search real-time relevant content from the internet"
@@ -15,10 +18,27 @@ class AresInternetTool(Tool):
             if not self.x_api_key:
                 raise ValueError("TRAVERSAAL_ARES_API_KEY environment variable not set")
     def run(self, prompt: str, temp = 0.7, max_tokens= 4000) -> str:
-        print(f"🛠️ Calling Ares Internet Search Tool with prompt: {prompt} , temperature: {temp}, and max_tokens: {max_tokens}")
+        logger.debug("Ares search: %.500s", prompt)
         payload = {"query": [prompt]}
-        response = requests.post(self.url, json=payload, headers={"x-api-key": self.x_api_key, "content-type": "application/json"})
-        print(f"Response: {response.status_code} - {response.text}")
+        def post():
+            response = get_http_session().post(str(self.url), json=payload, headers={"x-api-key": self.x_api_key, "content-type": "application/json"})
+            if response.status_code == 429: raise RateLimited(f"Ares rate limit: {response.text}", response.headers.get("retry-after"))
+            return response
+        response = get_default_scheduler().call(post, provider=provider_for(self), priority=PRIORITY_TOOL)
+        logger.debug("Ares response %s: %.1000s", response.status_code, response.text)
+        if response.status_code != 200:
+            return f"Error: {response.status_code} - {response.text}"
+        response = response.json()
+        return response['data']['response_text']
+    async def arun(self, prompt: str, temp = 0.7, max_tokens= 4000) -> str:
+        logger.debug("Ares search (async): %.500s", prompt)
+        payload = {"query": [prompt]}
+        async def post():
+            response = await get_async_http_client().post(str(self.url), json=payload, headers={"x-api-key": self.x_api_key, "content-type": "application/json"})
+            if response.status_code == 429: raise RateLimited(f"Ares rate limit: {response.text}", response.headers.get("retry-after"))
+            return response
+        response = await get_default_scheduler().acall(post, provider=provider_for(self), priority=PRIORITY_TOOL)
+        logger.debug("Ares response %s: %.1000s", response.status_code, response.text)
         if response.status_code != 200:
             return f"Error: {response.status_code} - {response.text}"
         response = response.json()
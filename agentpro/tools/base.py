@@ -1,21 +1,41 @@
 from typing import Any
 from abc import ABC, abstractmethod
 from pydantic import BaseModel
-from openai import OpenAI
+import asyncio
 import os
+from ..clients import get_openai_client, get_async_openai_client
+from ..llm import chat_completion, achat_completion
+from ..scheduler import PRIORITY_TOOL
+from ..tracing import in_current_context, traced_tool
 class Tool(ABC, BaseModel):
     name: str
     description: str
     arg: str
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        # Every tool's run/arun is traced as a "tool.call" span (see agentpro.tracing).
+        super().__pydantic_init_subclass__(**kwargs)
+        for method in ("run", "arun"):
+            if method in cls.__dict__: setattr(cls, method, traced_tool(cls.__dict__[method]))
     def model_post_init(self, __context: Any) -> None:
         self.name = self.name.lower().replace(' ', '_')
         self.description = self.description.strip().lower()
         self.arg = self.arg.strip().lower()
     @abstractmethod
     def run(self, prompt: str) -> str:  pass
+    async def arun(self, *args, **kwargs) -> Any:
+        """Async entry point. Tools without a native async path run `run` in the default executor."""
+        return await asyncio.get_running_loop().run_in_executor(None, in_current_context(self.run, *args, **kwargs))
+    def warm(self) -> None:
+        """Loads the modules and clients `run` needs ahead of the first call (see LazyTool). No-op by default."""
     def get_tool_description(self):     return f"Tool: {self.name}\nDescription: {self.description}\nArg: {self.arg}\n"
+    def get_tool_schema(self) -> dict:
+        """Function-calling schema for the chat API's `tools` parameter: one string argument, `input`, described by `arg`.
+        Tools taking structured input describe it in `arg`; JSON passed as the string is decoded before `run`."""
+        return {"type": "function", "function": {"name": self.name, "description": self.description, "parameters": {"type": "object", "properties": {"input": {"type": "string", "description": self.arg}}, "required": ["input"]}}}
 class LLMTool(Tool):
     client: Any = None
+    aclient: Any = None
     model: str = "gpt-4o-mini"
     client_details: dict = None
     temperature: float = 0.7
@@ -23,20 +43,39 @@ class LLMTool(Tool):
     def __init__(self, client_details: dict=None, model_name:str = "gpt-4o-mini",**data) -> None:
         super().__init__(**data)
         if client_details:
-            self.client = OpenAI(api_key=client_details.get("api_key"), base_url=client_details.get("api_base"))
+            self.client = get_openai_client(client_details.get("api_key"), client_details.get("api_base"))
+            self.aclient = get_async_openai_client(client_details.get("api_key"), client_details.get("api_base"))
         else:
             api_key = os.environ.get("OPENAI_API_KEY")
             if not api_key: raise ValueError("OPENAI_API_KEY environment variable not set")
-            self.client = OpenAI(api_key=api_key)
+            self.client = get_openai_client(api_key)
+            self.aclient = get_async_openai_client(api_key)
         self.model = model_name
     def run(self, prompt: str) -> str:
         try:
-            response = self.client.chat.completions.create(
+            response = chat_completion(
+                self.client,
                 model=self.model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
+                priority=PRIORITY_TOOL,
             ).choices[0].message.content.strip()
             return response
         except Exception as e:
             return f"Error running LLMTool '{self.name}': {str(e)}"
+    async def arun(self, prompt: str, *args, **kwargs) -> str:
+        # Subclasses that replace run() with their own pipeline keep the executor fallback until they add an arun.
+        if type(self).run is not LLMTool.run: return await super().arun(prompt, *args, **kwargs)
+        try:
+            response = (await achat_completion(
+                self.aclient,
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                priority=PRIORITY_TOOL,
+            )).choices[0].message.content.strip()
+            return response
+        except Exception as e:
+            return f"Error running LLMTool '{self.name}': {str(e)}"
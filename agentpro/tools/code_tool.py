@@ -1,40 +1,50 @@
+import logging
 import re
-import subprocess
-import sys
+from typing import Any
 from .base import LLMTool
+from ..deps import get_dependency_manager, parse_pip_line
+from ..sandbox import get_default_pool
+from ..llm import chat_completion
+from ..scheduler import PRIORITY_TOOL
+logger = logging.getLogger(__name__)
 class CodeEngine(LLMTool):
     name: str = "Code Generation and Execution Tool"
     description: str = "A coding tool that can take a prompt and generate executable Python code. It parses and executes the code. Returns the code and the error if the code execution fails."
     arg: str = "A single string parameter describing the coding task. Donot include any code or comments. The tool will generate the code for you."
+    use_sandbox: bool = True
+    sandbox: Any = None
+    exec_timeout: float = None
     def __init__(self, client_details: dict = None, model_name:str ='', temp:float = 0.7, max_tokens:int = 4000,**data):
         super().__init__(client_details=client_details, model_name=model_name,**data)
-        print(f"Using model: {self.model} for code generation")
+        logger.debug("Using model %s for code generation", self.model)
         self.temperature = temp if temp else 0.7
         self.max_tokens = max_tokens if max_tokens else 4000
     def parse_and_exec_code(self, response: str):
-        print("Parsing and executing code...")
         result = re.search(r'```python\s*([\s\S]*?)\s*```', response)
-        if not result: return "No Python code block found", "Failed to extract code"
+        if not result: return "No Python code block found", "Failed to extract code", None
         code_string = result.group(1)
         if "pip install" in code_string.split("\n")[0]:
-            print("Requires PIP package installations")
-            packages = code_string.split("\n")[0].split("pip install")[-1].strip()
-            if "," in packages:    packages = packages.split(",")
-            elif " " in packages:  packages = packages.split(" ")
-            else:                  packages = [packages]
-            print(f"Installing packages: {packages}")
-            for package in packages:
-                subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-        print("Executing main code...")
+            logger.info("Generated code requires pip packages")
+            report = get_dependency_manager().ensure(parse_pip_line(code_string.split("\n")[0]))
+            if report["failed"]: logger.warning("Could not install: %s", report["failed"])
+        logger.debug("Executing generated code")
+        if self.use_sandbox:
+            sandbox = self.sandbox if self.sandbox is not None else get_default_pool()
+            result = sandbox.run(code_string, timeout=self.exec_timeout)
+            output = result.stdout + (f"\n[stderr]\n{result.stderr}" if result.stderr else "")
+            if not result.ok:
+                logger.info("Error executing generated code: %.500s", result.error)
+                return code_string, result.error, output
+            return code_string, None, output
         try:
             exec(code_string)
         except Exception as e:
-            print(f"Error executing generated code: {e}")
-            return code_string, e
-        return code_string, None
+            logger.info("Error executing generated code: %s", e)
+            return code_string, e, None
+        return code_string, None, None
     def generate_code(self, prompt, temp, max_tokens):
-        print(f"🎉Generating code for prompt")
-        response = self.client.chat.completions.create(
+        response = chat_completion(
+            self.client,
             model=self.model,
             messages=[
                 {"role": "system", "content": "You are a Python code generator. Respond only with executable Python code, no explanations or comments except for required pip installations at the top. Return the code within ```python and ``` strings. The first line should be commented out pip install statement"},
@@ -42,21 +52,21 @@ class CodeEngine(LLMTool):
             ],
             max_tokens=max_tokens,
             temperature=temp,
+            priority=PRIORITY_TOOL,
         )
-        print(f"Generated code: {response}")
         response = response.choices[0].message.content
-        print(f"Generated code: {response}")
-        code, error = self.parse_and_exec_code(response)
-        return code, error
+        logger.debug("Generated code: %.2000s", response)
+        return self.parse_and_exec_code(response)
     def run(self, prompt: str, temp=0.7, max_tokens=4000) -> str:
-        print(f"Code Generation Tool received: {prompt} with temp: {temp}, max_tokens: {max_tokens}")
+        logger.debug("Code Generation Tool received: %.500s (temp %s, max_tokens %s)", prompt, temp, max_tokens)
         is_code = (prompt.strip().startswith("```python") or prompt.strip().startswith("#") or prompt.strip().startswith("import") or "def " in prompt or "class " in prompt or prompt.strip().endswith(":"))
         if is_code:
-            print("Detected raw Python code input, executing directly...")
-            code, error = self.parse_and_exec_code(prompt)
+            logger.debug("Detected raw Python code input, executing directly")
+            code, error, output = self.parse_and_exec_code(prompt)
         else:
-            print("Treating input as natural language prompt, generating code...")
-            code, error = self.generate_code(prompt, temp, max_tokens)
+            logger.debug("Treating input as a natural language prompt, generating code")
+            code, error, output = self.generate_code(prompt, temp, max_tokens)
+        output = f"\n\nOutput:\n{output}" if output else ""
         if error:
-            return f"Code: {code}\n\nCode execution caused an error: {error}"
-        return f"Code: {code}\n\n\nCode Executed Successfully"
+            return f"Code: {code}\n\nCode execution caused an error: {error}{output}"
+        return f"Code: {code}\n\n\nCode Executed Successfully{output}"
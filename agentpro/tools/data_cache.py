@@ -0,0 +1,150 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Tuple
+import pandas as pd
+logger = logging.getLogger(__name__)
+def copy_on_write_enabled() -> bool:
+    if int(pd.__version__.split(".")[0]) >= 3: return True
+    try:
+        return pd.get_option("mode.copy_on_write") is True
+    except Exception:
+        return False
+def file_key(path: str) -> Tuple[str, int, int]:
+    """(absolute path, size, mtime in ns): changes whenever the file on disk does."""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+class DataFrameCache:
+    """Process-wide LRU cache of parsed CSVs and their rendered schema text, keyed by (path, size, mtime).
+
+    Entries are bounded by the in-memory size of the DataFrames (`max_bytes`). With `parquet_sidecars`, each
+    CSV parsed once is also written as Parquet under `sidecar_dir`, so later processes load it without parsing.
+    Callers get a copy of the cached DataFrame, so code that mutates it cannot corrupt the cache.
+    """
+    def __init__(self, max_bytes: int = 2 * 1024 ** 3, parquet_sidecars: bool = False, sidecar_dir: str = None):
+        self.max_bytes = max_bytes
+        self.parquet_sidecars = parquet_sidecars
+        self.sidecar_dir = sidecar_dir or os.path.join(os.path.expanduser("~"), ".cache", "agentpro", "frames")
+        self.stats = {"hits": 0, "misses": 0, "sidecar_hits": 0, "evictions": 0}
+        self._frames = OrderedDict()
+        self._schemas = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loading = {}
+    def _sidecar_path(self, key: tuple) -> str:
+        digest = hashlib.sha1(f"{key[0]}|{key[1]}|{key[2]}".encode("utf-8")).hexdigest()
+        return os.path.join(self.sidecar_dir, f"{digest}.parquet")
+    def _read(self, path: str, key: tuple) -> pd.DataFrame:
+        sidecar = self._sidecar_path(key) if self.parquet_sidecars else None
+        if sidecar and os.path.exists(sidecar):
+            try:
+                df = pd.read_parquet(sidecar)
+                with self._lock: self.stats["sidecar_hits"] += 1
+                return df
+            except Exception as e:
+                logger.warning("Ignoring unreadable Parquet sidecar %s: %s", sidecar, e)
+        df = pd.read_csv(path)
+        if sidecar:
+            try:
+                os.makedirs(self.sidecar_dir, exist_ok=True)
+                df.to_parquet(sidecar + ".tmp", index=False)
+                os.replace(sidecar + ".tmp", sidecar)
+            except Exception as e:
+                logger.warning("Could not write Parquet sidecar for %s: %s", path, e)
+        return df
+    def _cached(self, path: str) -> Tuple[tuple, pd.DataFrame]:
+        key = file_key(path)
+        with self._lock:
+            if key in self._frames:
+                self._frames.move_to_end(key)
+                self.stats["hits"] += 1
+                return key, self._frames[key][0]
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            with self._lock:
+                if key in self._frames:
+                    self.stats["hits"] += 1
+                    return key, self._frames[key][0]
+            df = self._read(path, key)
+            size = int(df.memory_usage(deep=True).sum())
+            with self._lock:
+                self.stats["misses"] += 1
+                self._loading.pop(key, None)
+                for stale in [k for k in self._frames if k[0] == key[0]]:
+                    self._bytes -= self._frames.pop(stale)[1]
+                self._drop_stale_schemas(key)
+                if size <= self.max_bytes:
+                    self._frames[key] = (df, size)
+                    self._bytes += size
+                    self._evict()
+        return key, df
+    def _drop_stale_schemas(self, key: tuple) -> None:
+        """Drops schema text, full or sampled, rendered for earlier versions of `key`'s file. Needs the lock."""
+        self._schemas = {k: v for k, v in self._schemas.items() if k[0][0] != key[0] or k[0] == key}
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._frames:
+            key, (_, size) = self._frames.popitem(last=False)
+            self._bytes -= size
+            self._schemas = {k: v for k, v in self._schemas.items() if k[0] != key}
+            self.stats["evictions"] += 1
+    def load(self, path: str) -> pd.DataFrame:
+        """The parsed CSV at `path`, from the cache when the file has not changed."""
+        _, df = self._cached(path)
+        return df.copy(deep=not copy_on_write_enabled())
+    def load_with_schema(self, path: str, max_rows: int = 5) -> Tuple[pd.DataFrame, str]:
+        """The DataFrame plus its `df.info()` text and a markdown sample of `max_rows` rows."""
+        key, df = self._cached(path)
+        with self._lock: schema = self._schemas.get((key, max_rows))
+        if schema is None:
+            info_buffer = io.StringIO()
+            df.info(buf=info_buffer)
+            schema = f"Columns and Types:\n```\n{info_buffer.getvalue()}```\n\n" + f"Sample Rows:\n{df.head(max_rows).to_markdown(index=False)}\n\n"
+            with self._lock:
+                if key in self._frames: self._schemas[(key, max_rows)] = schema
+        return df.copy(deep=not copy_on_write_enabled()), schema
+    def dataset(self, path: str):
+        """A lazily scanned pyarrow dataset over the file, for data too large to load with pandas.
+
+        With `parquet_sidecars` the CSV is first streamed into a Parquet sidecar (bounded memory), which gives
+        generated code memory-mapped reads, column projection and row-group predicate pushdown.
+        """
+        import pyarrow.dataset as ds
+        key = file_key(path)
+        if not self.parquet_sidecars:
+            return ds.dataset(path, format="csv")
+        sidecar = self._sidecar_path(key).replace(".parquet", ".dataset")
+        if not os.path.isdir(sidecar):
+            try:
+                logger.info("Converting %s to Parquet for out-of-core scans", path)
+                os.makedirs(self.sidecar_dir, exist_ok=True)
+                ds.write_dataset(ds.dataset(path, format="csv"), sidecar + ".tmp", format="parquet", existing_data_behavior="delete_matching")
+                os.replace(sidecar + ".tmp", sidecar)
+            except Exception as e:
+                logger.warning("Could not write Parquet dataset for %s: %s", path, e)
+                return ds.dataset(path, format="csv")
+        return ds.dataset(sidecar, format="parquet")
+    def sample_schema(self, path: str, sample_rows: int = 10000, max_rows: int = 5) -> str:
+        """Schema text like load_with_schema, but inferred from the first `sample_rows` rows only."""
+        key = file_key(path)
+        with self._lock: schema = self._schemas.get((key, "sample", sample_rows, max_rows))
+        if schema is None:
+            sample = pd.read_csv(path, nrows=sample_rows)
+            info_buffer = io.StringIO()
+            sample.info(buf=info_buffer)
+            schema = (f"LARGE FILE ({key[1] / 1024 ** 2:,.0f} MB), not loaded into memory. Schema inferred from the first {len(sample)} rows:\n```\n{info_buffer.getvalue()}```\n\n" + f"Sample Rows:\n{sample.head(max_rows).to_markdown(index=False)}\n\n")
+            with self._lock:
+                self._drop_stale_schemas(key)
+                self._schemas[(key, "sample", sample_rows, max_rows)] = schema
+        return schema
+    def info(self) -> dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._frames), "bytes": self._bytes}
+    def clear(self) -> None:
+        with self._lock:
+            self._frames.clear()
+            self._schemas.clear()
+            self._bytes = 0
+FRAME_CACHE = DataFrameCache(max_bytes=int(os.environ.get("AGENTPRO_FRAME_CACHE_BYTES", 2 * 1024 ** 3)), parquet_sidecars=os.environ.get("AGENTPRO_PARQUET_SIDECARS", "").lower() in ("1", "true", "yes"))
@@ -1,39 +1,59 @@
+import logging
 import re
 import os
 import io
 import sys
-import pandas as pd
 import traceback
 import contextlib
+from typing import Any
 from .base import LLMTool
+from ..llm import chat_completion
+from ..scheduler import PRIORITY_TOOL
+logger = logging.getLogger(__name__)
 class DataScienceTool(LLMTool):
     name: str = "Data Science Tool"
     description: str = ("A tool for analyzing and manipulating one or more CSV datasets using pandas. You can ask complex queries involving filters, joins, aggregations, selection, manipulation, data Q/A etc.")
     arg: str = ("A natural language string describing a data task. CSVs/other files mentioned in the prompt must exist.")
+    frame_cache: Any = None
+    large_file_bytes: int = 512 * 1024 * 1024
+    sample_rows: int = 10000
     def __init__(self, client_details: dict = None, model_name: str = '', temp: float = 0.1, max_tokens: int = 1500, **data):
         super().__init__(client_details=client_details, model_name=model_name, **data)
-        print(f"Using model: {self.model} for data tool")
+        logger.debug("Using model %s for data tool", self.model)
         self.temperature = temp
         self.max_tokens = max_tokens
+        if self.frame_cache is None:
+            from .data_cache import FRAME_CACHE
+            self.frame_cache = FRAME_CACHE
+    def warm(self) -> None:
+        import pandas
     def extract_csv_paths(self, prompt: str) -> list:
         csv_pattern = r"[a-zA-Z0-9_\-/\\]+\.csv"
         all_paths = re.findall(csv_pattern, prompt)
         valid_paths = [p for p in all_paths if os.path.exists(p)]
         return valid_paths
+    def load_csv(self, path: str, max_rows=5) -> tuple[str, dict]:
+        """Schema text and execution variables for one CSV: `df_<name>` for regular files; for files over
+        `large_file_bytes`, a lazily scanned `ds_<name>` pyarrow dataset and an `iter_<name>(chunksize)` chunk reader."""
+        filename = os.path.basename(path)
+        stem = os.path.splitext(filename)[0].replace('-', '_').replace(' ', '_')
+        if os.path.getsize(path) <= self.large_file_bytes:
+            df, schema = self.frame_cache.load_with_schema(path, max_rows)
+            return f"📄 {filename} → `df_{stem}`\n\n" + schema + "---\n\n", {f"df_{stem}": df}
+        import pandas as pd
+        schema = self.frame_cache.sample_schema(path, self.sample_rows, max_rows)
+        variables = {f"ds_{stem}": self.frame_cache.dataset(path), f"iter_{stem}": lambda chunksize=100_000, **kwargs: pd.read_csv(path, chunksize=chunksize, **kwargs)}
+        return f"📄 {filename} → `ds_{stem}` (pyarrow.dataset) and `iter_{stem}(chunksize=100_000, usecols=None)` (pandas chunk iterator)\n\n" + schema + "---\n\n", variables
     def get_csv_schemas(self, csv_dir: str, max_rows=5) -> tuple[str, dict]:
         schema_text = ""
         dataframes = {}
         for filename in os.listdir(csv_dir):
             if filename.endswith(".csv"):
                 path = os.path.join(csv_dir, filename)
-                df_name = f"df_{os.path.splitext(filename)[0].replace('-', '_').replace(' ', '_')}"
                 try:
-                    df = pd.read_csv(path)
-                    info_buffer = io.StringIO()
-                    df.info(buf=info_buffer)
-                    sample = df.head(max_rows).to_markdown(index=False)
-                    schema_text += (f"📄 {filename} → `{df_name}`\n\n" + f"Columns and Types:\n```\n{info_buffer.getvalue()}```\n\n" + f"Sample Rows:\n{sample}\n\n---\n\n")
-                    dataframes[df_name] = df
+                    schema, variables = self.load_csv(path, max_rows)
+                    schema_text += schema
+                    dataframes.update(variables)
                 except Exception as e:
                     schema_text += f"⚠️ Could not load {filename}: {e}\n\n"
         if not dataframes:
@@ -44,35 +64,39 @@ class DataScienceTool(LLMTool):
         dataframes = {}
         for path in paths:
             filename = os.path.basename(path)
-            df_name = f"df_{os.path.splitext(filename)[0].replace('-', '_').replace(' ', '_')}"
             try:
-                df = pd.read_csv(path)
-                info_buffer = io.StringIO()
-                df.info(buf=info_buffer)
-                sample = df.head(max_rows).to_markdown(index=False)
-                schema_text += (f"📄 {filename} → `{df_name}`\n\n" + f"Columns and Types:\n```\n{info_buffer.getvalue()}```\n\n" + f"Sample Rows:\n{sample}\n\n---\n\n")
-                dataframes[df_name] = df
+                schema, variables = self.load_csv(path, max_rows)
+                schema_text += schema
+                dataframes.update(variables)
             except Exception as e:
                 schema_text += f"⚠️ Could not load {filename}: {e}\n\n"
         if not dataframes:
             raise FileNotFoundError("CSV files found in prompt, but none could be loaded.")
         return schema_text, dataframes
-    def generate_code(self, task: str, schema_context: str, temp:float, max_tok:int) -> str:
+    def generate_code(self, task: str, schema_context: str, temp:float, max_tok:int, large_files: bool = False) -> str:
         prompt = (f"You are a data scientist. The following DataFrames are available:\n\n"+f"{schema_context}\n\n"+f"Task: {task}\n\n"+f"Write pandas code that solves the task using the DataFrames above. "+f"Do NOT read CSVs — assume they are already loaded as variables. "+f"End your code with a final expression that returns the result, like a variable or value."+f" Use print() to ensure the result is visible in the output."+f" Output code only inside ```python code blocks.")
-        response = self.client.chat.completions.create(
+        if large_files:
+            prompt += (" Files marked LARGE FILE do not fit in memory and must never be fully materialized: there is no df_ variable for them."+" Prefer ds_<name>.to_table(columns=[...], filter=pc.field('col') > value).to_pandas() so only the needed columns and rows are read (pyarrow.compute is available as pc),"+" or stream ds_<name>.to_batches(columns=[...]) / iter_<name>(chunksize=..., usecols=[...]) and combine partial aggregates (sums, counts, min/max) chunk by chunk."+" Keep intermediate results small.")
+        response = chat_completion(
+            self.client,
             model=self.model,
             messages=[{"role": "system", "content": ("You are a Python data analyst. Use pandas as pd & numpy as np only. Do not import CSVs, the DataFrames are already loaded with names like df_employees or df_states. Always use print() to show the final result. Output executable Python code only.")}, {"role": "user", "content": prompt}],
             temperature=temp if temp else self.temperature,
-            max_tokens=max_tok if max_tok else self.max_tokens
+            max_tokens=max_tok if max_tok else self.max_tokens,
+            priority=PRIORITY_TOOL,
         )
         return response.choices[0].message.content
     def extract_code(self, response: str) -> str:
         match = re.search(r'```python\s*([\s\S]*?)\s*```', response)
         return match.group(1).strip() if match else None
     def execute_code(self, code: str, dataframes: dict) -> str:
-        print("⚙️ Executing code...")
+        logger.debug("Executing generated pandas code")
+        import pandas as pd
         output = io.StringIO()
         exec_scope = {"pd": pd, **dataframes}
+        if any(name.startswith("ds_") for name in dataframes):
+            import pyarrow.compute as pc
+            exec_scope["pc"] = pc
         final_expr = None
         if "\n" in code:
             *body, last = code.strip().split("\n")
@@ -89,18 +113,19 @@ class DataScienceTool(LLMTool):
             return f"Code:\n{code}\n\nExecution failed:\n{traceback.format_exc()}"
         return f"Code Executed Successfully:\n\nCode:\n{code}\n\nOutput:\n{output.getvalue()}"
     def run(self, prompt: str, temperature: float = None, max_tokens: int = None) -> str:
-        print(f"📥 DataScienceTool received: {prompt}")
+        logger.debug("DataScienceTool received: %.500s", prompt)
         try:
             csv_paths = self.extract_csv_paths(prompt)
             if not csv_paths:
                 return "❌ No valid CSV file paths found in the prompt."
             schema_context, dataframes = self.get_csv_schemas_from_paths(csv_paths)
-            llm_response = self.generate_code(prompt, schema_context, temperature, max_tokens)
-            print(f"📤 LLM response: {llm_response}")
+            large_files = any(name.startswith("ds_") for name in dataframes)
+            llm_response = self.generate_code(prompt, schema_context, temperature, max_tokens, large_files)
+            logger.debug("DataScienceTool LLM response: %.2000s", llm_response)
             code = self.extract_code(llm_response)
             if not code:
                 return f"❌ Could not extract Python code.\nResponse was:\n{llm_response}"
             return self.execute_code(code, dataframes)
         except Exception as e:
-            print(f"❌ Error: {e}")
+            logger.warning("DataScienceTool failed: %s", e)
             return f"❌ Tool failed: {str(e)}"
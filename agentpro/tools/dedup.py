@@ -0,0 +1,118 @@
+import os
+import re
+import threading
+import zlib
+from collections import defaultdict
+from typing import Any, List, Tuple
+import numpy as np
+from .vector_store import _Rows
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+def shingles(text: str, size: int = 5) -> set:
+    """Hashed word `size`-grams of the lower-cased text (the whole text for shorter ones)."""
+    words = re.findall(r"\w+", text.lower())
+    grams = [" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))]
+    return {zlib.crc32(gram.encode("utf-8")) for gram in grams}
+class MinHasher:
+    """MinHash signatures from `num_perm` universal hash functions; seeded, so stable across runs."""
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+    def signature(self, hashes: set) -> np.ndarray:
+        values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes)).reshape(-1, 1)
+        with np.errstate(over="ignore"):
+            permuted = np.bitwise_and((values * self.a + self.b) % MERSENNE_PRIME, MAX_HASH)
+        return permuted.min(axis=0).astype(np.uint32)
+def jaccard(first: np.ndarray, second: np.ndarray) -> float:
+    """Jaccard similarity estimated from two MinHash signatures."""
+    return float(np.mean(first == second))
+class NearDuplicateFilter:
+    """Skips passages that are near-duplicates of notes already in a FAISSVectorDB, or of each other.
+
+    A passage is a duplicate when its MinHash signature has estimated Jaccard similarity of at least
+    `jaccard_threshold` with a stored note (candidates come from an LSH index of `bands` bands), or when
+    its embedding's cosine similarity to the nearest stored vector is at least `embedding_threshold`.
+    Signatures are kept by note id next to the vector store (`minhash.u32`) and recomputed from note text
+    for notes stored before the filter existed.
+    """
+    def __init__(self, vector_db: Any, jaccard_threshold: float = 0.8, embedding_threshold: float = 0.95, num_perm: int = 128, bands: int = 16, shingle_size: int = 5):
+        if num_perm % bands: raise ValueError("num_perm must be a multiple of bands")
+        self.vector_db = vector_db
+        self.jaccard_threshold = jaccard_threshold
+        self.embedding_threshold = embedding_threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm)
+        self.stats = {"checked": 0, "kept": 0, "skipped_minhash": 0, "skipped_embedding": 0, "skipped_bytes": 0}
+        self._lock = threading.Lock()
+        self._buckets = [defaultdict(list) for _ in range(bands)]
+        path = getattr(vector_db, "path", None)
+        self._signatures = _Rows(os.path.join(path, "minhash.u32") if path else None, np.uint32, num_perm)
+        self._synced = 0
+    def signature(self, text: str) -> np.ndarray:
+        return self.hasher.signature(shingles(text, self.shingle_size))
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+    def _index(self, note_id: int, signature: np.ndarray) -> None:
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            bucket[key].append(note_id)
+    def _grow(self) -> None:
+        """Makes room for a signature row per note id in the vector store."""
+        store = self.vector_db.note_store
+        self._signatures.count = max(self._signatures.count, min(store.count, len(self._signatures._data)))
+        missing = np.zeros((max(0, store.count - self._signatures.count), self.hasher.num_perm), np.uint32)
+        if len(missing): self._signatures.append(missing)
+    def _sync(self) -> None:
+        """Indexes signatures of notes added since the last call, computing any that were never stored."""
+        store = self.vector_db.note_store
+        self._grow()
+        signatures = self._signatures.view()
+        for note_id in range(self._synced, store.count):
+            if not store.exists(note_id): continue
+            if not signatures[note_id].any(): signatures[note_id] = self.signature(store.get(note_id)["text"])
+            self._index(note_id, signatures[note_id])
+        self._synced = store.count
+        self._signatures.flush()
+    def _similar_note(self, signature: np.ndarray) -> bool:
+        store = self.vector_db.note_store
+        candidates = {note_id for bucket, key in zip(self._buckets, self._band_keys(signature)) for note_id in bucket.get(key, ())}
+        return any(store.exists(note_id) and jaccard(signature, self._signatures.view()[note_id]) >= self.jaccard_threshold for note_id in candidates)
+    def _cosine(self, score: float) -> float:
+        return score if getattr(self.vector_db, "metric", "ip") == "ip" else 1.0 - score / 2.0
+    def filter(self, texts: List[str], embeddings) -> Tuple[List[int], List[np.ndarray]]:
+        """Positions of the texts worth storing, plus their signatures to pass to `register` once added."""
+        embeddings = np.asarray(embeddings, dtype="float32").reshape(len(texts), -1)
+        with self._lock:
+            self._sync()
+            signatures = [self.signature(text) for text in texts]
+            nearest = self.vector_db.similarity_search(embeddings, k=1) if len(self.vector_db) else [[] for _ in texts]
+            keep = []
+            for position, (text, signature, hits) in enumerate(zip(texts, signatures, nearest)):
+                self.stats["checked"] += 1
+                if self._similar_note(signature) or any(jaccard(signature, signatures[kept]) >= self.jaccard_threshold for kept in keep):
+                    reason = "skipped_minhash"
+                elif (hits and self._cosine(hits[0]["score"]) >= self.embedding_threshold) or any(float(embeddings[position] @ embeddings[kept]) >= self.embedding_threshold for kept in keep):
+                    reason = "skipped_embedding"
+                else:
+                    keep.append(position)
+                    self.stats["kept"] += 1
+                    continue
+                self.stats[reason] += 1
+                self.stats["skipped_bytes"] += len(text.encode("utf-8"))
+        return keep, [signatures[position] for position in keep]
+    def register(self, note_ids: List[int], signatures: List[np.ndarray]) -> None:
+        """Records the signatures of notes just added to the vector store under `note_ids`."""
+        with self._lock:
+            self._grow()
+            view = self._signatures.view()
+            for note_id, signature in zip(note_ids, signatures):
+                view[note_id] = signature
+            self._sync()
+    def info(self) -> dict:
+        with self._lock:
+            checked = self.stats["checked"]
+            skipped = checked - self.stats["kept"]
+            return {**self.stats, "skipped": skipped, "skip_rate": skipped / checked if checked else 0.0}
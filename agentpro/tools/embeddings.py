@@ -0,0 +1,165 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import numpy as np
+logger = logging.getLogger(__name__)
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+def split_passages(text: str, max_words: int = 200, overlap: int = 40) -> List[str]:
+    """Splits text into passages of at most `max_words` words, consecutive passages sharing `overlap` words.
+
+    Blank-line separated blocks (e.g. one per YouTube video) never share a passage; within a block, windows
+    end on a sentence boundary when one falls in their last third.
+    """
+    passages = []
+    for block in re.split(r"\n\s*\n", text):
+        words = block.split()
+        start = 0
+        while start < len(words):
+            end = min(start + max_words, len(words))
+            if end < len(words):
+                for cut in range(end, start + (2 * max_words) // 3, -1):
+                    if words[cut - 1].endswith((".", "!", "?")):
+                        end = cut
+                        break
+            passages.append(" ".join(words[start:end]))
+            if end == len(words): break
+            start = max(end - overlap, start + 1)
+    return passages
+class EmbeddingCache:
+    """Embeddings by content hash of (model, normalization, text): an in-memory LRU of `max_entries`
+    vectors in front of an optional SQLite file of float32 blobs."""
+    def __init__(self, max_entries: int = 100000, path: str = None):
+        self.max_entries = max_entries
+        self.path = path
+        self.stats = {"hits": 0, "misses": 0}
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+            self._db.commit()
+    @staticmethod
+    def make_key(model: str, normalize: bool, text: str) -> str:
+        return hashlib.sha256(f"{model}|{int(normalize)}|{text}".encode("utf-8")).hexdigest()
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            missing = [key for key in dict.fromkeys(keys) if key not in found]
+            if self._db is not None and missing:
+                for start in range(0, len(missing), 500):
+                    batch = missing[start:start + 500]
+                    rows = self._db.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch).fetchall()
+                    for key, blob in rows:
+                        found[key] = np.frombuffer(blob, dtype=np.float32)
+                        self._remember(key, found[key])
+            hits = sum(key in found for key in keys)
+            self.stats["hits"] += hits
+            self.stats["misses"] += len(keys) - hits
+        return found
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            if self._db is not None:
+                self._db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?)", [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()])
+                self._db.commit()
+    def info(self) -> dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._memory), "path": self.path}
+class Embedder:
+    """SentenceTransformer front end with the same `encode` call, adding batching, caching and lazy loading.
+
+    The model is only loaded on the first cache miss. Texts not in `cache` are de-duplicated and encoded in
+    batches of `batch_size`; with `processes` > 1 on CPU, large batches are spread over a multi-process pool.
+    `quantize="int8"` applies dynamic int8 quantization to the model's Linear layers, `quantize="onnx"` loads
+    the ONNX Runtime backend (needs `sentence-transformers[onnx]`); quantized vectors are cached apart from
+    full-precision ones. An already loaded model can be passed as `model` to get caching and batching around
+    it. Its cache entries are keyed by `model_name` or the base model named on its model card; a model with
+    neither gets a private in-memory cache, so it never shares vectors with another model.
+    """
+    def __init__(self, model_name: str = None, model: Any = None, batch_size: int = 64, device: str = None, processes: int = None, quantize: str = None, cache: EmbeddingCache = None, min_pool_batch: int = 256):
+        if model is not None and model_name is None: model_name = getattr(getattr(model, "model_card_data", None), "base_model", None)
+        self.model_name = model_name or (f"{type(model).__name__}@{id(model):x}" if model is not None else os.environ.get("AGENTPRO_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL))
+        self.batch_size = batch_size
+        self.device = device
+        self.processes = processes if processes is not None else int(os.environ.get("AGENTPRO_EMBEDDING_PROCESSES", 1))
+        # Quantization only applies to models this Embedder loads itself.
+        self.quantize = (quantize or os.environ.get("AGENTPRO_EMBEDDING_QUANTIZE") or None) if model is None else None
+        self.cache_model = f"{self.model_name}#{self.quantize}" if self.quantize else self.model_name
+        if cache is None: cache = get_default_embedding_cache() if model is None or model_name else EmbeddingCache()
+        self.cache = cache
+        self.min_pool_batch = min_pool_batch
+        self._model = model
+        self._pool = None
+        self._lock = threading.Lock()
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None: self._model = self._load()
+        return self._model
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+        logger.info("Loading embedding model %s%s", self.model_name, f" ({self.quantize})" if self.quantize else "")
+        if self.quantize == "onnx":
+            return SentenceTransformer(self.model_name, device=self.device, backend="onnx")
+        model = SentenceTransformer(self.model_name, device=self.device)
+        if self.quantize == "int8":
+            import torch
+            model = torch.quantization.quantize_dynamic(model.to("cpu"), {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+    def _use_pool(self, count: int) -> bool:
+        return self.processes > 1 and count >= self.min_pool_batch and self.quantize is None and str(self.device or "cpu").startswith("cpu")
+    def _encode_uncached(self, texts: List[str], normalize_embeddings: bool) -> np.ndarray:
+        model = self.model
+        if self._use_pool(len(texts)) and hasattr(model, "start_multi_process_pool"):
+            if self._pool is None: self._pool = model.start_multi_process_pool(["cpu"] * self.processes)
+            vectors = model.encode_multi_process(texts, self._pool, batch_size=self.batch_size)
+            if normalize_embeddings: vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            return np.asarray(vectors, dtype=np.float32)
+        return np.asarray(model.encode(texts, batch_size=self.batch_size, normalize_embeddings=normalize_embeddings, show_progress_bar=False), dtype=np.float32)
+    def encode(self, sentences, normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        """Like SentenceTransformer.encode: a 1-D vector for one string, a 2-D array for a list."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        keys = [EmbeddingCache.make_key(self.cache_model, normalize_embeddings, text) for text in texts]
+        found = self.cache.get_many(keys)
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            vectors = self._encode_uncached(list(missing.values()), normalize_embeddings)
+            encoded = dict(zip(missing, vectors))
+            self.cache.put_many(encoded)
+            found.update(encoded)
+        if not texts: return np.zeros((0, 0), dtype=np.float32)
+        vectors = np.stack([found[key] for key in keys])
+        return vectors[0] if single else vectors
+    def close(self) -> None:
+        if self._pool is not None:
+            self._model.stop_multi_process_pool(self._pool)
+            self._pool = None
+_default_cache = None
+_default_lock = threading.Lock()
+def get_default_embedding_cache() -> EmbeddingCache:
+    """Process-wide cache; AGENTPRO_EMBEDDING_CACHE names a SQLite file to also keep embeddings across runs."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = EmbeddingCache(path=os.environ.get("AGENTPRO_EMBEDDING_CACHE") or None)
+    return _default_cache
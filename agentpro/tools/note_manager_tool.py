@@ -1,54 +1,70 @@
 from agentpro.tools.base import Tool
-from sentence_transformers import SentenceTransformer
-from typing import List, Any
-import numpy as np
-import faiss
-class FAISSVectorDB:
-    def __init__(self, index, note_store):
-        self.index = index
-        self.note_store = note_store
-    def similarity_search(self, query_embedding, k=5):
-        if self.index.ntotal == 0: return []
-        query_vector = np.array(query_embedding).astype("float32").reshape(1, -1)
-        scores, indices = self.index.search(query_vector, k)
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < len(self.note_store):
-                results.append({"text": self.note_store[idx]["text"], "score": float(scores[0][i])})
-        return results
+from typing import Dict, List, Any
+import logging
+import os
+from .dedup import NearDuplicateFilter
+from .embeddings import Embedder, split_passages
+logger = logging.getLogger(__name__)
 class NoteManager(Tool):
     name: str = "note_manager"
     description: str = ("Create notes. Searches using ares_tool and summarizes top relevant note from YouTube or stored data.")
     arg: str = "A question or topic like 'explain transformers'"
-    def __init__(self, vector_db: Any, embedding_model: Any, youtube_tool: Any, ares_tool: Any):
-        super().__init__()
+    top_k: int = 1
+    passage_words: int = 200
+    passage_overlap: int = 40
+    deduplicate: bool = True
+    def __init__(self, vector_db: Any, embedding_model: Any, youtube_tool: Any, ares_tool: Any, **data):
+        super().__init__(**data)
+        if not isinstance(embedding_model, Embedder):
+            embedding_model = Embedder(model=embedding_model) if embedding_model is not None else Embedder()
+        if vector_db is None:
+            from .vector_store import FAISSVectorDB
+            vector_db = FAISSVectorDB(path=os.environ.get("AGENTPRO_NOTE_STORE") or os.path.join(os.path.expanduser("~"), ".cache", "agentpro", "notes"))
         object.__setattr__(self, "vector_db", vector_db)
+        object.__setattr__(self, "dedup", NearDuplicateFilter(vector_db) if self.deduplicate else None)
         object.__setattr__(self, "embedding_model", embedding_model)
         object.__setattr__(self, "youtube_tool", youtube_tool)
         object.__setattr__(self, "ares_tool", ares_tool)
     def run(self, prompt: str) -> str:
         if not prompt.strip(): return "Please enter a valid query."
-        print("FAISS index ntotal:", self.vector_db.index.ntotal)
+        logger.debug("Notes in vector store: %d", len(self.vector_db))
         query_embedding = self.embed(prompt)
-        results = self.vector_db.similarity_search(query_embedding, k=1)
+        results = self.vector_db.similarity_search(query_embedding, k=self.top_k)
         if not results:
             result = self.ingest_youtube_notes(prompt)
             return f"No matching notes found. Ingested from YouTube. {result}. Call again to summarize."
-        top_note = results[0]["text"]
+        top_note = "\n\n".join(result["text"] for result in results)
         try:
             summary = self.ares_tool.run(top_note)
             return f"[FINALIZED NOTES]\n{summary}"
         except Exception as e: return f"Found a note but summarization failed: {e}"
     def embed(self, text: str) -> List[float]:
         return self.embedding_model.encode(text, normalize_embeddings=True).tolist()
+    def ingest_texts(self, texts: List[str], metadata: Dict[str, Any] = None) -> int:
+        """Splits documents into overlapping passages, embeds them in one batch and stores the ones that are not
+        near-duplicates of stored notes. Returns the number of passages stored."""
+        passages, metadatas = [], []
+        for document, text in enumerate(texts):
+            for number, passage in enumerate(split_passages(text, self.passage_words, self.passage_overlap)):
+                passages.append(passage)
+                metadatas.append({**(metadata or {}), "document": document, "passage": number})
+        if not passages: return 0
+        embeddings = self.embedding_model.encode(passages, normalize_embeddings=True)
+        if self.dedup is not None:
+            keep, signatures = self.dedup.filter(passages, embeddings)
+            if not keep: return 0
+            passages, embeddings, metadatas = [passages[i] for i in keep], embeddings[keep], [metadatas[i] for i in keep]
+        ids = self.vector_db.add(passages, embeddings, metadatas)
+        if self.dedup is not None: self.dedup.register(ids, signatures)
+        return len(passages)
     def ingest_youtube_notes(self, query: str) -> str:
         try:
-            print(f"🔎 Fetching YouTube content for query: {query}")
+            logger.debug("Fetching YouTube content for query: %s", query)
             result = self.youtube_tool.run(query)
             if isinstance(result, str) and result.strip():
-                self.vector_db.note_store.append({"text": result})
-                video_embedding = self.embedding_model.encode([result], normalize_embeddings=True)
-                self.vector_db.index.add(np.array(video_embedding).astype("float32"))
-                return " YouTube content ingested successfully."
+                skipped = self.dedup.stats["checked"] - self.dedup.stats["kept"] if self.dedup is not None else 0
+                count = self.ingest_texts(result.split("\n\n\n"), {"source": "youtube", "query": query})
+                skipped = (self.dedup.stats["checked"] - self.dedup.stats["kept"] if self.dedup is not None else 0) - skipped
+                return f" YouTube content ingested successfully ({count} passages, {skipped} near-duplicates skipped)."
             return " Unexpected YouTube result format."
         except Exception as e: return f" Error during ingestion: {e}"
@@ -1,41 +1,84 @@
 from agentpro.tools.base import Tool
 from pydantic import PrivateAttr
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import re
+from ..pool import AgentPool
+from ..tracing import in_current_context
+logger = logging.getLogger(__name__)
+INTENTS = {
+    "plan": "plan", "learning": "plan", "learn": "plan",
+    "recommend": "recommend", "video": "recommend", "videos": "recommend",
+    "summarize": "notes", "notes": "notes", "note": "notes",
+}
+BRANCH_TITLES = {"plan": "Learning Plan", "recommend": "Recommended Videos", "notes": "Notes"}
+ALL_INTENTS = ("study", "package", "all", "everything")
 class PlannerTool(Tool):
     name: str = "planner_tool"
-    description: str = ("Acts as a teacher assistant: recommends YouTube videos, summarizes content, and plans learning paths.")
-    arg: str = "Instruction like 'plan deep learning', 'recommend videos on transformers', or 'summarize a topic'."
+    description: str = ("Acts as a teacher assistant: recommends YouTube videos, summarizes content, and plans learning paths. Instructions can be combined, e.g. 'plan + recommend + notes on transformers', or 'study transformers' for all three.")
+    arg: str = "Instruction like 'plan deep learning', 'recommend videos on transformers', 'summarize a topic', or combined like 'plan + recommend + notes transformers'."
     _sub_agent = PrivateAttr()
-    def __init__(self, sub_agent):
+    _pool = PrivateAttr()
+    def __init__(self, sub_agent=None, pool: AgentPool = None, pool_size: int = 3):
+        if sub_agent is None and pool is None: raise ValueError("PlannerTool needs a sub_agent or a pool of agents to run its branches")
         super().__init__()
         self._sub_agent = sub_agent
+        self._pool = pool if pool is not None else AgentPool.from_agent(sub_agent, pool_size)
+    @staticmethod
+    def _intents(word: str) -> list:
+        word = word.lower()
+        if word in ALL_INTENTS: return ["plan", "recommend", "notes"]
+        return [INTENTS[word]] if word in INTENTS else []
+    def parse_intents(self, prompt: str):
+        """The intent named by the first word, any further intents joined to it by '+', ',', '&' or 'and',
+        and the topic after them. Without such a joiner the rest of the prompt is the topic, so
+        'plan learning rate schedules' is one plan on 'learning rate schedules'."""
+        first = re.match(r"\s*([^\s+,&]+)", prompt)
+        if not first: return [], ""
+        intents, rest = self._intents(first.group(1)), prompt[first.end():]
+        while intents:
+            joined = re.match(r"\s*(?:\+|,|&|\band\b)\s*([^\s+,&]+)", rest, re.IGNORECASE)
+            if not joined or not self._intents(joined.group(1)): break
+            intents += self._intents(joined.group(1))
+            rest = rest[joined.end():]
+        return list(dict.fromkeys(intents)), rest.strip()
     def run(self, prompt: str) -> str:
-        print(f"🛠️ Calling Planner Tool with topic: {prompt}")
-        intent, _, topic = prompt.partition(" ")
-        intent = intent.strip().lower()
-        topic = topic.strip()
+        logger.debug("Planner Tool received: %.500s", prompt)
+        intents, topic = self.parse_intents(prompt)
+        if not intents: return ("I didn't understand that.")
         if not topic: return "Please provide a topic along with the instruction."
-        if intent in ["plan", "learning", "learn"]:
-            print("Planning learning for topic:", topic)
+        if len(intents) == 1: return self._branch(intents[0], topic)
+        logger.info("Running %s concurrently for topic: %s", ", ".join(intents), topic)
+        with ThreadPoolExecutor(max_workers=len(intents)) as executor:
+            futures = {intent: executor.submit(in_current_context(self._branch, intent, topic)) for intent in intents}
+        sections = []
+        for intent, future in futures.items():
+            try:
+                sections.append(f"## {BRANCH_TITLES[intent]}\n{future.result()}")
+            except Exception as e:
+                sections.append(f"## {BRANCH_TITLES[intent]}\n⚠️ Failed: {e}")
+        return "\n\n".join(sections)
+    def _branch(self, intent: str, topic: str) -> str:
+        if intent == "plan":
+            logger.debug("Planning learning for topic: %s", topic)
             return self.plan_learning(topic)
-        elif intent in ["recommend", "video", "videos"]:
-            print("Recommending videos for topic:", topic)
+        if intent == "recommend":
+            logger.debug("Recommending videos for topic: %s", topic)
             return self.recommend_videos(topic)
-        elif intent in ["summarize", "notes", "note"]:
-            print("Summarizing and making notes for topic:", topic)
-            return self.summarize_and_note(topic)
-        else: return ("I didn't understand that.")
+        logger.debug("Summarizing and making notes for topic: %s", topic)
+        return self.summarize_and_note(topic)
     def plan_learning(self, topic: str) -> str:
         prompt = f"Break down the topic '{topic}' into a step-by-step learning plan with subtopics."
-        result= self._sub_agent(prompt)
-        print("The result is :", result)
+        result= self._pool.run(prompt)
+        logger.debug("Planner branch result: %.1000s", result)
         return result
     def recommend_videos(self, topic: str) -> str:
         prompt = f"Find top YouTube videos to learn about {topic} effectively."
-        result= self._sub_agent(prompt)
-        print("The result is :", result)
+        result= self._pool.run(prompt)
+        logger.debug("Planner branch result: %.1000s", result)
         return result
     def summarize_and_note(self, topic: str) -> str:
         prompt = f"Search and summarize key points from online resources and make concise notes on {topic}."
-        result= self._sub_agent(prompt)
-        print("The result is :", result)
+        result= self._pool.run(prompt)
+        logger.debug("Planner branch result: %.1000s", result)
         return result
@@ -0,0 +1,81 @@
+import asyncio
+import importlib
+import logging
+import os
+import threading
+from typing import Any, Callable, Iterable, Optional, Union
+from pydantic import PrivateAttr
+from .base import Tool
+from ..tracing import get_tracer
+logger = logging.getLogger(__name__)
+def resolve(target: Union[str, type]) -> type:
+    """A tool class given itself or as "package.module:ClassName"."""
+    if not isinstance(target, str): return target
+    module, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module), attribute)
+class LazyTool(Tool):
+    """A tool declared by name, description and arg, which builds the real tool the first time it runs.
+
+    The agent needs only those three strings for its prompt. The tool's heavy modules and clients (pandas,
+    python-pptx, DuckDuckGo, sentence-transformers, ...) therefore load on the first run() or arun(), or
+    earlier through warm(). LazyTool.of(ToolClass or "module:Class", **kwargs) takes the declaration from
+    the class defaults. For tools whose module should not be imported at all before first use, pass
+    name/description/arg and a factory directly. Any other attribute is looked up on the built tool.
+    """
+    _factory: Callable[[], Tool] = PrivateAttr()
+    _tool: Optional[Tool] = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    def __init__(self, factory: Callable[[], Tool], **data):
+        super().__init__(**data)
+        self._factory = factory
+    @classmethod
+    def of(cls, target: Union[str, type], **kwargs) -> "LazyTool":
+        tool_class = resolve(target)
+        declaration = {key: kwargs.get(key, tool_class.model_fields[key].default) for key in ("name", "description", "arg")}
+        return cls(lambda: tool_class(**kwargs), **declaration)
+    @property
+    def loaded(self) -> bool:
+        return self._tool is not None
+    @property
+    def tool(self) -> Tool:
+        if self._tool is None:
+            with self._lock:
+                if self._tool is None:
+                    with get_tracer().span("tool.load", tool=self.name):
+                        self._tool = self._factory()
+        return self._tool
+    def warm(self) -> "LazyTool":
+        self.tool.warm()
+        return self
+    def run(self, *args, **kwargs) -> Any:
+        return self.tool.run(*args, **kwargs)
+    async def arun(self, *args, **kwargs) -> Any:
+        if self._tool is None: await asyncio.to_thread(lambda: self.tool)
+        return await self.tool.arun(*args, **kwargs)
+    def __getattr__(self, item: str) -> Any:
+        try:
+            return super().__getattr__(item)
+        except AttributeError:
+            if item.startswith("_"): raise
+            return getattr(self.tool, item)
+def warm_tools(tools: Iterable[Tool], mode: str = None) -> Optional[threading.Thread]:
+    """Builds the LazyTools among `tools` ahead of their first run.
+
+    `mode` is "eager" (build now), "background" (build in a daemon thread and return it, so startup is not
+    delayed) or "off". It defaults to AGENTPRO_PREWARM_TOOLS, which defaults to "off".
+    """
+    mode = (mode or os.environ.get("AGENTPRO_PREWARM_TOOLS") or "off").lower()
+    pending = [tool for tool in tools if isinstance(tool, LazyTool) and not tool.loaded]
+    if mode == "off" or not pending: return None
+    def load():
+        for tool in pending:
+            try:
+                tool.warm()
+            except Exception as e:
+                logger.warning("Could not pre-warm %s: %s", tool.name, e)
+    if mode != "background":
+        load()
+        return None
+    thread = threading.Thread(target=load, name="agentpro-tool-warm", daemon=True)
+    thread.start()
+    return thread
@@ -1,23 +1,23 @@
 import json
+import logging
 import re
 import os
-from pptx import Presentation
-from pptx.util import Pt
 from typing import List, Dict, Union
 from .base import Tool
+logger = logging.getLogger(__name__)
 class SlideGenerationTool(Tool):
     name: str = "slide_generation_tool"
     description: str = ("A tool that can create a PPTX deck for content. It takes a list of dictionaries. Each dictionary represents a slide with two keys: 'slide_title' and 'content'.")
     arg: str = "List[Dict[slide_title, content]]. Ensure the Action Input is JSON parseable so I can convert it to required format"
     def __init__(self, client_details: dict = None, **data):
         super().__init__(client_details=client_details, **data)
+    def warm(self) -> None:
+        import pptx
     def run(self, slide_content: Union[str, List[Dict[str, str]]], temp = 0.7, max_tokens= 4000) -> dict:
-        print(f"📥 Slide Generation Tool received input of type: {type(slide_content)} with temp: {temp}, max_tokens: {max_tokens}")
-        print("🛠️ Processing slide content...")
+        logger.debug("Slide Generation Tool received input of type %s", type(slide_content).__name__)
         if isinstance(slide_content, str):
             try:
                 slide_content = json.loads(slide_content)
-                print("✅ Parsed JSON input successfully.")
             except json.JSONDecodeError as e:
                 return {"error": f"❌ Failed to parse input as JSON: {str(e)}", "received_type": str(type(slide_content)), "raw_input": slide_content}
         if not isinstance(slide_content, list) or not all(isinstance(slide, dict) for slide in slide_content):
@@ -25,6 +25,8 @@ class SlideGenerationTool(Tool):
         for i, slide in enumerate(slide_content):
             if "slide_title" not in slide or "content" not in slide:
                 return {"error": f"❌ Slide {i} is missing 'slide_title' or 'content'.", "slide_data": slide}
+        from pptx import Presentation
+        from pptx.util import Pt
         presentation = Presentation()
         for i, slide in enumerate(slide_content):
             slide_layout = presentation.slide_layouts[1]
@@ -46,5 +48,5 @@ class SlideGenerationTool(Tool):
         safe_title = re.sub(r'[^0-9a-zA-Z]+', '_', topic_title)
         output_path = f"{safe_title}.pptx"
         presentation.save(output_path)
-        print("Saved to ", output_path)
+        logger.info("Saved slide deck to %s", output_path)
         return {"message": "✅ Slide deck created successfully!", "file_path": output_path, "slide_count": len(slide_content)}
@@ -0,0 +1,406 @@
+import argparse
+import atexit
+import json
+import logging
+import mmap
+import os
+import threading
+import weakref
+from typing import Any, Dict, List, Optional
+import numpy as np
+import faiss
+logger = logging.getLogger(__name__)
+INDEX_TYPES = {
+    "flat": "Flat",
+    "sq8": "SQ8",
+    "pq": "PQ{m}x{nbits}",
+    "hnsw": "HNSW{hnsw_m}",
+    "hnsw_sq8": "HNSW{hnsw_m}_SQ8",
+    "ivf": "IVF{nlist},Flat",
+    "ivf_sq8": "IVF{nlist},SQ8",
+    "ivf_pq": "IVF{nlist},PQ{m}x{nbits}",
+}
+METRICS = {"ip": faiss.METRIC_INNER_PRODUCT, "l2": faiss.METRIC_L2}
+def index_factory_string(index_type: str, nlist: int = 1024, m: int = 16, nbits: int = 8, hnsw_m: int = 32) -> str:
+    """faiss.index_factory description for one of INDEX_TYPES; anything else is passed through as-is."""
+    return INDEX_TYPES.get(index_type, index_type).format(nlist=nlist, m=m, nbits=nbits, hnsw_m=hnsw_m)
+def min_train_size(factory: str, nlist: int = 1024, nbits: int = 8) -> int:
+    """Vectors to collect before training: faiss wants ~39 points per IVF centroid / PQ code."""
+    if "IVF" in factory: return nlist * 39
+    if "PQ" in factory: return (2 ** nbits) * 39
+    return 1000
+class _Rows:
+    """2-D array that grows by doubling, backed by a memory-mapped file when `path` is set."""
+    def __init__(self, path: Optional[str], dtype, width: int, count: int = 0):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.width = width
+        self.count = count
+        self._data = None
+        capacity = max(1024, count)
+        if path and os.path.exists(path):
+            capacity = max(capacity, os.path.getsize(path) // (self.dtype.itemsize * width))
+        self._resize(capacity)
+    def _resize(self, capacity: int) -> None:
+        if self.path is None:
+            data = np.zeros((capacity, self.width), self.dtype)
+            if self._data is not None: data[:self.count] = self._data[:self.count]
+        else:
+            if self._data is not None: self._data.flush()
+            size = capacity * self.dtype.itemsize * self.width
+            with open(self.path, "ab") as f:
+                if f.tell() < size: f.truncate(size)
+            data = np.memmap(self.path, dtype=self.dtype, mode="r+", shape=(capacity, self.width))
+        self._data = data
+    def append(self, rows: np.ndarray) -> int:
+        """Appends rows and returns the position of the first one."""
+        start = self.count
+        if start + len(rows) > len(self._data):
+            self._resize(max(2 * len(self._data), start + len(rows)))
+        self._data[start:start + len(rows)] = rows
+        self.count += len(rows)
+        return start
+    def view(self) -> np.ndarray:
+        return self._data[:self.count]
+    def flush(self) -> None:
+        if isinstance(self._data, np.memmap): self._data.flush()
+class NoteStore:
+    """Append-only store of note dicts addressed by integer id (the row number).
+
+    Notes are JSON in `notes.dat`, located through an (offset, length) table in `notes.idx`; both files are
+    memory-mapped, so opening a store with millions of notes reads nothing until a note is asked for.
+    Updates append the new version and repoint the row; deletes set its length to -1. The number of live
+    notes is counted once, on first use, and then kept up to date by add and delete. Without `path`,
+    everything is kept in memory.
+    """
+    def __init__(self, path: str = None, count: int = 0):
+        self.path = path
+        if path: os.makedirs(path, exist_ok=True)
+        self._table = _Rows(os.path.join(path, "notes.idx") if path else None, np.int64, 2, count)
+        if path:
+            self._file = open(os.path.join(path, "notes.dat"), "a+b")
+            self._file.seek(0, os.SEEK_END)
+            self._map = None
+        else:
+            self._buffer = bytearray()
+        self._live = None
+    def __len__(self) -> int:
+        if self._live is None: self._live = int((self._table.view()[:, 1] >= 0).sum())
+        return self._live
+    @property
+    def count(self) -> int:
+        """Rows ever allocated, i.e. the next id; deleted rows keep their id."""
+        return self._table.count
+    def _write(self, payloads: List[bytes]) -> List[int]:
+        if self.path is None:
+            offset = len(self._buffer)
+            self._buffer += b"".join(payloads)
+        else:
+            offset = self._file.tell()
+            self._file.write(b"".join(payloads))
+            self._file.flush()
+        offsets = []
+        for payload in payloads:
+            offsets.append(offset)
+            offset += len(payload)
+        return offsets
+    def _read(self, offset: int, length: int) -> bytes:
+        if self.path is None: return bytes(self._buffer[offset:offset + length])
+        if self._map is None or offset + length > len(self._map):
+            if self._map is not None: self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map[offset:offset + length]
+    def add(self, notes: List[dict]) -> List[int]:
+        payloads = [json.dumps(note).encode("utf-8") for note in notes]
+        rows = np.array([[offset, len(payload)] for offset, payload in zip(self._write(payloads), payloads)], dtype=np.int64).reshape(-1, 2)
+        start = self._table.append(rows)
+        if self._live is not None: self._live += len(notes)
+        return list(range(start, start + len(notes)))
+    def append(self, note: dict) -> int:
+        return self.add([note])[0]
+    def update(self, note_id: int, note: dict) -> None:
+        payload = json.dumps(note).encode("utf-8")
+        self._table.view()[note_id] = (self._write([payload])[0], len(payload))
+    def delete(self, note_id: int) -> None:
+        if not self.exists(note_id): return
+        self._table.view()[note_id, 1] = -1
+        if self._live is not None: self._live -= 1
+    def exists(self, note_id: int) -> bool:
+        return 0 <= note_id < self.count and self._table.view()[note_id, 1] >= 0
+    def get(self, note_id: int) -> Optional[dict]:
+        if not self.exists(note_id): return None
+        offset, length = self._table.view()[note_id]
+        return json.loads(self._read(int(offset), int(length)))
+    def __getitem__(self, note_id: int) -> dict:
+        note = self.get(note_id)
+        if note is None: raise KeyError(note_id)
+        return note
+    def live_ids(self) -> np.ndarray:
+        return np.flatnonzero(self._table.view()[:, 1] >= 0)
+    def flush(self) -> None:
+        self._table.flush()
+    def close(self) -> None:
+        if self.path is None: return
+        self.flush()
+        if self._map is not None: self._map.close()
+        self._file.close()
+class FAISSVectorDB:
+    """Note vectors in a FAISS index with stable note ids, persisted next to a memory-mapped NoteStore.
+
+    The index is wrapped in an IndexIDMap2, so the id FAISS returns is the note id and notes can be deleted
+    or updated without renumbering. Every embedding is also kept in a memory-mapped `vectors.f32`, which is
+    what `train` and `rebuild` read: indexes that need training (IVF, PQ, SQ) are searched exactly until
+    `train_size` vectors are collected, then trained automatically. Indexes that cannot remove vectors
+    through the id map (HNSW, IVF) get deleted/updated ids filtered out at search time until the next `rebuild`.
+
+    With `path`, `save()` writes the index and metadata there and an existing store at `path` is reopened.
+    Saves are batched: they happen after every `autosave_every` writes, on `flush()`/`close()` and at
+    interpreter exit, so bulk loads do not rewrite the whole index per note. `FAISSVectorDB(index, note_store)` with a bare FAISS index
+    and a list of notes still works and is migrated in memory.
+    """
+    def __init__(self, index: Any = None, note_store: Any = None, dim: int = None, path: str = None, index_type: str = "flat", metric: str = "ip", nlist: int = 1024, m: int = 16, nbits: int = 8, hnsw_m: int = 32, train_size: int = None, autosave_every: int = 256):
+        self.path = path
+        self.autosave_every = autosave_every
+        self._lock = threading.RLock()
+        self._unsaved = 0
+        meta = self._read_meta(path)
+        if meta:
+            dim, metric, index_type = meta["dim"], meta["metric"], meta["index_type"]
+            nlist, m, nbits, hnsw_m = meta["nlist"], meta["m"], meta["nbits"], meta["hnsw_m"]
+            train_size = meta["train_size"]
+        self.dim = dim or (index.d if index is not None else None)
+        self.metric = metric if index is None else ("ip" if index.metric_type == faiss.METRIC_INNER_PRODUCT else "l2")
+        self.index_type = index_type if index is None or isinstance(index, faiss.IndexIDMap2) else "custom"
+        self.params = {"nlist": nlist, "m": m, "nbits": nbits, "hnsw_m": hnsw_m}
+        self.factory = index_factory_string(index_type, **self.params) if self.index_type != "custom" else None
+        self.train_size = train_size or (min_train_size(self.factory, nlist, nbits) if self.factory else 0)
+        self.note_store = NoteStore(path, meta["count"] if meta else 0)
+        self._vectors = None
+        self._garbage = set(meta["garbage"]) if meta else set()
+        self.index = None
+        if meta:
+            self._open_vectors(meta["count"])
+            self.index = faiss.read_index(os.path.join(path, "index.faiss"))
+            self.set_search_params(meta.get("nprobe"), meta.get("ef_search"))
+        elif index is not None:
+            self._adopt(index, list(note_store or []))
+        if path: atexit.register(_save_at_exit, weakref.ref(self))
+    @staticmethod
+    def _read_meta(path: Optional[str]) -> Optional[dict]:
+        if not path or not os.path.exists(os.path.join(path, "meta.json")): return None
+        with open(os.path.join(path, "meta.json")) as f:
+            return json.load(f)
+    def _open_vectors(self, count: int = 0) -> None:
+        self._vectors = _Rows(os.path.join(self.path, "vectors.f32") if self.path else None, np.float32, self.dim, count)
+    def _new_index(self):
+        if self.factory: inner = faiss.index_factory(self.dim, self.factory, METRICS[self.metric])
+        else:
+            inner = faiss.clone_index(faiss.downcast_index(self.index.index))
+            inner.reset()
+        return faiss.IndexIDMap2(inner)
+    def _adopt(self, index, notes: List[dict]) -> None:
+        """Wraps a plain FAISS index (and its positional note list) into this id-mapped store."""
+        if isinstance(index, faiss.IndexIDMap2):
+            self.index = index
+            self._open_vectors()
+            return
+        vectors = index.reconstruct_n(0, index.ntotal) if index.ntotal else np.zeros((0, self.dim), np.float32)
+        inner = faiss.clone_index(index)
+        inner.reset()
+        self.index = faiss.IndexIDMap2(inner)
+        self._open_vectors()
+        if len(vectors):
+            ids = self.note_store.add(notes[:len(vectors)])
+            self._vectors.append(vectors)
+            self.index.add_with_ids(vectors, np.array(ids, dtype=np.int64))
+    def __len__(self) -> int:
+        return len(self.note_store)
+    @property
+    def trained(self) -> bool:
+        return self.index is not None and self.index.is_trained
+    def _as_matrix(self, embeddings) -> np.ndarray:
+        vectors = np.ascontiguousarray(np.asarray(embeddings, dtype="float32"))
+        return vectors.reshape(-1, vectors.shape[-1])
+    def _ensure_index(self, dim: int) -> None:
+        if self.index is not None: return
+        self.dim = self.dim or dim
+        self._open_vectors()
+        self.index = self._new_index()
+    def add(self, texts: List[str], embeddings, metadatas: List[dict] = None) -> List[int]:
+        """Adds notes with their embeddings; returns the new note ids."""
+        vectors = self._as_matrix(embeddings)
+        if len(vectors) != len(texts): raise ValueError(f"Got {len(texts)} texts but {len(vectors)} embeddings")
+        with self._lock:
+            self._ensure_index(vectors.shape[1])
+            ids = self.note_store.add([{"text": text, **(metadata or {})} for text, metadata in zip(texts, metadatas or [None] * len(texts))])
+            self._vectors.append(vectors)
+            if self.trained: self.index.add_with_ids(vectors, np.array(ids, dtype=np.int64))
+            elif self._vectors.count - len(self._garbage) >= self.train_size: self.train()
+            self._changed()
+        return ids
+    def _remove(self, note_id: int) -> None:
+        if not self.trained: return
+        # IndexIDMap2 renumbers its ids as if the sub-index compacted on removal, which only flat-code
+        # indexes do; IVF lists keep their positions and HNSW cannot remove at all.
+        if isinstance(faiss.downcast_index(self.index.index), faiss.IndexFlatCodes): self.index.remove_ids(np.array([note_id], dtype=np.int64))
+        else: self._garbage.add(note_id)
+    def delete(self, note_ids: List[int]) -> int:
+        """Deletes notes by id; returns how many existed."""
+        deleted = 0
+        with self._lock:
+            for note_id in note_ids:
+                if not self.note_store.exists(note_id): continue
+                self._remove(note_id)
+                self.note_store.delete(note_id)
+                deleted += 1
+            if deleted: self._changed()
+        return deleted
+    def update(self, note_id: int, text: str, embedding, metadata: dict = None) -> None:
+        """Replaces a note's text and vector, keeping its id."""
+        vector = self._as_matrix(embedding)
+        with self._lock:
+            if not self.note_store.exists(note_id): raise KeyError(note_id)
+            self._remove(note_id)
+            self.note_store.update(note_id, {"text": text, **(metadata or {})})
+            self._vectors.view()[note_id] = vector[0]
+            if self.trained: self.index.add_with_ids(vector, np.array([note_id], dtype=np.int64))
+            self._changed()
+    def get(self, note_id: int) -> Optional[dict]:
+        return self.note_store.get(note_id)
+    def _exact_search(self, queries: np.ndarray, k: int):
+        ids = self.note_store.live_ids()
+        scores, positions = faiss.knn(queries, np.ascontiguousarray(self._vectors.view()[ids]), min(k, len(ids)), metric=METRICS[self.metric])
+        return scores, np.where(positions >= 0, ids[np.maximum(positions, 0)], -1)
+    def _hits(self, query: np.ndarray, scores: np.ndarray, ids: np.ndarray, k: int) -> List[dict]:
+        hits, seen = [], set()
+        for score, note_id in zip(scores, ids):
+            note_id = int(note_id)
+            if note_id < 0 or note_id in seen or not self.note_store.exists(note_id): continue
+            seen.add(note_id)
+            if note_id in self._garbage:
+                # A stale copy from an update the index could not remove: score the current vector instead.
+                vector = self._vectors.view()[note_id]
+                score = float(vector @ query) if self.metric == "ip" else float(((vector - query) ** 2).sum())
+            note = self.note_store.get(note_id)
+            hits.append({"id": note_id, "text": note["text"], "score": float(score), **{key: value for key, value in note.items() if key != "text"}})
+        hits.sort(key=lambda hit: hit["score"], reverse=self.metric == "ip")
+        return hits[:k]
+    def similarity_search(self, query_embedding, k: int = 5):
+        """Top-k notes for one query embedding, or a list of top-k lists for a 2-D batch of queries."""
+        queries = np.asarray(query_embedding, dtype="float32")
+        single = queries.ndim == 1
+        queries = self._as_matrix(queries)
+        with self._lock:
+            if self.index is None or len(self.note_store) == 0: return [] if single else [[] for _ in queries]
+            if self.trained: scores, ids = self.index.search(queries, k + len(self._garbage))
+            else: scores, ids = self._exact_search(queries, k)
+            results = [self._hits(query, row_scores, row_ids, k) for query, row_scores, row_ids in zip(queries, scores, ids)]
+        return results[0] if single else results
+    def set_search_params(self, nprobe: int = None, ef_search: int = None) -> None:
+        """Speed/recall knobs: IVF lists probed per query, HNSW candidate list size."""
+        if self.index is None: return
+        inner = faiss.downcast_index(self.index.index)
+        if nprobe and "IVF" in type(inner).__name__: faiss.extract_index_ivf(inner).nprobe = nprobe
+        if ef_search and hasattr(inner, "hnsw"): inner.hnsw.efSearch = ef_search
+    def _search_params(self) -> dict:
+        inner = faiss.downcast_index(self.index.index) if self.index is not None else None
+        params = {}
+        if inner is not None and "IVF" in type(inner).__name__: params["nprobe"] = faiss.extract_index_ivf(inner).nprobe
+        if inner is not None and hasattr(inner, "hnsw"): params["ef_search"] = inner.hnsw.efSearch
+        return params
+    def _live_vectors(self, ids: np.ndarray, batch_size: int = 65536):
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            yield batch, np.ascontiguousarray(self._vectors.view()[batch])
+    def _fill(self, index, sample_size: int = 100000, seed: int = 0) -> None:
+        ids = self.note_store.live_ids()
+        if not index.is_trained:
+            sample = ids if len(ids) <= sample_size else np.sort(np.random.default_rng(seed).choice(ids, sample_size, replace=False))
+            logger.info("Training %s on %d vectors", self.factory or "index", len(sample))
+            index.train(np.ascontiguousarray(self._vectors.view()[sample]))
+        for batch, vectors in self._live_vectors(ids):
+            index.add_with_ids(vectors, batch.astype(np.int64))
+    def train(self, sample_size: int = 100000) -> None:
+        """Trains the index on (a sample of) the stored vectors and adds all live notes to it."""
+        with self._lock:
+            if self.index is None or self.trained: return
+            self._fill(self.index, sample_size)
+            self._garbage.clear()
+            self._changed()
+    def rebuild(self, index_type: str = None, sample_size: int = 100000, **params) -> None:
+        """Builds a fresh index (optionally of another type) from the stored vectors, retraining as needed.
+
+        Also drops vectors of deleted and updated notes that the old index could not remove.
+        """
+        with self._lock:
+            if self.index is None: return
+            search_params = self._search_params()
+            if index_type is not None or params:
+                self.params.update(params)
+                self.index_type = index_type or self.index_type
+                self.factory = index_factory_string(self.index_type, **self.params)
+                self.train_size = min_train_size(self.factory, self.params["nlist"], self.params["nbits"])
+            index = self._new_index()
+            if index.is_trained or len(self.note_store) >= min(self.train_size, sample_size): self._fill(index, sample_size)
+            self.index = index
+            self._garbage.clear()
+            if index_type is None: self.set_search_params(**search_params)
+            self._changed(force=True)
+    def _changed(self, force: bool = False) -> None:
+        self._unsaved += 1
+        if self.path and (force or self._unsaved >= self.autosave_every): self.save()
+    def save(self, path: str = None) -> None:
+        """Writes the index and metadata; notes and vectors are already on disk and only need flushing."""
+        with self._lock:
+            if path and path != self.path: raise ValueError("A store can only be saved to the path it was opened with")
+            if not self.path or self.index is None: return
+            self.note_store.flush()
+            self._vectors.flush()
+            faiss.write_index(self.index, os.path.join(self.path, "index.faiss.tmp"))
+            os.replace(os.path.join(self.path, "index.faiss.tmp"), os.path.join(self.path, "index.faiss"))
+            meta = {"dim": self.dim, "metric": self.metric, "index_type": self.index_type, **self.params, "train_size": self.train_size, "count": self.note_store.count, "garbage": sorted(self._garbage), **self._search_params()}
+            with open(os.path.join(self.path, "meta.json.tmp"), "w") as f:
+                json.dump(meta, f)
+            os.replace(os.path.join(self.path, "meta.json.tmp"), os.path.join(self.path, "meta.json"))
+            self._unsaved = 0
+    def flush(self) -> None:
+        """Saves pending changes now."""
+        if self._unsaved: self.save()
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self.note_store.close()
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "FAISSVectorDB":
+        if not cls._read_meta(path): raise FileNotFoundError(f"No vector store at {path}")
+        return cls(path=path, **kwargs)
+    def info(self) -> dict:
+        with self._lock:
+            return {"path": self.path, "index_type": self.index_type, "factory": self.factory, "dim": self.dim, "metric": self.metric, "notes": len(self.note_store), "ids_allocated": self.note_store.count, "indexed": self.index.ntotal if self.index is not None else 0, "trained": self.trained, "train_size": self.train_size, "stale": len(self._garbage), **self._search_params()}
+def _save_at_exit(ref: "weakref.ref") -> None:
+    db = ref()
+    if db is None: return
+    try:
+        db.flush()
+    except Exception as e:
+        logger.warning("Could not save vector store %s at exit: %s", db.path, e)
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Inspect, train or rebuild a NoteManager vector store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("info", "print store statistics"), ("train", "train the index now on the stored vectors"), ("rebuild", "rebuild the index, optionally as another type")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("path")
+    rebuild = commands.choices["rebuild"]
+    rebuild.add_argument("--index-type", help=f"one of {', '.join(INDEX_TYPES)} or a faiss factory string")
+    for option in ("nlist", "m", "nbits", "hnsw-m", "sample-size"):
+        rebuild.add_argument(f"--{option}", type=int)
+    args = parser.parse_args(argv)
+    db = FAISSVectorDB.load(args.path)
+    if args.command == "train": db.train()
+    elif args.command == "rebuild":
+        params = {key: getattr(args, key) for key in ("nlist", "m", "nbits", "hnsw_m") if getattr(args, key) is not None}
+        db.rebuild(args.index_type, **({"sample_size": args.sample_size} if args.sample_size else {}), **params)
+    db.save()
+    print(json.dumps(db.info()))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional
+class TranscriptStore:
+    """Persistent SQLite store of YouTube transcripts (by video_id) and summaries (by video_id and model).
+
+    Values are zlib-compressed JSON. When the stored bytes exceed `max_bytes`, the least recently read
+    entries are evicted first, transcripts and summaries alike.
+    """
+    def __init__(self, path: str = None, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path or os.path.join(os.path.expanduser("~"), ".cache", "agentpro", "youtube.sqlite")
+        self.max_bytes = max_bytes
+        self.stats = {"transcript_hits": 0, "transcript_misses": 0, "summary_hits": 0, "summary_misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS transcripts (video_id TEXT PRIMARY KEY, data BLOB, size INTEGER, accessed REAL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS summaries (video_id TEXT, model TEXT, data BLOB, size INTEGER, accessed REAL, PRIMARY KEY (video_id, model))")
+        self._db.commit()
+    def _get(self, table: str, where: str, args: tuple, stat: str):
+        with self._lock:
+            row = self._db.execute(f"SELECT data FROM {table} WHERE {where}", args).fetchone()
+            if row is None:
+                self.stats[f"{stat}_misses"] += 1
+                return None
+            self._db.execute(f"UPDATE {table} SET accessed = ? WHERE {where}", (time.time(), *args))
+            self._db.commit()
+            self.stats[f"{stat}_hits"] += 1
+        return json.loads(zlib.decompress(row[0]))
+    def _put(self, table: str, keys: tuple, value) -> None:
+        data = zlib.compress(json.dumps(value).encode("utf-8"))
+        placeholders = ", ".join("?" * (len(keys) + 3))
+        with self._lock:
+            self._db.execute(f"INSERT OR REPLACE INTO {table} VALUES ({placeholders})", (*keys, data, len(data), time.time()))
+            self._evict()
+            self._db.commit()
+    def get_segments(self, video_id: str) -> Optional[List[dict]]:
+        return self._get("transcripts", "video_id = ?", (video_id,), "transcript")
+    def put_segments(self, video_id: str, segments: List[dict]) -> None:
+        self._put("transcripts", (video_id,), segments)
+    def get_summary(self, video_id: str, model: str) -> Optional[str]:
+        return self._get("summaries", "video_id = ? AND model = ?", (video_id, model), "summary")
+    def put_summary(self, video_id: str, model: str, summary: str) -> None:
+        self._put("summaries", (video_id, model), summary)
+    def size(self) -> int:
+        with self._lock:
+            return self._total()
+    def _total(self) -> int:
+        return sum(self._db.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0] for table in ("transcripts", "summaries"))
+    def _evict(self) -> None:
+        total = self._total()
+        if total <= self.max_bytes: return
+        rows = self._db.execute("SELECT 'transcripts', video_id, NULL, size, accessed FROM transcripts UNION ALL SELECT 'summaries', video_id, model, size, accessed FROM summaries ORDER BY accessed ASC").fetchall()
+        for table, video_id, model, size, _ in rows:
+            if table == "transcripts":
+                self._db.execute("DELETE FROM transcripts WHERE video_id = ?", (video_id,))
+            else:
+                self._db.execute("DELETE FROM summaries WHERE video_id = ? AND model = ?", (video_id, model))
+            self.stats["evictions"] += 1
+            total -= size
+            if total <= self.max_bytes: break
+    def warm(self, video_ids: Iterable[str], fetch: Callable[[str], Optional[List[dict]]], summarize: Callable[[str, List[dict]], Optional[str]] = None, model: str = None, workers: int = 4) -> dict:
+        """Pre-fetches transcripts (and, with `summarize`, `model` summaries) for video_ids not stored yet."""
+        report = {"fetched": 0, "summarized": 0, "cached": 0, "failed": 0}
+        counting = threading.Lock()
+        def count(key):
+            with counting: report[key] += 1
+        def warm_one(video_id):
+            segments = self.get_segments(video_id)
+            if segments is None:
+                segments = fetch(video_id)
+                if not segments:
+                    count("failed")
+                    return
+                self.put_segments(video_id, segments)
+                count("fetched")
+            else:
+                count("cached")
+            if summarize and self.get_summary(video_id, model) is None:
+                summary = summarize(video_id, segments)
+                if summary:
+                    self.put_summary(video_id, model, summary)
+                    count("summarized")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(warm_one, dict.fromkeys(video_ids)))
+        return report
+_default_store = None
+_default_lock = threading.Lock()
+def get_default_store() -> Optional[TranscriptStore]:
+    """Shared store at AGENTPRO_YOUTUBE_STORE (default ~/.cache/agentpro/youtube.sqlite); "off" disables it."""
+    global _default_store
+    setting = os.environ.get("AGENTPRO_YOUTUBE_STORE")
+    if setting and setting.lower() in ("off", "0", "false", "none"): return None
+    if _default_store is None:
+        with _default_lock:
+            if _default_store is None:
+                _default_store = TranscriptStore(setting or None, int(os.environ.get("AGENTPRO_YOUTUBE_STORE_BYTES", 512 * 1024 * 1024)))
+    return _default_store
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage the YouTube transcript/summary store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    warm = commands.add_parser("warm", help="pre-fetch transcripts (and optionally summaries) for video IDs")
+    warm.add_argument("video_ids", nargs="*", help="YouTube video IDs")
+    warm.add_argument("--file", help="file with one video ID per line")
+    warm.add_argument("--summarize", action="store_true", help="also store summaries (needs LLM credentials, see README)")
+    warm.add_argument("--model", default=os.environ.get("YT_MODEL_NAME", "gpt-4o-mini"))
+    warm.add_argument("--workers", type=int, default=4)
+    commands.add_parser("stats", help="print the store size")
+    args = parser.parse_args(argv)
+    store = get_default_store()
+    if store is None: parser.error("the transcript store is disabled (AGENTPRO_YOUTUBE_STORE is off)")
+    if args.command == "stats":
+        print(json.dumps({"path": store.path, "bytes": store.size()}))
+        return
+    from .youtube_tool import YouTubeSearchTool, fetch_transcript_segments
+    video_ids = list(args.video_ids)
+    if args.file:
+        with open(args.file) as f:
+            video_ids += [line.strip() for line in f if line.strip()]
+    summarize = None
+    if args.summarize:
+        import dotenv
+        dotenv.load_dotenv()
+        client_details = {"api_key": os.getenv("OPENROUTER_API_KEY"), "api_base": "https://openrouter.ai/api/v1"} if os.getenv("OPENROUTER_API_KEY") else None
+        tool = YouTubeSearchTool(client_details=client_details, model_name=args.model, store=store)
+        summarize = lambda video_id, segments: tool._summarize_segments(segments)
+    print(json.dumps(store.warm(video_ids, fetch_transcript_segments, summarize, args.model, args.workers)))
+if __name__ == "__main__":
+    main()
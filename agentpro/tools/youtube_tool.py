@@ -1,16 +1,54 @@
-from youtube_transcript_api import YouTubeTranscriptApi
-from duckduckgo_search import DDGS
 from urllib.parse import urlparse, parse_qs
 from .base import LLMTool
+from .youtube_store import get_default_store
+from ..history import context_window, count_tokens
+from ..llm import chat_completion, achat_completion
+from ..scheduler import PRIORITY_BACKGROUND
+from ..tracing import in_current_context
 from typing import Any
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import asyncio
+import logging
+import threading
+import time
+logger = logging.getLogger(__name__)
+MAP_PROMPT = "Summarize the key points of this part of a video transcript. Keep names, numbers and the timestamp range."
+MAX_REDUCE_ROUNDS = 4
+REDUCE_PROMPT = "Combine these summaries of consecutive parts of one video into a single concise summary of the whole video."
+def fetch_transcript_segments(video_id):
+    """Timestamped transcript segments ({"text", "start", "duration"}) straight from YouTube, or None."""
+    try:
+        from youtube_transcript_api import YouTubeTranscriptApi
+        transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
+        return [{"text": entry["text"], "start": entry.get("start", 0.0), "duration": entry.get("duration", 0.0)} if isinstance(entry, dict) else {"text": entry.text, "start": entry.start, "duration": entry.duration} for entry in transcript_list]
+    except Exception as e:
+        logger.warning("Error getting transcript for %s: %s", video_id, e)
+        return None
 class YouTubeSearchTool(LLMTool):
     name: str = "YouTube Search Tool"
     description: str = "A tool capable of searching the internet for youtube videos and returns the text transcript of the videos"
     arg: str = "A single string parameter that will be searched on the internet to find relevant content"
     ddgs: Any = None
+    max_workers: int = 3
+    video_timeout: float = 60.0
+    deadline: float = 90.0
+    chunk_tokens: int = None
+    summary_workers: int = 4
+    store: Any = None
     def __init__(self, client_details: dict = None, model_name:str ='gpt-4o-mini' ,**data):
-        super().__init__(client_details=client_details, **data)
-        if self.ddgs is None: self.ddgs = DDGS()
+        super().__init__(client_details=client_details, model_name=model_name, **data)
+    def get_ddgs(self):
+        if self.ddgs is None:
+            from duckduckgo_search import DDGS
+            self.ddgs = DDGS()
+        return self.ddgs
+    def get_store(self):
+        """The transcript store, opened on first use; None when the store is disabled."""
+        if self.store is None: self.store = get_default_store()
+        return self.store
+    def warm(self) -> None:
+        import youtube_transcript_api
+        self.get_ddgs()
     def extract_video_id(self, url): 
         """Extract video ID from YouTube URL."""
         parsed_url = urlparse(url)
@@ -22,7 +60,7 @@ class YouTubeSearchTool(LLMTool):
     def search_videos(self, query, max_results=5): 
         """Search YouTube videos using DuckDuckGo."""
         try:
-            results = self.ddgs.videos(keywords=query, region="wt-wt", safesearch="off", timelimit="w", resolution="high", duration="medium", max_results=max_results*2)
+            results = self.get_ddgs().videos(keywords=query, region="wt-wt", safesearch="off", timelimit="w", resolution="high", duration="medium", max_results=max_results*2)
             results = sorted(results, key=lambda x: (-(x['statistics']['viewCount'] if x['statistics']['viewCount'] is not None else float('-inf'))))[:max_results]
             videos = []
             for result in results:
@@ -34,32 +72,200 @@ class YouTubeSearchTool(LLMTool):
             if not videos: return "No YouTube videos found in the search results."
             return videos[:max_results]
         except Exception as e: return f"Error searching videos: {str(e)}"
+    def get_transcript_segments(self, video_id):
+        """Timestamped transcript segments for a YouTube video, from the transcript store when available."""
+        store = self.get_store()
+        segments = store.get_segments(video_id) if store else None
+        if segments is None:
+            segments = fetch_transcript_segments(video_id)
+            if segments and store: store.put_segments(video_id, segments)
+        return segments
     def get_transcript(self, video_id): 
         """Get transcript for a YouTube video."""
+        segments = self.get_transcript_segments(video_id)
+        return ' '.join([entry['text'] for entry in segments]) if segments else None
+    def summary_chunk_tokens(self) -> int:
+        """Transcript tokens per summarization request: `chunk_tokens` if set, otherwise a third of the model's context."""
+        return self.chunk_tokens or max(1000, min(context_window(self.model) // 3, 24000))
+    def chunk_segments(self, segments: list, max_tokens: int = None) -> list:
+        """Splits segments at segment boundaries into chunks of at most `max_tokens` tokens, labelled with their time range."""
+        max_tokens = max_tokens or self.summary_chunk_tokens()
+        chunks, current, size = [], [], 0
+        for segment in segments:
+            tokens = count_tokens(segment["text"], self.model)
+            if current and size + tokens > max_tokens:
+                chunks.append(current)
+                current, size = [], 0
+            current.append(segment)
+            size += tokens
+        if current: chunks.append(current)
+        stamp = lambda seconds: f"{int(seconds) // 60:02d}:{int(seconds) % 60:02d}"
+        return [f"[{stamp(chunk[0]['start'])}-{stamp(chunk[-1]['start'] + chunk[-1]['duration'])}] " + ' '.join(segment['text'] for segment in chunk) for chunk in chunks]
+    def partial_summary_tokens(self) -> int:
+        """max_tokens of each map and intermediate reduce summary, so any two of them fit one reduce request."""
+        return max(100, min(800, self.summary_chunk_tokens() // 2))
+    def _summary_messages(self, prompt: str, text: str) -> list:
+        return [{"role": "system", "content": "You are an tool deisgned for creating high-quality content from video transcripts."}, {"role": "user", "content": f"{prompt}\n\n{text}"}]
+    def _summarize(self, prompt: str, text: str, max_tokens: int = 2000):
         try:
-            transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-            return ' '.join([entry['text'] for entry in transcript_list])
-        except Exception as e:
-            print(f"Error getting transcript: {str(e)}")
-            return None
-    def summarize_content(self, transcript):
-        prompt = "Create a concise summary of the following video transcript"
+            response = chat_completion(self.client, model=self.model, messages=self._summary_messages(prompt, text), max_tokens=max_tokens, priority=PRIORITY_BACKGROUND)
+            return response.choices[0].message.content.strip()
+        except Exception as e: return None
+    async def _asummarize(self, prompt: str, text: str, max_tokens: int = 2000):
         try:
-            response = self.client.chat.completions.create(model=self.model, messages=[{"role": "system", "content": "You are an tool deisgned for creating high-quality content from video transcripts."}, {"role": "user", "content": f"{prompt}\n\nTranscript:\n{transcript}"}], max_tokens=2000)
+            response = await achat_completion(self.aclient, model=self.model, messages=self._summary_messages(prompt, text), max_tokens=max_tokens, priority=PRIORITY_BACKGROUND)
             return response.choices[0].message.content.strip()
         except Exception as e: return None
+    def _stored_summary(self, video_id):
+        store = self.get_store() if video_id else None
+        return store.get_summary(video_id, self.model) if store else None
+    def _store_summary(self, video_id, summary):
+        store = self.get_store() if video_id and summary else None
+        if store: store.put_summary(video_id, self.model, summary)
+        return summary
+    def summarize_content(self, transcript, video_id=None):
+        stored = self._stored_summary(video_id)
+        if stored is not None: return stored
+        return self._store_summary(video_id, self._summarize("Create a concise summary of the following video transcript", f"Transcript:\n{transcript}"))
+    async def asummarize_content(self, transcript, video_id=None):
+        stored = self._stored_summary(video_id)
+        if stored is not None: return stored
+        return self._store_summary(video_id, await self._asummarize("Create a concise summary of the following video transcript", f"Transcript:\n{transcript}"))
+    def _reduce_groups(self, summaries: list) -> list:
+        """Packs partial summaries into groups that fit one reduce request. Every group holds at least two
+        summaries, even past the budget, so each round at least halves their number."""
+        budget, groups, current, size = self.summary_chunk_tokens(), [], [], 0
+        for summary in summaries:
+            tokens = count_tokens(summary, self.model)
+            if len(current) >= 2 and size + tokens > budget:
+                groups.append(current)
+                current, size = [], 0
+            current.append(summary)
+            size += tokens
+        if len(current) == 1 and groups: groups[-1] += current
+        elif current: groups.append(current)
+        return ["\n\n".join(group) for group in groups]
+    def summarize_segments(self, segments: list, video_id=None, cancelled: threading.Event = None):
+        """Summary of a transcript. Long transcripts are map-reduced: chunks are summarized in parallel on
+        `summary_workers` threads, then the partial summaries are merged level by level until one is left
+        (after MAX_REDUCE_ROUNDS levels, whatever remains goes into one last request).
+        With a video_id, the summary is read from and saved to the transcript store. Once `cancelled` is set,
+        no further LLM requests are made and None is returned."""
+        stored = self._stored_summary(video_id)
+        if stored is not None: return stored
+        return self._store_summary(video_id, self._summarize_segments(segments, cancelled))
+    def _summarize_segments(self, segments: list, cancelled: threading.Event = None):
+        chunks = self.chunk_segments(segments)
+        if len(chunks) == 1: return self.summarize_content(' '.join(segment['text'] for segment in segments))
+        partial = self.partial_summary_tokens()
+        stopped = lambda: cancelled is not None and cancelled.is_set()
+        with ThreadPoolExecutor(max_workers=self.summary_workers, thread_name_prefix="youtube-summary") as executor:
+            summaries = [summary for summary in executor.map(lambda chunk: None if stopped() else self._summarize(MAP_PROMPT, chunk, partial), chunks) if summary]
+            for _ in range(MAX_REDUCE_ROUNDS):
+                if stopped(): return None
+                if len(summaries) <= 1: break
+                groups = self._reduce_groups(summaries)
+                if len(groups) == 1: return self._summarize(REDUCE_PROMPT, groups[0])
+                summaries = [summary for summary in executor.map(lambda group: self._summarize(REDUCE_PROMPT, group, partial), groups) if summary]
+            else:
+                if len(summaries) > 1: return self._summarize(REDUCE_PROMPT, "\n\n".join(summaries))
+        return summaries[0] if summaries else None
+    async def asummarize_segments(self, segments: list, video_id=None):
+        stored = self._stored_summary(video_id)
+        if stored is not None: return stored
+        return self._store_summary(video_id, await self._asummarize_segments(segments))
+    async def _asummarize_segments(self, segments: list):
+        chunks = self.chunk_segments(segments)
+        if len(chunks) == 1: return await self.asummarize_content(' '.join(segment['text'] for segment in segments))
+        limit = asyncio.Semaphore(self.summary_workers)
+        partial = self.partial_summary_tokens()
+        async def summarize(prompt, text):
+            async with limit: return await self._asummarize(prompt, text, partial)
+        summaries = [summary for summary in await asyncio.gather(*(summarize(MAP_PROMPT, chunk) for chunk in chunks)) if summary]
+        for _ in range(MAX_REDUCE_ROUNDS):
+            if len(summaries) <= 1: break
+            groups = self._reduce_groups(summaries)
+            if len(groups) == 1: return await self._asummarize(REDUCE_PROMPT, groups[0])
+            summaries = [summary for summary in await asyncio.gather(*(summarize(REDUCE_PROMPT, group) for group in groups)) if summary]
+        else:
+            if len(summaries) > 1: return await self._asummarize(REDUCE_PROMPT, "\n\n".join(summaries))
+        return summaries[0] if summaries else None
+    def process_video(self, video: dict, cancelled: threading.Event = None):
+        """Transcript plus summary for one video, or None if either step fails or `cancelled` gets set."""
+        segments = self.get_transcript_segments(video['video_id'])
+        if not segments or (cancelled is not None and cancelled.is_set()): return None
+        content = self.summarize_segments(segments, video['video_id'], cancelled)
+        if not content: return None
+        return {"video": video, "content": content.replace("\n\n", "\n").replace("\n\n\n", "\n")}
+    def process_videos(self, videos: list) -> list:
+        """Runs process_video for all videos on up to `max_workers` threads and returns the results in rank order.
+        A video is dropped once it has run for `video_timeout` seconds, and any still running when `deadline`
+        seconds have passed are dropped too, so the tool waits for the slowest useful video and no longer.
+        Dropped videos are flagged, so their workers stop before their next transcript or LLM request."""
+        started, cancelled = {}, [threading.Event() for _ in videos]
+        def timed(index, video):
+            started[index] = time.monotonic()
+            return self.process_video(video, cancelled[index])
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(videos))), thread_name_prefix="youtube")
+        futures = {executor.submit(in_current_context(timed, index, video)): index for index, video in enumerate(videos)}
+        results, pending = {}, set(futures)
+        end = time.monotonic() + self.deadline
+        try:
+            while pending:
+                now = time.monotonic()
+                if now >= end:
+                    logger.warning("Dropping %d video(s) still running after %ss", len(pending), self.deadline)
+                    for future in pending: cancelled[futures[future]].set()
+                    break
+                for future in [f for f in pending if futures[f] in started and now - started[futures[f]] > self.video_timeout]:
+                    logger.warning("Dropping video %s after %ss", videos[futures[future]]["video_id"], self.video_timeout)
+                    cancelled[futures[future]].set()
+                    pending.discard(future)
+                done, pending = wait(pending, timeout=min(0.25, end - now), return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        results[futures[future]] = future.result()
+                    except Exception as e:
+                        logger.warning("Error processing video: %s", e)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return [results[index] for index in sorted(results) if results[index]]
     def run(self, prompt: str, temp = 0.0, max_tokens= 4000) -> str:
-        print(f"Calling YouTube Search Tool with prompt: {prompt}")
+        logger.debug("YouTube search: %.500s", prompt)
         try:
             videos = self.search_videos(prompt, 3)
             if isinstance(videos, str): return f"Search error: {videos}"
             if not videos: return "No videos found matching the query."
-            results = []
-            for video in videos:
-                transcript = self.get_transcript(video['video_id'])
-                if not transcript: continue
-                content = self.summarize_content(transcript)
-                results.append({"video": video, "content": content.replace("\n\n", "\n").replace("\n\n\n", "\n")})
+            results = self.process_videos(videos)
+            if not results: return "Could not process any videos. Try a different search query."
+            results = list(map(lambda x: f"Video Title: {x['video']['title']}\nContent: {x['content']}", results))
+            return "\n\n\n".join(results)
+        except Exception as e: return f"Error executing task: {str(e)}"
+    async def arun(self, prompt: str, temp = 0.0, max_tokens= 4000) -> str:
+        logger.debug("YouTube search (async): %.500s", prompt)
+        try:
+            videos = await asyncio.to_thread(self.search_videos, prompt, 3)
+            if isinstance(videos, str): return f"Search error: {videos}"
+            if not videos: return "No videos found matching the query."
+            limit = asyncio.Semaphore(self.max_workers)
+            async def process_video(video):
+                segments = await asyncio.to_thread(self.get_transcript_segments, video['video_id'])
+                if not segments: return None
+                content = await self.asummarize_segments(segments, video['video_id'])
+                if not content: return None
+                return {"video": video, "content": content.replace("\n\n", "\n").replace("\n\n\n", "\n")}
+            async def process(video):
+                # Like the threaded path, a video's timeout only starts once it has a worker slot.
+                async with limit:
+                    try:
+                        return await asyncio.wait_for(process_video(video), self.video_timeout)
+                    except asyncio.TimeoutError:
+                        logger.warning("Dropping video %s after %ss", video["video_id"], self.video_timeout)
+                        return None
+            tasks = [asyncio.ensure_future(process(video)) for video in videos]
+            done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+            for task in pending: task.cancel()
+            results = [task.result() for task in tasks if task in done and not task.cancelled() and task.exception() is None and task.result()]
             if not results: return "Could not process any videos. Try a different search query."
             results = list(map(lambda x: f"Video Title: {x['video']['title']}\nContent: {x['content']}", results))
             return "\n\n\n".join(results)
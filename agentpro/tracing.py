@@ -0,0 +1,230 @@
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+LABEL_ATTRIBUTES = ("model", "tool")
+_current = contextvars.ContextVar("agentpro_span", default=None)
+class _NoopSpan:
+    """Returned by a disabled Tracer: every method is a no-op, so instrumented code pays one attribute lookup."""
+    name = None
+    attributes = {}
+    def set(self, **attributes) -> "_NoopSpan":
+        return self
+    def add(self, key: str, amount: float = 1) -> "_NoopSpan":
+        return self
+    def __enter__(self) -> "_NoopSpan":
+        return self
+    def __exit__(self, *exc) -> bool:
+        return False
+NOOP_SPAN = _NoopSpan()
+class Span:
+    """One timed operation (agent run, step, LLM call, tool call). Entering makes it the parent of spans
+    opened in the same context, including threads and tasks that copy the context."""
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "attributes", "start", "seconds", "_started", "_token")
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.start = time.time()
+        self.seconds = None
+        self._started = time.perf_counter()
+        self._token = None
+    def set(self, **attributes) -> "Span":
+        self.attributes.update(attributes)
+        return self
+    def add(self, key: str, amount: float = 1) -> "Span":
+        """Accumulates a numeric attribute, e.g. queue_seconds over retries or tokens over several calls."""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+        return self
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        return self
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.seconds = time.perf_counter() - self._started
+        if exc_type is not None and exc_type is not GeneratorExit: self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            # A generator resumed from another thread (e.g. a streamed response) finishes outside the context it entered.
+            pass
+        self.tracer._finish(self)
+        return False
+    def to_dict(self) -> dict:
+        return {"trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id, "name": self.name, "start": self.start, "seconds": self.seconds, "attributes": self.attributes}
+class Metrics:
+    """Aggregates finished spans into Prometheus counters and duration histograms.
+
+    Every span feeds agentpro_span_seconds{span, model|tool}; spans carrying prompt_tokens, completion_tokens,
+    queue_seconds, cache_hit or error also feed the matching counters.
+    """
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+    def _count(self, name: str, labels: tuple, amount: float) -> None:
+        key = (name, labels)
+        self._counters[key] = self._counters.get(key, 0) + amount
+    def observe(self, span: Span) -> None:
+        attributes = span.attributes
+        labels = (("span", span.name),) + tuple((key, str(attributes[key])) for key in LABEL_ATTRIBUTES if key in attributes)
+        with self._lock:
+            histogram = self._histograms.get(labels)
+            if histogram is None:
+                histogram = self._histograms[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if span.seconds <= bound: histogram[0][i] += 1
+            histogram[1] += span.seconds
+            histogram[2] += 1
+            if "error" in attributes: self._count("agentpro_errors_total", labels, 1)
+            if attributes.get("cache_hit"): self._count("agentpro_llm_cache_hits_total", labels, 1)
+            for key in ("prompt_tokens", "completion_tokens"):
+                if attributes.get(key): self._count(f"agentpro_llm_{key}_total", labels, attributes[key])
+            if attributes.get("queue_seconds"): self._count("agentpro_queue_seconds_total", labels, attributes["queue_seconds"])
+    def snapshot(self) -> dict:
+        """Span counts and total seconds per label set, plus every counter, as plain JSON-able data."""
+        with self._lock:
+            spans = [{**dict(labels), "count": count, "seconds": total} for labels, (_, total, count) in self._histograms.items()]
+            counters = [{"name": name, **dict(labels), "value": value} for (name, labels), value in self._counters.items()]
+        return {"spans": spans, "counters": counters}
+    def render_prometheus(self, gauges: Dict[str, float] = None, counters: Dict[str, float] = None) -> str:
+        """Prometheus text exposition format. `gauges` and `counters` add unlabelled values kept elsewhere,
+        such as queue depth or request totals."""
+        def render_labels(labels, extra: str = "") -> str:
+            parts = [f"{key}={json.dumps(str(value))}" for key, value in labels]
+            if extra: parts.append(extra)
+            return "{" + ",".join(parts) + "}" if parts else ""
+        lines = []
+        with self._lock:
+            if self._histograms:
+                lines.append("# HELP agentpro_span_seconds Wall time of agent runs, steps, LLM calls and tool calls.")
+                lines.append("# TYPE agentpro_span_seconds histogram")
+            for labels, (counts, total, count) in sorted(self._histograms.items()):
+                for bound, bucket in zip(self.buckets, counts):
+                    lines.append(f"agentpro_span_seconds_bucket{render_labels(labels, 'le=' + json.dumps(str(bound)))} {bucket}")
+                lines.append(f"agentpro_span_seconds_bucket{render_labels(labels, 'le=' + json.dumps('+Inf'))} {count}")
+                lines.append(f"agentpro_span_seconds_sum{render_labels(labels)} {total}")
+                lines.append(f"agentpro_span_seconds_count{render_labels(labels)} {count}")
+            typed = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{render_labels(labels)} {value}")
+        for kind, values in (("counter", counters), ("gauge", gauges)):
+            for name, value in sorted((values or {}).items()):
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+class JsonlExporter:
+    """Appends each finished span as one JSON line; children are written before their parents."""
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+class Tracer:
+    """Creates spans and hands finished ones to the exporters and the metrics aggregator.
+
+    With neither a JSONL path nor metrics enabled the tracer is disabled and `span()` returns NOOP_SPAN,
+    so instrumentation costs next to nothing.
+    """
+    def __init__(self, path: str = None, metrics: bool = False):
+        self.exporters: List[Callable[[Span], None]] = []
+        self.metrics = Metrics() if metrics else None
+        if path: self.exporters.append(JsonlExporter(path).export)
+        self.enabled = bool(self.exporters or self.metrics)
+    def add_exporter(self, exporter: Callable[[Span], None]) -> None:
+        """Registers a callable receiving every finished span (e.g. to forward spans to another system)."""
+        self.exporters.append(exporter)
+        self.enabled = True
+    def span(self, name: str, **attributes) -> Any:
+        if not self.enabled: return NOOP_SPAN
+        return Span(self, name, _current.get(), attributes)
+    def _finish(self, span: Span) -> None:
+        if self.metrics is not None: self.metrics.observe(span)
+        for exporter in self.exporters:
+            try:
+                exporter(span)
+            except Exception:
+                logging.getLogger(__name__).exception("Span exporter failed")
+    def render_prometheus(self, gauges: Dict[str, float] = None, counters: Dict[str, float] = None) -> str:
+        return (self.metrics or Metrics()).render_prometheus(gauges, counters)
+def current_span() -> Any:
+    """The innermost open span in this context, or NOOP_SPAN, so callers can always .set()/.add() on it."""
+    span = _current.get()
+    return NOOP_SPAN if span is None else span
+def in_current_context(fn: Callable, *args, **kwargs) -> Callable[[], Any]:
+    """Wraps fn(*args, **kwargs) to run in a copy of the caller's context, so work handed to a thread pool
+    nests under the caller's span."""
+    return functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+def _flag(value: str) -> bool:
+    return value.strip().lower() not in ("", "0", "off", "false", "no")
+_tracer = None
+_tracer_lock = threading.Lock()
+def get_tracer() -> Tracer:
+    """The process-wide tracer. AGENTPRO_TRACE=<path> writes spans to a JSONL file and AGENTPRO_METRICS=1
+    aggregates them for the Prometheus endpoint; with neither set tracing is off."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer(os.environ.get("AGENTPRO_TRACE") or None, _flag(os.environ.get("AGENTPRO_METRICS", "")))
+    return _tracer
+def set_tracer(tracer: Tracer) -> None:
+    global _tracer
+    _tracer = tracer
+def configure(path: str = None, metrics: bool = True) -> Tracer:
+    """Replaces the process-wide tracer, e.g. configure(metrics=True) in a server that exposes /metrics."""
+    tracer = Tracer(path, metrics)
+    set_tracer(tracer)
+    return tracer
+def traced_tool(method: Callable) -> Callable:
+    """Wraps a Tool's run/arun in a "tool.call" span. Calls that reach a parent class's run through super()
+    stay inside the outer span; returned "Error ..." strings are recorded as errors like raised exceptions."""
+    def start(self):
+        tracer = get_tracer()
+        if not tracer.enabled: return None
+        parent = _current.get()
+        if parent is not None and parent.name == "tool.call" and parent.attributes.get("tool") == self.name: return None
+        return tracer.span("tool.call", tool=self.name)
+    def finish(span, result):
+        if isinstance(result, str):
+            span.set(result_chars=len(result))
+            if result.startswith("Error"): span.set(error=result[:200])
+        return result
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            span = start(self)
+            if span is None: return await method(self, *args, **kwargs)
+            with span:
+                return finish(span, await method(self, *args, **kwargs))
+        return async_wrapper
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        span = start(self)
+        if span is None: return method(self, *args, **kwargs)
+        with span:
+            return finish(span, method(self, *args, **kwargs))
+    return wrapper
+def configure_logging(default_level: str = "INFO") -> None:
+    """Logging setup for the command-line entry points; AGENTPRO_LOG_LEVEL (e.g. DEBUG for full responses
+    and tool results) overrides `default_level`."""
+    logging.basicConfig(level=os.environ.get("AGENTPRO_LOG_LEVEL", default_level).upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
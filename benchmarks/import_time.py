@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Each case runs in a fresh interpreter and prints the seconds spent on its statement.
+CASES = {
+    "import_agentpro": "import agentpro",
+    "import_tools": "import agentpro.tools",
+    "build_agent": "from agentpro.serving import build_agent\nagent = build_agent()",
+    "build_agent_eager": "from agentpro.serving import build_agent\nfrom agentpro.tools import warm_tools\nagent = build_agent()\nwarm_tools(agent.tools.values(), 'eager')",
+}
+TIMED = "import time\n_start = time.perf_counter()\n{code}\nprint(time.perf_counter() - _start)"
+NOISE_FLOOR_SECONDS = 0.05  # interpreter start-up jitter; smaller slowdowns are never reported
+HEAVY_MODULES = ("openai", "pandas", "pyarrow", "pptx", "duckduckgo_search", "youtube_transcript_api", "faiss", "sentence_transformers")
+def _env() -> dict:
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "bench"), TRAVERSAAL_ARES_API_KEY=os.environ.get("TRAVERSAAL_ARES_API_KEY", "bench"), AGENTPRO_YOUTUBE_STORE="off", AGENTPRO_PREWARM_TOOLS="off")
+    env.pop("OPENROUTER_API_KEY", None)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+def time_case(code: str, repeats: int) -> dict:
+    """Median and spread of `code`'s wall time over `repeats` fresh interpreters, plus which heavy modules it loaded."""
+    seconds = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", TIMED.format(code=code)], env=_env(), cwd=ROOT, capture_output=True, text=True, check=True)
+        seconds.append(float(out.stdout.strip().splitlines()[-1]))
+    probe = f"{code}\nimport sys\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    loaded = subprocess.run([sys.executable, "-c", probe], env=_env(), cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1]
+    return {"seconds_p50": statistics.median(seconds), "seconds_min": min(seconds), "seconds_max": max(seconds), "heavy_modules": [m for m in loaded.split(",") if m]}
+def slowest_imports(code: str, top: int) -> List[tuple]:
+    """The `top` modules with the largest cumulative import time (python -X importtime) while running `code`."""
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=_env(), cwd=ROOT, capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line: continue
+        _, cumulative, name = line.split("|")
+        rows.append((name.strip(), int(cumulative) / 1e6))
+    return sorted(rows, key=lambda row: -row[1])[:top]
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    lines = []
+    for name, result in results.items():
+        base = baseline.get(name, {}).get("seconds_p50")
+        if not base: continue
+        change = result["seconds_p50"] / base - 1
+        flag = "  REGRESSION" if change > tolerance and result["seconds_p50"] - base > NOISE_FLOOR_SECONDS else ""
+        lines.append(f"{name:>18} {base * 1000:9.1f} ms -> {result['seconds_p50'] * 1000:9.1f} ms ({change:+.0%}){flag}")
+    return lines
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure AgentPro cold-start time: imports and agent construction in fresh interpreters.")
+    parser.add_argument("--cases", nargs="*", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10, help="list this many of the slowest imports of `import agentpro`")
+    parser.add_argument("--baseline", default="import_time", help="baseline name under benchmarks/baselines")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="relative slowdown reported as a regression")
+    parser.add_argument("--output", help="write the full results JSON here")
+    args = parser.parse_args(argv)
+    results = {}
+    for name in args.cases:
+        results[name] = result = time_case(CASES[name], args.repeats)
+        print(f"{name:>18}: p50 {result['seconds_p50'] * 1000:8.1f} ms  (min {result['seconds_min'] * 1000:.1f}, max {result['seconds_max'] * 1000:.1f})  heavy modules: {', '.join(result['heavy_modules']) or '-'}")
+    if args.top:
+        print("\nSlowest imports under `import agentpro` (cumulative):")
+        for name, seconds in slowest_imports(CASES["import_agentpro"], args.top):
+            print(f"  {seconds * 1000:8.1f} ms  {name}")
+    report = {"python": platform.python_version(), "platform": platform.platform(), "repeats": args.repeats, "results": results}
+    baseline_path = os.path.join(BASELINE_DIR, f"{args.baseline}.json")
+    regressions = 0
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with baseline '{args.baseline}':")
+        lines = compare(results, baseline["results"], args.tolerance)
+        regressions = sum("REGRESSION" in line for line in lines)
+        print("\n".join(lines))
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {baseline_path}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if regressions else 0)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+class MockAresServer:
+    """Answers POST /live/predict like the Traversaal Ares API after `latency` seconds."""
+    def __init__(self, latency: float = 0.3, response_words: int = 300, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.response_text = " ".join(f"fact{i % 50}" for i in range(response_words))
+        self.stats = {"requests": 0, "busy_seconds": 0.0}
+        self.intervals = []
+        self._lock = threading.Lock()
+        server = self
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            def log_message(self, *args):
+                pass
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with server._lock:
+                    server.stats["requests"] += 1
+                    server.stats["busy_seconds"] += server.latency
+                started = time.perf_counter()
+                time.sleep(server.latency)
+                with server._lock: server.intervals.append((started, time.perf_counter()))
+                body = json.dumps({"data": {"response_text": server.response_text}}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/live/predict"
+    def start(self) -> "MockAresServer":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+class StubDDGS:
+    """DuckDuckGo search stand-in returning `count` YouTube results for any query after `latency` seconds."""
+    def __init__(self, latency: float = 0.2, count: int = 10):
+        self.latency = latency
+        self.count = count
+        self.stats = {"requests": 0, "busy_seconds": 0.0}
+        self.intervals = []
+    def videos(self, keywords: str, max_results: int = 10, **kwargs) -> List[dict]:
+        self.stats["requests"] += 1
+        self.stats["busy_seconds"] += self.latency
+        started = time.perf_counter()
+        time.sleep(self.latency)
+        self.intervals.append((started, time.perf_counter()))
+        return [{"title": f"{keywords} explained, part {i}", "content": f"https://www.youtube.com/watch?v=bench{i:07d}", "description": "", "statistics": {"viewCount": 1000 * (self.count - i)}} for i in range(min(self.count, max_results))]
+class StubTranscripts:
+    """Replacement for youtube_tool.fetch_transcript_segments: `segments` segments of fixed text per video."""
+    def __init__(self, latency: float = 0.2, segments: int = 400):
+        self.latency = latency
+        self.segments = segments
+        self.stats = {"requests": 0, "busy_seconds": 0.0}
+        self.intervals = []
+        self._lock = threading.Lock()
+    def __call__(self, video_id: str) -> List[dict]:
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["busy_seconds"] += self.latency
+        started = time.perf_counter()
+        time.sleep(self.latency)
+        with self._lock: self.intervals.append((started, time.perf_counter()))
+        return [{"text": f"In this part of {video_id} we cover point {i} in detail.", "start": 5.0 * i, "duration": 5.0} for i in range(self.segments)]
@@ -0,0 +1,142 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+os.environ.setdefault("AGENTPRO_YOUTUBE_STORE", "off")
+from agentpro import clients
+from agentpro.mock_llm import MockLLMServer, ScriptedReplies
+from agentpro.tools import youtube_tool
+from benchmarks.mocks import MockAresServer, StubDDGS, StubTranscripts
+from benchmarks.scenarios import SCENARIOS, SMALL_MODEL, make_csv, reply_fallback, scripts
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+COMPARED = ("seconds_p50", "overhead_ms_per_step", "prompt_tokens", "peak_traced_mb")
+# Smallest absolute change (in each metric's unit) counted as a regression: on a busy or single-core machine
+# a few milliseconds of scheduling jitter is a large relative change for the per-step overhead.
+NOISE_FLOOR = {"seconds_p50": 0.02, "overhead_ms_per_step": 10.0, "prompt_tokens": 0, "peak_traced_mb": 0.5}
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+def provider_seconds(env: dict, start: float, end: float) -> float:
+    """Wall time within [start, end] during which at least one mock service was busy answering."""
+    intervals = sorted((max(a, start), min(b, end)) for service in ("llm", "ares", "ddgs", "transcripts") for a, b in env[service].intervals if b > start and a < end)
+    busy, covered = 0.0, start
+    for a, b in intervals:
+        if b > covered:
+            busy += b - max(a, covered)
+            covered = b
+    return busy
+def run_scenario(scenario, env: dict, repeats: int) -> dict:
+    """Runs a scenario `repeats` times plus once more under tracemalloc for its memory peak."""
+    runs = []
+    for run in range(repeats + 1):
+        with contextlib.redirect_stdout(io.StringIO()):
+            agent = scenario.build(env)
+        traced = run == repeats
+        llm_calls = env["llm"].stats["requests"]
+        if traced: tracemalloc.start()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            answer = agent(scenario.prompt(run))
+        end = time.perf_counter()
+        seconds = end - start
+        if traced:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            break
+        steps = max(1, len(agent.token_usage))
+        overhead = seconds - provider_seconds(env, start, end)
+        models = {}
+        for step in agent.token_usage: models[step["model"]] = models.get(step["model"], 0) + 1
+        runs.append({"seconds": seconds, "steps": steps, "models": models, "llm_calls": env["llm"].stats["requests"] - llm_calls, "overhead_ms_per_step": 1000 * overhead / steps, "prompt_tokens": sum(step.get("prompt_tokens", 0) for step in agent.token_usage), "completion_tokens": sum(step.get("completion_tokens", 0) for step in agent.token_usage), "ok": "Benchmark answer" in answer})
+    seconds = [run["seconds"] for run in runs]
+    return {
+        "repeats": repeats,
+        "seconds_p50": statistics.median(seconds),
+        "seconds_p95": _percentile(seconds, 0.95),
+        "overhead_ms_per_step": statistics.median(run["overhead_ms_per_step"] for run in runs),
+        "steps": runs[0]["steps"],
+        "llm_calls": runs[0]["llm_calls"],
+        "agent_calls_by_model": runs[0]["models"],
+        "prompt_tokens": runs[0]["prompt_tokens"],
+        "completion_tokens": runs[0]["completion_tokens"],
+        "peak_traced_mb": peak / 1024 ** 2,
+        "all_ok": all(run["ok"] for run in runs),
+    }
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Lines describing each compared metric against the baseline; a regression is a relative change above
+    `tolerance` that is also larger than the metric's NOISE_FLOOR."""
+    lines = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base: continue
+        for metric in COMPARED:
+            if not base.get(metric): continue
+            change = result[metric] / base[metric] - 1
+            flag = "  REGRESSION" if change > tolerance and result[metric] - base[metric] > NOISE_FLOOR[metric] else ""
+            lines.append(f"{name:>14} {metric:<22} {base[metric]:>10.3f} -> {result[metric]:>10.3f} ({change:+.0%}){flag}")
+    return lines
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark AgentPro offline against a mock LLM and mock tool services.")
+    parser.add_argument("--scenarios", nargs="*", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="mock LLM seconds per request")
+    parser.add_argument("--small-llm-latency", type=float, default=0.02, help="mock LLM seconds per request for the cascade scenario's small model")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="mock LLM completion speed (0 = instant)")
+    parser.add_argument("--tool-latency", type=float, default=0.05, help="seconds per mock Ares/YouTube call")
+    parser.add_argument("--csv-rows", type=int, default=500_000)
+    parser.add_argument("--baseline", default="default", help="baseline name under benchmarks/baselines")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="relative slowdown reported as a regression")
+    parser.add_argument("--output", help="write the full results JSON here")
+    args = parser.parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="agentpro-bench-")
+    csv_path = make_csv(os.path.join(workdir, "bench_data.csv"), args.csv_rows)
+    env = {
+        "llm": MockLLMServer(latency=args.llm_latency, per_token_latency=1.0 / args.tokens_per_second if args.tokens_per_second else 0.0, reply=ScriptedReplies(scripts(csv_path), reply_fallback), record_intervals=True, model_latency={SMALL_MODEL: args.small_llm_latency}).start(),
+        "ares": MockAresServer(latency=args.tool_latency).start(),
+        "ddgs": StubDDGS(latency=args.tool_latency),
+        "transcripts": StubTranscripts(latency=args.tool_latency),
+        "csv": csv_path,
+    }
+    clients.set_base_url_override(env["llm"].url)
+    youtube_tool.fetch_transcript_segments = env["transcripts"]
+    results = {}
+    for name in args.scenarios:
+        results[name] = run_scenario(SCENARIOS[name], env, args.repeats)
+        result = results[name]
+        print(f"{name:>14}: p50 {result['seconds_p50'] * 1000:8.1f} ms  overhead/step {result['overhead_ms_per_step']:7.1f} ms  steps {result['steps']}  llm calls {result['llm_calls']}  prompt tokens {result['prompt_tokens']}  peak {result['peak_traced_mb']:.1f} MB{'' if result['all_ok'] else '  (unexpected answer!)'}")
+    report = {"python": platform.python_version(), "platform": platform.platform(), "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, "settings": {key: value for key, value in vars(args).items() if key not in ("output", "save_baseline")}, "results": results}
+    baseline_path = os.path.join(BASELINE_DIR, f"{args.baseline}.json")
+    regressions = 0
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline.get("settings", {}).get("llm_latency") != args.llm_latency: print("⚠️ Baseline was recorded with different mock latencies; comparisons are only indicative.")
+        print(f"\nCompared with baseline '{args.baseline}':")
+        lines = compare(results, baseline["results"], args.tolerance)
+        regressions = sum("REGRESSION" in line for line in lines)
+        print("\n".join(lines))
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {baseline_path}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    env["llm"].stop()
+    env["ares"].stop()
+    shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(1 if regressions else 0)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import os
+import numpy as np
+import pandas as pd
+from agentpro import AgentPro, ModelRouter
+from agentpro.mock_llm import final_answer
+from agentpro.tools import AresInternetTool, DataScienceTool, YouTubeSearchTool
+from agentpro.tools.data_cache import DataFrameCache
+CLIENT = {"api_key": "bench"}
+SMALL_MODEL = "bench-small"
+def action(tool: str, tool_input: str) -> str:
+    return f"Thought: I should use {tool}.\nAction: {tool}\nAction Input: {tool_input}"
+FINAL = "Thought: I now know the final answer\nFinal Answer: Benchmark answer."
+def tool_call(tool: str, tool_input: str) -> dict:
+    return {"name": tool, "arguments": {"input": tool_input}}
+def scripts(csv_path: str) -> dict:
+    """ReAct and native tool-calling transcripts the mock LLM replays, keyed by the tag in each scenario's question."""
+    return {
+        "[bench:single_tool]": [action("ares_internet_search_tool", "latest transformer research"), FINAL],
+        "[bench:multi_tool]": [action("ares_internet_search_tool", "latest transformer research"), action("youtube_search_tool", "transformers explained"), FINAL],
+        "[bench:long_history]": [action("ares_internet_search_tool", "follow-up question"), FINAL],
+        "[bench:large_csv]": [action("data_science_tool", f"Compute the mean value per category in {csv_path}"), FINAL],
+        "[bench:multi_tool_cascade]": [action("ares_internet_search_tool", "latest transformer research"), action("youtube_search_tool", "transformers explained"), FINAL],
+        "[bench:multi_tool_native]": [{"tool_calls": [tool_call("ares_internet_search_tool", "latest transformer research"), tool_call("youtube_search_tool", "transformers explained")]}, {"content": "Benchmark answer."}],
+    }
+DATA_CODE = "```python\nresult = df_bench_data.groupby('category')['value'].mean()\nprint(result)\n```"
+def reply_fallback(messages) -> str:
+    """Tool-side LLM calls: code for DataScienceTool, a short summary for everything else."""
+    if any("Write pandas code" in str(m.get("content", "")) for m in messages): return DATA_CODE
+    return final_answer(messages)
+def make_csv(path: str, rows: int) -> str:
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        rng = np.random.default_rng(0)
+        pd.DataFrame({"id": np.arange(rows), "category": rng.choice(list("ABCDEFGH"), rows), "value": rng.normal(size=rows), "label": rng.choice(["red", "green", "blue"], rows)}).to_csv(path, index=False)
+    return path
+class Scenario:
+    """One benchmark case: the tools an agent gets, its question, any history it starts with and extra AgentPro options."""
+    def __init__(self, name: str, tools, history_turns: int = 0, options: dict = None):
+        self.name = name
+        self.tools = tools
+        self.history_turns = history_turns
+        self.options = options or {}
+    def build(self, env: dict) -> AgentPro:
+        agent = AgentPro(tools=[factory(env) for factory in self.tools], client_details=CLIENT, **self.options)
+        for turn in range(self.history_turns):
+            agent.messages.append({"role": "user", "content": f"Earlier question {turn}: explain topic {turn} in depth."})
+            agent.messages.append({"role": "assistant", "content": action("ares_internet_search_tool", f"topic {turn}")})
+            agent.messages.append({"role": "assistant", "content": f"Observation from ares_internet_search_tool: {env['ares'].response_text}"})
+            agent.messages.append({"role": "assistant", "content": f"Final Answer: Topic {turn} summary. " * 20})
+        return agent
+    def prompt(self, run: int) -> str:
+        return f"[bench:{self.name}] run {run}: answer using the tools."
+def ares(env):
+    return AresInternetTool(url=env["ares"].url, x_api_key="bench")
+def youtube(env):
+    return YouTubeSearchTool(client_details=CLIENT, model_name="mock", ddgs=env["ddgs"], max_workers=3)
+def data_science(env):
+    return DataScienceTool(client_details=CLIENT, model_name="mock", frame_cache=DataFrameCache())
+SCENARIOS = {
+    "single_tool": Scenario("single_tool", [ares]),
+    "multi_tool": Scenario("multi_tool", [ares, youtube]),
+    "long_history": Scenario("long_history", [ares], history_turns=40),
+    "large_csv": Scenario("large_csv", [data_science]),
+    "multi_tool_cascade": Scenario("multi_tool_cascade", [ares, youtube], options={"router": ModelRouter(SMALL_MODEL, step_max_tokens=512)}),
+    "multi_tool_native": Scenario("multi_tool_native", [ares, youtube], options={"tool_calling": "native", "parallel_tool_calls": True}),
+}
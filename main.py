@@ -1,10 +1,11 @@
-from agentpro import AgentPro
-from agentpro.tools import (AresInternetTool, CodeEngine, YouTubeSearchTool,SlideGenerationTool, DataScienceTool)
+from agentpro import AgentPro, ModelRouter
+from agentpro.tools import (AresInternetTool, CodeEngine, YouTubeSearchTool,SlideGenerationTool, DataScienceTool, LazyTool, warm_tools)
+from agentpro.tracing import configure_logging
 import os
 import dotenv
-import numpy as np
 def main():
     dotenv.load_dotenv()
+    configure_logging()
     use_openrouter = os.getenv("OPENROUTER_API_KEY") is not None
     if use_openrouter:
         print('Using OpenRouter API')
@@ -21,16 +22,17 @@ def main():
         CODE_MODEL="gpt-4o-mini"
         YT_MODEL="gpt-4o-mini"
         SLIDE_MODEL="gpt-4o-mini"
-    code_tool = CodeEngine(client_details=client_details, model_name=CODE_MODEL)
-    youtube_tool = YouTubeSearchTool(client_details=client_details, model_name=YT_MODEL)
-    slide_tool = SlideGenerationTool(client_details=client_details, model_name=SLIDE_MODEL)
-    data_science_tool = DataScienceTool(client_details=client_details, model_name=DATA_MODEL)
+    code_tool = LazyTool.of(CodeEngine, client_details=client_details, model_name=CODE_MODEL)
+    youtube_tool = LazyTool.of(YouTubeSearchTool, client_details=client_details, model_name=YT_MODEL)
+    slide_tool = LazyTool.of(SlideGenerationTool, client_details=client_details, model_name=SLIDE_MODEL)
+    data_science_tool = LazyTool.of(DataScienceTool, client_details=client_details, model_name=DATA_MODEL)
     common_tools = [code_tool, youtube_tool, slide_tool, data_science_tool]
     tools = common_tools.copy()
     if os.environ.get("TRAVERSAAL_ARES_API_KEY"):
-        ares_tool = AresInternetTool(client_details=client_details)
+        ares_tool = LazyTool.of(AresInternetTool, client_details=client_details)
         tools.append(ares_tool)
-    agent = AgentPro(tools=tools, client_details=client_details if use_openrouter else None, temperature=0.4, max_tokens=4000)
+    agent = AgentPro(tools=tools, client_details=client_details if use_openrouter else None, temperature=0.4, max_tokens=4000, tool_calling=os.getenv("AGENTPRO_TOOL_CALLING", "react"), router=ModelRouter.from_env())
+    warm_tools(tools)
     print("AgentPro is initialized and ready. Enter 'quit' to exit.")
     print("Available tools:")
     for tool in tools: print(f"- {tool.name}: {tool.description}")
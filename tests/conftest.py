@@ -0,0 +1,17 @@
+import pytest
+from agentpro.cache import set_default_cache
+from agentpro.clients import set_base_url_override
+from agentpro.mock_llm import MockLLMServer, ScriptedReplies
+@pytest.fixture
+def mock_llm_server():
+    """A mock LLM every client points at; questions without a script get a final answer echoing them."""
+    set_default_cache(None)
+    server = MockLLMServer(latency=0.0, reply=ScriptedReplies({})).start()
+    set_base_url_override(server.url)
+    yield server
+    set_base_url_override(None)
+    server.stop()
+@pytest.fixture
+def mock_llm(mock_llm_server):
+    """The mock LLM's scripts, keyed by a tag in the question; tests add their own."""
+    return mock_llm_server.reply.scripts
@@ -0,0 +1,78 @@
+import json
+import threading
+import pytest
+from agentpro.batch import BatchRunner, completed_ids
+class EchoAgent:
+    """Stand-in agent: answers with the prompt in upper case, and fails on prompts containing "fail"."""
+    def __init__(self):
+        self.token_usage = []
+        self.calls = []
+    def __call__(self, prompt: str) -> str:
+        self.calls.append(prompt)
+        if "fail" in prompt: raise RuntimeError("boom")
+        return prompt.upper()
+    def clear_history(self) -> None:
+        pass
+def write_lines(path, lines):
+    path.write_bytes("".join(lines).encode("utf-8"))
+def rows(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+def test_completed_ids_missing_file(tmp_path):
+    assert completed_ids(str(tmp_path / "out.jsonl")) == set()
+def test_blank_lines_do_not_hide_later_rows(tmp_path):
+    output = tmp_path / "out.jsonl"
+    write_lines(output, ['{"id": "1", "response": "a"}\n', "\n", "   \n", '{"id": "2", "response": "b"}\n'])
+    assert completed_ids(str(output)) == {"1", "2"}
+    assert len(rows(output)) == 2
+def test_unterminated_last_line_is_cut_off(tmp_path):
+    output = tmp_path / "out.jsonl"
+    write_lines(output, ['{"id": "1", "response": "a"}\n', '{"id": "2", "resp'])
+    assert completed_ids(str(output)) == {"1"}
+    assert output.read_text(encoding="utf-8") == '{"id": "1", "response": "a"}\n'
+def test_complete_last_row_gets_its_newline(tmp_path):
+    output = tmp_path / "out.jsonl"
+    write_lines(output, ['{"id": "1", "response": "a"}\n', '{"id": "2", "response": "b"}'])
+    assert completed_ids(str(output)) == {"1", "2"}
+    assert output.read_text(encoding="utf-8").endswith('"b"}\n')
+def test_corrupt_middle_line_raises_and_keeps_the_file(tmp_path):
+    output = tmp_path / "out.jsonl"
+    content = '{"id": "1", "response": "a"}\nnot json\n{"id": "3", "response": "c"}\n'
+    write_lines(output, [content])
+    with pytest.raises(ValueError, match=":2 "):
+        completed_ids(str(output))
+    assert output.read_text(encoding="utf-8") == content
+def test_retry_errors_drops_error_rows(tmp_path):
+    output = tmp_path / "out.jsonl"
+    write_lines(output, ['{"id": "1", "response": "a"}\n', '{"id": "2", "error": "boom"}\n'])
+    assert completed_ids(str(output)) == {"1", "2"}
+    assert completed_ids(str(output), retry_errors=True) == {"1"}
+    assert [row["id"] for row in rows(output)] == ["1"]
+def test_runner_resumes_without_repeating_prompts(tmp_path):
+    prompts, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_lines(prompts, [json.dumps({"id": str(i), "prompt": f"prompt {i}"}) + "\n" for i in range(6)])
+    write_lines(output, ['{"id": "0", "response": "PROMPT 0"}\n', "\n", '{"id": "1", "response": "PROMPT 1"}\n', '{"id": "2", "res'])
+    agent = EchoAgent()
+    report = BatchRunner(lambda: agent, concurrency=1).run(str(prompts), str(output))
+    assert report["skipped"] == 2 and report["completed"] == 4
+    assert sorted(agent.calls) == [f"prompt {i}" for i in range(2, 6)]
+    assert sorted(row["id"] for row in rows(output)) == [str(i) for i in range(6)]
+def test_runner_retries_failed_prompts_once(tmp_path):
+    prompts, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_lines(prompts, ['{"id": "ok", "prompt": "fine"}\n', '{"id": "bad", "prompt": "fail"}\n'])
+    BatchRunner(EchoAgent, concurrency=1).run(str(prompts), str(output))
+    assert {row["id"]: "error" in row for row in rows(output)} == {"ok": False, "bad": True}
+    report = BatchRunner(EchoAgent, concurrency=1, retry_errors=True).run(str(prompts), str(output))
+    assert report["skipped"] == 1 and report["errors"] == 1
+    assert sorted(row["id"] for row in rows(output)) == ["bad", "ok"]
+def test_rows_that_cannot_be_written_do_not_stall_the_runner(tmp_path):
+    prompts, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_lines(prompts, [json.dumps({"id": str(i), "prompt": f"prompt {i}"}) + "\n" for i in range(8)])
+    class Unserializable(EchoAgent):
+        def __call__(self, prompt: str):
+            return object() if prompt != "prompt 7" else super().__call__(prompt)
+    reports = []
+    runner = threading.Thread(target=lambda: reports.append(BatchRunner(Unserializable, concurrency=1).run(str(prompts), str(output))), daemon=True)
+    runner.start()
+    runner.join(10)
+    assert not runner.is_alive() and reports
+    assert [row["id"] for row in rows(output)] == ["7"]
@@ -0,0 +1,14 @@
+from benchmarks import import_time, run
+BASE = {"single_tool": {"seconds_p50": 0.16, "overhead_ms_per_step": 6.0, "prompt_tokens": 1331, "peak_traced_mb": 0.1}}
+def flagged(lines) -> list:
+    return [line.split()[1] for line in lines if "REGRESSION" in line]
+def test_jitter_below_the_noise_floor_is_not_a_regression():
+    result = {"single_tool": {"seconds_p50": 0.17, "overhead_ms_per_step": 10.0, "prompt_tokens": 1331, "peak_traced_mb": 0.3}}
+    assert flagged(run.compare(result, BASE, 0.5)) == []
+def test_real_slowdowns_are_regressions():
+    result = {"single_tool": {"seconds_p50": 0.4, "overhead_ms_per_step": 30.0, "prompt_tokens": 2700, "peak_traced_mb": 0.1}}
+    assert flagged(run.compare(result, BASE, 0.5)) == ["seconds_p50", "overhead_ms_per_step", "prompt_tokens"]
+def test_import_time_noise_floor():
+    base = {"import_agentpro": {"seconds_p50": 0.05}}
+    assert "REGRESSION" not in import_time.compare({"import_agentpro": {"seconds_p50": 0.09}}, base, 0.5)[0]
+    assert "REGRESSION" in import_time.compare({"import_agentpro": {"seconds_p50": 0.2}}, base, 0.5)[0]
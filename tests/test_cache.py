@@ -0,0 +1,52 @@
+import asyncio
+import time
+from agentpro.cache import CompletionCache
+from agentpro.clients import get_async_openai_client, get_openai_client
+from agentpro.llm import achat_completion, chat_completion
+def test_keys_depend_on_every_request_parameter():
+    request = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.0}
+    assert CompletionCache.make_key(**request) == CompletionCache.make_key(**dict(reversed(list(request.items()))))
+    assert CompletionCache.make_key(**request) != CompletionCache.make_key(**request, max_tokens=10)
+    assert CompletionCache.make_key(**request) != CompletionCache.make_key(**{**request, "model": "n"})
+def test_memory_tier_is_bounded_by_bytes():
+    cache = CompletionCache(max_bytes=10)
+    cache.set("a", "12345")
+    cache.set("b", "12345")
+    cache.get("a")
+    cache.set("c", "12345")
+    assert cache.get("b") is None and cache.get("a") == "12345" and cache.get("c") == "12345"
+    cache.set("huge", "x" * 11)
+    assert cache.get("huge") is None and cache.info()["memory_bytes"] == 10
+def test_expired_entries_are_misses(monkeypatch, tmp_path):
+    cache = CompletionCache(ttl=60, path=str(tmp_path / "c.sqlite"))
+    cache.set("k", "v")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get("k") is None and cache.stats["misses"] == 1 and cache.info()["disk_bytes"] == 0
+def test_sqlite_tier_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    CompletionCache(path=path).set("k", "v")
+    cache = CompletionCache(path=path)
+    assert cache.get("k") == "v" and cache.get("k") == "v"
+    assert cache.stats["disk_hits"] == 1 and cache.stats["memory_hits"] == 1
+def test_disk_tier_is_bounded_by_bytes(tmp_path):
+    cache = CompletionCache(path=str(tmp_path / "c.sqlite"), disk_max_bytes=8)
+    for key in "abc": cache.set(key, "1234")
+    assert cache.info()["disk_bytes"] == 8 and cache.stats["evictions"] == 1
+def test_identical_calls_reach_the_model_once(mock_llm_server):
+    cache, client = CompletionCache(), get_openai_client("test")
+    request = {"model": "m", "messages": [{"role": "user", "content": "cache me"}]}
+    first = chat_completion(client, cache=cache, **request)
+    second = chat_completion(client, cache=cache, **request)
+    assert second.choices[0].message.content == first.choices[0].message.content
+    assert mock_llm_server.stats["requests"] == 1 and cache.stats["hits"] == 1
+    async def again():
+        return await achat_completion(get_async_openai_client("test"), cache=cache, **request)
+    assert asyncio.run(again()).choices[0].message.content == first.choices[0].message.content
+    chat_completion(client, cache=cache, **request, temperature=0.5)
+    assert mock_llm_server.stats["requests"] == 2
+def test_streamed_calls_are_not_cached(mock_llm_server):
+    cache, client = CompletionCache(), get_openai_client("test")
+    for _ in range(2):
+        list(chat_completion(client, cache=cache, model="m", messages=[{"role": "user", "content": "stream"}], stream=True))
+    assert mock_llm_server.stats["requests"] == 2 and cache.info()["memory_entries"] == 0
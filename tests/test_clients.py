@@ -0,0 +1,44 @@
+import asyncio
+import pytest
+from openai import AsyncOpenAI
+from agentpro import AgentPro, clients
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    clients.reset()
+    yield
+    clients.reset()
+def test_sync_clients_are_shared_per_key():
+    client = clients.get_openai_client("key", "https://example.test/v1")
+    assert clients.get_openai_client("key", "https://example.test/v1") is client
+    assert clients.get_openai_client("other", "https://example.test/v1") is not client
+    assert clients.get_http_session() is clients.get_http_session()
+def test_base_url_override():
+    clients.set_base_url_override("http://127.0.0.1:1/v1")
+    try:
+        assert str(clients.get_openai_client("key", "https://example.test/v1").base_url) == "http://127.0.0.1:1/v1/"
+    finally:
+        clients.set_base_url_override(None)
+def test_configure_rejects_unknown_settings():
+    with pytest.raises(ValueError):
+        clients.configure(max_conections=1)
+def test_reset_closes_sync_clients():
+    client = clients.get_openai_client("key")
+    clients.reset()
+    assert client._client.is_closed and clients.get_openai_client("key") is not client
+def test_async_clients_belong_to_their_event_loop():
+    outside = clients.get_async_openai_client("key")
+    async def lookup():
+        return clients.get_async_openai_client("key"), clients.get_async_openai_client("key"), clients.for_running_loop(outside), clients.get_async_http_client()
+    first, second = asyncio.run(lookup()), asyncio.run(lookup())
+    assert first[0] is first[1] is first[2] and first[0] is not outside
+    assert second[0] is not first[0] and second[3] is not first[3]
+    assert clients.get_async_openai_client("key") is outside
+def test_foreign_async_clients_are_left_alone():
+    own = AsyncOpenAI(api_key="key")
+    async def lookup():
+        return clients.for_running_loop(own)
+    assert asyncio.run(lookup()) is own
+def test_agent_runs_across_event_loops(mock_llm):
+    agent = AgentPro(tools=[], client_details={"api_key": "test"})
+    assert asyncio.run(agent.arun("one")) == "Mock answer to: one"
+    assert asyncio.run(agent.arun("two")) == "Mock answer to: two"
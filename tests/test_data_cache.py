@@ -0,0 +1,66 @@
+import os
+import threading
+import pandas as pd
+import pytest
+from agentpro.tools.data_cache import DataFrameCache
+def write_csv(path, rows: int, columns: str = "x,y") -> str:
+    names = columns.split(",")
+    with open(path, "w") as f:
+        f.write(columns + "\n" + "".join(",".join(str(i * (j + 1)) for j in range(len(names))) + "\n" for i in range(rows)))
+    os.utime(path, ns=(os.stat(path).st_mtime_ns + rows, os.stat(path).st_mtime_ns + rows))
+    return str(path)
+def test_loads_are_cached_until_the_file_changes(tmp_path):
+    cache, path = DataFrameCache(), write_csv(tmp_path / "a.csv", 3)
+    assert len(cache.load(path)) == 3 and len(cache.load(path)) == 3
+    assert cache.info()["misses"] == 1 and cache.info()["hits"] == 1
+    write_csv(tmp_path / "a.csv", 5)
+    assert len(cache.load(path)) == 5 and cache.info()["entries"] == 1
+def test_callers_cannot_corrupt_the_cached_frame(tmp_path):
+    cache, path = DataFrameCache(), write_csv(tmp_path / "a.csv", 3)
+    df = cache.load(path)
+    df["x"] = -1
+    df.drop(columns=["y"], inplace=True)
+    assert list(cache.load(path)["x"]) == [0, 1, 2]
+def test_schema_text_is_cached_and_dropped_with_old_versions(tmp_path):
+    cache, path = DataFrameCache(), write_csv(tmp_path / "a.csv", 3)
+    _, schema = cache.load_with_schema(path)
+    assert "Columns and Types" in schema and cache.load_with_schema(path)[1] is schema
+    cache.sample_schema(path, sample_rows=2)
+    assert len(cache._schemas) == 2
+    write_csv(tmp_path / "a.csv", 4, "x,y,z")
+    _, schema = cache.load_with_schema(path)
+    assert "z" in schema and len(cache._schemas) == 1
+def test_sample_schemas_of_replaced_files_are_dropped(tmp_path):
+    cache, path = DataFrameCache(), write_csv(tmp_path / "big.csv", 50)
+    first = cache.sample_schema(path, sample_rows=10)
+    assert "first 10 rows" in first and cache.sample_schema(path, sample_rows=10) is first
+    write_csv(tmp_path / "big.csv", 60, "x,y,z")
+    assert "z" in cache.sample_schema(path, sample_rows=10)
+    assert len(cache._schemas) == 1
+def test_eviction_by_size_drops_frames_and_their_schemas(tmp_path):
+    a, b = write_csv(tmp_path / "a.csv", 1000), write_csv(tmp_path / "b.csv", 1000)
+    size = int(pd.read_csv(a).memory_usage(deep=True).sum())
+    cache = DataFrameCache(max_bytes=int(size * 1.5))
+    cache.load_with_schema(a)
+    cache.sample_schema(a)
+    cache.load_with_schema(b)
+    assert cache.info()["entries"] == 1 and cache.info()["evictions"] == 1
+    assert {k[0][0] for k in cache._schemas} == {os.path.abspath(b)}
+def test_frames_larger_than_the_cache_are_not_kept(tmp_path):
+    cache, path = DataFrameCache(max_bytes=10), write_csv(tmp_path / "a.csv", 100)
+    assert len(cache.load(path)) == 100 and cache.info()["entries"] == 0
+def test_concurrent_first_loads_parse_once(tmp_path, monkeypatch):
+    cache, path = DataFrameCache(), write_csv(tmp_path / "a.csv", 100)
+    parses = []
+    read_csv = pd.read_csv
+    monkeypatch.setattr(pd, "read_csv", lambda *args, **kwargs: parses.append(1) or read_csv(*args, **kwargs))
+    threads = [threading.Thread(target=cache.load, args=(path,)) for _ in range(8)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert len(parses) == 1 and cache.info()["hits"] == 7
+def test_parquet_sidecars_skip_parsing_in_a_new_cache(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = write_csv(tmp_path / "a.csv", 10)
+    DataFrameCache(parquet_sidecars=True, sidecar_dir=str(tmp_path / "frames")).load(path)
+    fresh = DataFrameCache(parquet_sidecars=True, sidecar_dir=str(tmp_path / "frames"))
+    assert len(fresh.load(path)) == 10 and fresh.info()["sidecar_hits"] == 1
@@ -0,0 +1,32 @@
+import pytest
+pytest.importorskip("pyarrow")
+from agentpro.tools.data_cache import DataFrameCache
+from agentpro.tools.data_tool import DataScienceTool
+def write_sales(path, rows: int = 100) -> str:
+    with open(path, "w") as f:
+        f.write("region,amount\n" + "".join(f"{'north' if i % 2 else 'south'},{i}\n" for i in range(rows)))
+    return str(path)
+def make_tool(tmp_path, **options) -> DataScienceTool:
+    return DataScienceTool(client_details={"api_key": "test"}, model_name="m", frame_cache=DataFrameCache(sidecar_dir=str(tmp_path / "frames"), **options.pop("cache", {})), **options)
+def test_small_files_are_loaded_as_frames(tmp_path):
+    schema, variables = make_tool(tmp_path).load_csv(write_sales(tmp_path / "sales.csv"))
+    assert list(variables) == ["df_sales"] and len(variables["df_sales"]) == 100 and "LARGE FILE" not in schema
+def test_large_files_get_a_dataset_and_a_chunk_reader(tmp_path):
+    tool = make_tool(tmp_path, large_file_bytes=0, sample_rows=10)
+    schema, variables = tool.load_csv(write_sales(tmp_path / "sales.csv"))
+    assert set(variables) == {"ds_sales", "iter_sales"} and "LARGE FILE" in schema and "first 10 rows" in schema
+    assert variables["ds_sales"].count_rows() == 100
+    assert sum(chunk["amount"].sum() for chunk in variables["iter_sales"](chunksize=30)) == sum(range(100))
+    assert tool.frame_cache.info()["entries"] == 0
+def test_parquet_sidecar_datasets_are_written_once(tmp_path):
+    cache = DataFrameCache(parquet_sidecars=True, sidecar_dir=str(tmp_path / "frames"))
+    path = write_sales(tmp_path / "sales.csv")
+    first = cache.dataset(path)
+    assert first.count_rows() == 100 and first.format.default_extname == "parquet"
+    assert cache.dataset(path).files == first.files
+def test_generated_code_runs_against_the_dataset(tmp_path, mock_llm):
+    code = "totals = ds_sales.to_table(columns=['region', 'amount'], filter=pc.field('region') == 'north').to_pandas()\ntotals['amount'].sum()"
+    mock_llm["[test:large]"] = [f"```python\n{code}\n```"]
+    tool = make_tool(tmp_path, large_file_bytes=0)
+    result = tool.run(f"[test:large] total north sales in {write_sales(tmp_path / 'sales.csv')}")
+    assert "Code Executed Successfully" in result and result.rstrip().endswith(str(sum(range(1, 100, 2))))
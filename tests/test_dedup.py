@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+pytest.importorskip("faiss")
+from agentpro.tools.dedup import MinHasher, NearDuplicateFilter, jaccard, shingles
+from agentpro.tools.embeddings import Embedder, EmbeddingCache
+from agentpro.tools.vector_store import FAISSVectorDB
+from test_embeddings import BagOfWordsModel
+from test_note_manager import NOTES, make_manager
+TEXT = "the quick brown fox jumps over the lazy dog while the cat sleeps in the warm afternoon sun by the river"
+def embed(texts: list) -> np.ndarray:
+    return Embedder(model_name="bow", model=BagOfWordsModel(), cache=EmbeddingCache()).encode(texts, normalize_embeddings=True)
+def test_signatures_estimate_jaccard_similarity():
+    hasher = MinHasher(256)
+    first, second = shingles(TEXT, 2), shingles(TEXT.replace("river", "lake"), 2)
+    exact = len(first & second) / len(first | second)
+    assert jaccard(hasher.signature(first), hasher.signature(second)) == pytest.approx(exact, abs=0.1)
+    assert np.array_equal(MinHasher(256).signature(first), hasher.signature(first))
+    assert shingles("Two words", 5) == shingles("two   WORDS", 5)
+def test_bands_must_divide_the_signature():
+    with pytest.raises(ValueError):
+        NearDuplicateFilter(FAISSVectorDB(dim=64), num_perm=100, bands=16)
+def test_duplicates_within_a_batch_and_against_the_store():
+    db = FAISSVectorDB(dim=64)
+    dedup = NearDuplicateFilter(db)
+    batch = [TEXT, TEXT + ".", "a completely different passage about graph theory and shortest paths"]
+    keep, signatures = dedup.filter(batch, embed(batch))
+    assert keep == [0, 2]
+    dedup.register(db.add([batch[i] for i in keep], embed(batch)[keep]), signatures)
+    assert dedup.filter([TEXT.upper()], embed([TEXT.upper()]))[0] == [] and dedup.info()["skipped"] == 2
+def test_embedding_threshold_catches_reworded_passages():
+    db = FAISSVectorDB(dim=64)
+    dedup = NearDuplicateFilter(db, jaccard_threshold=1.0, embedding_threshold=0.9)
+    db.add([TEXT], embed([TEXT]))
+    reordered = " ".join(reversed(TEXT.split()))
+    assert dedup.filter([reordered], embed([reordered]))[0] == [] and dedup.stats["skipped_embedding"] == 1
+def test_signatures_persist_and_cover_older_notes(tmp_path):
+    db = FAISSVectorDB(dim=64, path=str(tmp_path))
+    db.add([TEXT], embed([TEXT]))
+    dedup = NearDuplicateFilter(db, embedding_threshold=1.1)
+    assert dedup.filter([TEXT], embed([TEXT]))[0] == []
+    db.close()
+    reopened = FAISSVectorDB.load(str(tmp_path))
+    dedup = NearDuplicateFilter(reopened, embedding_threshold=1.1)
+    assert dedup._signatures._data[0].any() and dedup.filter([TEXT], embed([TEXT]))[0] == []
+def test_near_duplicates_are_not_stored_twice():
+    manager = make_manager()
+    assert manager.ingest_texts(NOTES) == 3
+    assert manager.ingest_texts([NOTES[0], NOTES[1] + " ", "something new entirely here"]) == 1
+    assert len(manager.vector_db) == 4 and manager.dedup.info()["skipped"] == 2
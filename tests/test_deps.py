@@ -0,0 +1,60 @@
+import subprocess
+import pytest
+from agentpro import deps
+from agentpro.deps import DependencyManager, canonical_name, parse_pip_line
+@pytest.fixture
+def pip(monkeypatch):
+    """Records pip calls instead of running them; requirements named in `pip.bad` fail to install."""
+    class Pip:
+        bad = set()
+        calls = []
+        def __call__(self, command):
+            requirements = command[command.index("-q") + 1:]
+            self.calls.append(requirements)
+            if self.bad & set(requirements): raise subprocess.CalledProcessError(1, command)
+            return 0
+    fake = Pip()
+    monkeypatch.setattr(subprocess, "check_call", fake)
+    return fake
+@pytest.fixture
+def manager(tmp_path):
+    return DependencyManager(state_path=str(tmp_path / "deps.json"))
+def test_parse_pip_line():
+    assert parse_pip_line("# pip install pandas, scikit-learn>=1.0 -q --upgrade os 'seaborn'") == ["pandas", "scikit-learn>=1.0", "seaborn"]
+    assert parse_pip_line("# pip install") == []
+def test_canonical_name():
+    assert canonical_name("Scikit_Learn>=1.0") == "scikit-learn"
+def test_satisfied_requirements_are_not_installed(manager, pip):
+    report = manager.ensure(["pytest", "pytest>=1.0"])
+    assert report == {"installed": [], "satisfied": ["pytest", "pytest>=1.0"], "failed": []}
+    assert pip.calls == []
+def test_missing_requirements_install_in_one_batch(manager, pip):
+    report = manager.ensure(["pytest", "not-installed-a", "pytest>=999"])
+    assert pip.calls == [["not-installed-a", "pytest>=999"]]
+    assert report["installed"] == ["not-installed-a", "pytest>=999"] and report["satisfied"] == ["pytest"]
+    assert manager.ensure(["not-installed-a"])["satisfied"] == ["not-installed-a"]
+def test_failed_batch_is_retried_one_by_one(manager, pip):
+    pip.bad = {"not-installed-bad"}
+    report = manager.ensure(["not-installed-a", "not-installed-bad"])
+    assert pip.calls == [["not-installed-a", "not-installed-bad"], ["not-installed-a"], ["not-installed-bad"]]
+    assert report["installed"] == ["not-installed-a"] and report["failed"] == ["not-installed-bad"]
+def test_single_failure_is_recorded_without_a_retry(manager, pip):
+    pip.bad = {"not-installed-bad"}
+    assert manager.ensure(["not-installed-bad"])["failed"] == ["not-installed-bad"]
+    assert pip.calls == [["not-installed-bad"]]
+def test_recent_failures_are_skipped_across_managers(manager, pip, tmp_path):
+    pip.bad = {"not-installed-bad"}
+    manager.ensure(["not-installed-bad"])
+    again = DependencyManager(state_path=str(tmp_path / "deps.json"))
+    assert again.ensure(["not-installed-bad"])["failed"] == ["not-installed-bad"]
+    assert len(pip.calls) == 1
+    expired = DependencyManager(state_path=str(tmp_path / "deps.json"), retry_failed_after=0)
+    expired.ensure(["not-installed-bad"])
+    assert len(pip.calls) == 2
+def test_pip_command_options(tmp_path):
+    manager = DependencyManager(state_path=str(tmp_path / "deps.json"), wheel_dir="/wheels", offline=True)
+    command = manager._pip_command(["a"])
+    assert command[command.index("-q") + 1:] == ["--find-links", "/wheels", "--no-index", "a"]
+def test_default_manager_is_shared(monkeypatch):
+    monkeypatch.setattr(deps, "_default_manager", None)
+    assert deps.get_dependency_manager() is deps.get_dependency_manager()
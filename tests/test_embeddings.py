@@ -0,0 +1,59 @@
+import zlib
+import numpy as np
+import pytest
+from agentpro.tools.embeddings import Embedder, EmbeddingCache, split_passages
+class BagOfWordsModel:
+    """Stand-in for a SentenceTransformer: hashed bag-of-words vectors; records every batch it encodes."""
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+        self.batches = []
+    def encode(self, texts, batch_size=32, normalize_embeddings=False, show_progress_bar=False):
+        self.batches.append(list(texts))
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode()) % self.dim] += 1.0
+        if normalize_embeddings: vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+def test_split_passages_overlap_and_blocks():
+    text = " ".join(f"w{i}" for i in range(25)) + "\n\n" + "second block."
+    passages = split_passages(text, max_words=10, overlap=3)
+    assert passages[0].split() == [f"w{i}" for i in range(10)]
+    assert passages[1].split()[:3] == ["w7", "w8", "w9"]
+    assert passages[-1] == "second block." and all(len(p.split()) <= 10 for p in passages)
+def test_split_passages_prefers_sentence_ends():
+    words = [f"w{i}" for i in range(20)]
+    words[7] += "."
+    assert split_passages(" ".join(words), max_words=10, overlap=0)[0].endswith("w7.")
+def test_cache_keys_depend_on_model_and_normalization():
+    keys = {EmbeddingCache.make_key(model, normalize, "text") for model in ("a", "b", "a#int8") for normalize in (True, False)}
+    assert len(keys) == 6
+def test_sqlite_cache_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    EmbeddingCache(path=path).put_many({"k": np.ones(3, dtype=np.float32)})
+    found = EmbeddingCache(path=path).get_many(["k", "missing"])
+    assert list(found) == ["k"] and found["k"].tolist() == [1.0, 1.0, 1.0]
+def test_lru_bound():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put_many({key: np.zeros(2) for key in "abc"})
+    assert set(cache.get_many(list("abc"))) == {"b", "c"}
+def test_encode_batches_deduplicates_and_caches():
+    model = BagOfWordsModel()
+    embedder = Embedder(model_name="bow", model=model, cache=EmbeddingCache())
+    vectors = embedder.encode(["a b", "c d", "a b"], normalize_embeddings=True)
+    assert vectors.shape == (3, 64) and model.batches == [["a b", "c d"]]
+    assert np.allclose(vectors[0], vectors[2]) and np.isclose(np.linalg.norm(vectors[0]), 1.0)
+    assert embedder.encode("c d", normalize_embeddings=True).shape == (64,) and len(model.batches) == 1
+    embedder.encode("c d")
+    assert model.batches[-1] == ["c d"]
+def test_passed_in_models_are_not_cached_under_the_default_name():
+    shared = EmbeddingCache()
+    first = Embedder(model=BagOfWordsModel(), cache=shared)
+    second = Embedder(model=BagOfWordsModel(dim=8), cache=shared)
+    assert first.cache_model != second.cache_model
+    assert first.encode("x").shape == (64,) and second.encode("x").shape == (8,)
+    assert Embedder(model=BagOfWordsModel()).cache is not Embedder(model=BagOfWordsModel()).cache
+def test_quantized_vectors_are_cached_apart():
+    assert Embedder(model_name="m", quantize="int8").cache_model == "m#int8"
+    assert Embedder(model_name="m").cache_model == "m"
+    assert Embedder(model_name="m", model=BagOfWordsModel(), quantize="int8").cache_model == "m"
@@ -0,0 +1,47 @@
+from agentpro.history import HistoryManager, context_window, count_tokens
+SYSTEM = {"role": "system", "content": "You are an agent."}
+def step(observation: str, thought: str = "Thought: go on") -> list:
+    return [{"role": "assistant", "content": thought}, {"role": "assistant", "content": f"Observation: {observation}"}]
+def history_tokens(messages: list) -> int:
+    return HistoryManager().tokens(messages)
+def test_context_window_uses_the_longest_prefix():
+    assert context_window("openai/gpt-4o-mini") == 128000 and context_window("gpt-4") == 8192
+    assert context_window("unknown-model", default=123) == 123
+def test_without_limits_the_history_is_sent_unchanged():
+    messages = [SYSTEM, {"role": "user", "content": "q"}, *step("x" * 4000), {"role": "assistant", "content": "Final Answer: a"}]
+    assert HistoryManager().compact(messages) == messages
+def test_repeated_final_prompts_keep_only_the_latest():
+    messages = [SYSTEM, {"role": "user", "content": "q"}, {"role": "user", "content": "final?"}, *step("o"), {"role": "user", "content": "final?"}]
+    compacted = HistoryManager().compact(messages, final_prompt="final?")
+    assert [m["content"] for m in compacted if m["role"] == "user"] == ["q", "final?"] and compacted[-1]["content"] == "final?"
+def test_only_observations_of_earlier_steps_are_truncated():
+    big = "word " * 400
+    messages = [SYSTEM, {"role": "user", "content": "q"}, *step(big), *step(big + "latest")]
+    compacted = HistoryManager(max_observation_tokens=20).compact(messages)
+    assert "[truncated" in compacted[3]["content"] and count_tokens(compacted[3]["content"]) < 40
+    assert compacted[5] == messages[5] and compacted[0] is SYSTEM
+def test_compacted_observations_stay_identical_and_are_bounded():
+    calls = []
+    history = HistoryManager(summarizer=lambda text: calls.append(text) or "short", max_compacted=2)
+    messages = [{"role": "user", "content": "q"}, *step("one"), *step("two"), *step("three")]
+    first = history.compact(messages)
+    assert history.compact(messages) == first and calls == ["Observation: one", "Observation: two"]
+    assert first[2]["content"] == "Observation (summarized): short"
+    history.compact([{"role": "user", "content": "q"}, *step("four"), *step("five")])
+    assert len(history._compacted) == 2
+def test_token_budget_drops_the_oldest_turns_after_the_first_question():
+    messages = [SYSTEM, {"role": "user", "content": "question"}, *step("a" * 400), *step("b" * 400), *step("c" * 40)]
+    history = HistoryManager(token_budget=history_tokens(messages) - 150)
+    compacted = history.compact(messages)
+    assert compacted[:2] == messages[:2] and compacted[-1] == messages[-1]
+    assert history.tokens(compacted) <= history.token_budget and not any("a" * 400 in m["content"] for m in compacted)
+def test_tool_results_are_dropped_with_their_call():
+    call = {"role": "assistant", "content": None, "tool_calls": [{"id": "1", "type": "function", "function": {"name": "t", "arguments": "{}"}}]}
+    messages = [{"role": "user", "content": "q"}, call, {"role": "tool", "tool_call_id": "1", "content": "r" * 800}, {"role": "assistant", "content": "Final Answer: done"}]
+    compacted = HistoryManager(token_budget=50).compact(messages)
+    assert [m["role"] for m in compacted] == ["user", "assistant"]
+def test_forks_share_settings_but_not_the_cache():
+    history = HistoryManager(max_observation_tokens=5, model="m")
+    history.compact_observation("x " * 100)
+    fork = history.fork()
+    assert fork.max_observation_tokens == 5 and fork.model == "m" and not fork._compacted and history._compacted
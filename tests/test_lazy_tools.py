@@ -0,0 +1,62 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from agentpro import AgentPro
+from agentpro.tools import LazyTool, Tool, warm_tools
+CREATED, WARMED = [], []
+class Built(Tool):
+    """Records every instance built and warmed in CREATED and WARMED."""
+    name: str = "Built Tool"
+    description: str = "Says hi."
+    arg: str = "A name."
+    def __init__(self, **data):
+        super().__init__(**data)
+        time.sleep(0.01)
+        CREATED.append(self)
+    def warm(self) -> None:
+        WARMED.append(self)
+    def shout(self, text: str) -> str:
+        return text.upper()
+    def run(self, prompt: str) -> str:
+        return f"hi {prompt}"
+def fresh() -> LazyTool:
+    CREATED.clear()
+    WARMED.clear()
+    return LazyTool.of(Built)
+def test_declaration_comes_from_the_class_without_building_it():
+    tool = fresh()
+    assert (tool.name, tool.description, tool.arg) == ("built_tool", "says hi.", "a name.") and not tool.loaded and CREATED == []
+    assert LazyTool.of("test_lazy_tools:Built", name="Renamed").name == "renamed"
+def test_the_tool_is_built_once_on_first_run():
+    tool = fresh()
+    threads = [threading.Thread(target=tool.run, args=("x",)) for _ in range(8)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert tool.run("bob") == "hi bob" and len(CREATED) == 1 and tool.tool is CREATED[0]
+    assert tool.shout("x") == "X"
+def test_async_runs_build_the_tool_too():
+    tool = fresh()
+    assert asyncio.run(tool.arun("amy")) == "hi amy" and tool.loaded
+def test_agents_describe_lazy_tools_without_building_them():
+    tool = fresh()
+    agent = AgentPro(tools=[tool], client_details={"api_key": "test"})
+    assert "built_tool" in agent.messages[0]["content"] and not tool.loaded
+def test_warm_tools_modes(monkeypatch):
+    tool = fresh()
+    assert warm_tools([tool]) is None and not tool.loaded
+    monkeypatch.setenv("AGENTPRO_PREWARM_TOOLS", "background")
+    thread = warm_tools([tool, Built()])
+    thread.join()
+    assert tool.loaded and WARMED == [tool.tool]
+    assert warm_tools([tool], "eager") is None and len(WARMED) == 1
+def test_failed_warmups_do_not_stop_the_others():
+    def broken():
+        raise RuntimeError("no credentials")
+    failing, tool = LazyTool(broken, name="broken", description="d", arg="a"), fresh()
+    warm_tools([failing, tool], "eager")
+    assert not failing.loaded and tool.loaded
+def test_importing_agentpro_skips_tool_dependencies():
+    code = "import sys, agentpro, agentpro.tools; print(sorted(m for m in ('pandas', 'faiss', 'pptx', 'duckduckgo_search') if m in sys.modules))"
+    assert subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.strip() == "[]"
@@ -0,0 +1,38 @@
+import asyncio
+import pytest
+from agentpro import AgentPro
+from test_streaming import EchoTool
+def call(text, name: str = "echo") -> dict:
+    return {"name": name, "arguments": {"input": text}}
+def make_agent(**options) -> AgentPro:
+    return AgentPro(tools=[EchoTool()], client_details={"api_key": "test"}, tool_calling="native", **options)
+def test_unknown_modes_are_rejected():
+    with pytest.raises(ValueError, match="tool_calling"):
+        AgentPro(tools=[], client_details={"api_key": "test"}, tool_calling="json")
+def test_tools_are_declared_as_functions():
+    schema = EchoTool().get_tool_schema()
+    assert schema["function"]["name"] == "echo" and schema["function"]["parameters"]["required"] == ["input"]
+    assert make_agent().tool_schemas == [schema]
+def test_tool_calls_are_run_and_answered(mock_llm):
+    mock_llm["[test:native]"] = [{"tool_calls": [call("hello"), call('{"query": "structured"}')]}, {"content": "it said hello"}]
+    agent = make_agent()
+    assert agent("[test:native] go") == "it said hello"
+    assistant = next(message for message in agent.messages if message.get("tool_calls"))
+    tool_messages = [message for message in agent.messages if message["role"] == "tool"]
+    assert [message["tool_call_id"] for message in tool_messages] == [tool_call["id"] for tool_call in assistant["tool_calls"]]
+    assert [message["content"] for message in tool_messages] == ["echo: hello", "echo: {'query': 'structured'}"]
+def test_call_limit_answers_every_call_and_forces_a_final_answer(mock_llm):
+    mock_llm["[test:limit]"] = [{"tool_calls": [call("one"), call("two")]}, {"content": "answer from one", "tool_calls": [call("three")]}]
+    agent = make_agent(max_tool_calls=1)
+    assert agent("[test:limit] go") == "answer from one"
+    assert [message["content"] for message in agent.messages if message["role"] == "tool"] == ["echo: one", "Error: tool call limit reached, answer with the information gathered so far."]
+def test_unknown_tools_get_an_error_result(mock_llm):
+    mock_llm["[test:unknown]"] = [{"tool_calls": [call("x", name="missing")]}, {"content": "done"}]
+    agent = make_agent()
+    assert agent("[test:unknown] go") == "done"
+    assert "missing" in next(message["content"] for message in agent.messages if message["role"] == "tool")
+def test_async_and_streamed_runs_match(mock_llm):
+    mock_llm["[test:modes]"] = [{"tool_calls": [call("hello")]}, {"content": "it said hello"}]
+    assert asyncio.run(make_agent().arun("[test:modes] async")) == "it said hello"
+    events = list(make_agent().stream("[test:modes] stream"))
+    assert events[-1] == ("final", "it said hello") and any(kind == "observation" and "echo: hello" in text for kind, text in events)
@@ -0,0 +1,35 @@
+import pytest
+pytest.importorskip("faiss")
+from agentpro.tools.note_manager_tool import NoteManager
+from agentpro.tools.vector_store import FAISSVectorDB
+from agentpro.tools.embeddings import EmbeddingCache, Embedder
+from test_embeddings import BagOfWordsModel
+class Recorder:
+    """Stand-in for the Ares and YouTube tools: returns `reply` and records its inputs."""
+    def __init__(self, reply: str = "summary"):
+        self.reply = reply
+        self.inputs = []
+    def run(self, prompt: str) -> str:
+        self.inputs.append(prompt)
+        return self.reply
+NOTES = ["transformers use attention over tokens", "convolutional networks use filters over pixels", "attention heads in transformers weigh tokens"]
+def make_manager(**options) -> NoteManager:
+    embedder = Embedder(model_name="bow", model=BagOfWordsModel(), cache=EmbeddingCache())
+    return NoteManager(FAISSVectorDB(dim=64), embedder, Recorder("video one\n\n\nvideo two"), Recorder(), **options)
+def test_summarizes_the_single_best_note_by_default():
+    manager = make_manager()
+    assert manager.ingest_texts(NOTES) == 3
+    assert manager.run("attention heads weigh tokens") == "[FINALIZED NOTES]\nsummary"
+    assert manager.ares_tool.inputs == [NOTES[2]]
+def test_top_k_joins_several_notes():
+    manager = make_manager(top_k=2)
+    manager.ingest_texts(NOTES)
+    manager.run("attention heads weigh tokens")
+    assert manager.ares_tool.inputs[0].split("\n\n") == [NOTES[2], NOTES[0]]
+def test_empty_store_ingests_from_youtube():
+    manager = make_manager()
+    assert "2 passages, 0 near-duplicates skipped" in manager.run("graph theory")
+    assert manager.youtube_tool.inputs == ["graph theory"] and len(manager.vector_db) == 2
+def test_long_documents_are_split_into_passages():
+    manager = make_manager(passage_words=10, passage_overlap=2, deduplicate=False)
+    assert manager.ingest_texts([" ".join(f"word{i}" for i in range(30))]) == 4
@@ -0,0 +1,43 @@
+import pytest
+from agentpro import AgentPro
+from agentpro.pool import AgentPool
+from agentpro.tools.planner_tool import PlannerTool
+@pytest.fixture
+def planner():
+    return PlannerTool(pool=AgentPool(object, 1))
+@pytest.mark.parametrize("prompt, expected", [
+    ("plan deep learning", (["plan"], "deep learning")),
+    ("plan learning rate schedules", (["plan"], "learning rate schedules")),
+    ("recommend videos on transformers", (["recommend"], "videos on transformers")),
+    ("summarize notes about attention", (["notes"], "notes about attention")),
+    ("plan + recommend + notes transformers", (["plan", "recommend", "notes"], "transformers")),
+    ("plan, recommend & notes transformers", (["plan", "recommend", "notes"], "transformers")),
+    ("plan and recommend transformers", (["plan", "recommend"], "transformers")),
+    ("Plan AND Videos transformers", (["plan", "recommend"], "transformers")),
+    ("plan + learn transformers", (["plan"], "transformers")),
+    ("plan and recommendations for interns", (["plan"], "and recommendations for interns")),
+    ("study transformers", (["plan", "recommend", "notes"], "transformers")),
+    ("  plan   graph theory  ", (["plan"], "graph theory")),
+])
+def test_parse_intents(planner, prompt, expected):
+    assert planner.parse_intents(prompt) == expected
+@pytest.mark.parametrize("prompt", ["", "   ", "tell me about transformers", "+ plan transformers"])
+def test_parse_intents_without_an_intent(planner, prompt):
+    assert planner.parse_intents(prompt)[0] == []
+def test_run_rejects_unknown_intents_and_missing_topics(planner):
+    assert planner.run("tell me about transformers") == "I didn't understand that."
+    assert planner.run("plan + recommend") == "Please provide a topic along with the instruction."
+def test_needs_an_agent_or_a_pool():
+    with pytest.raises(ValueError, match="sub_agent or a pool"):
+        PlannerTool()
+def test_sub_agent_history_is_left_alone(mock_llm):
+    sub_agent = AgentPro(tools=[], client_details={"api_key": "test"})
+    sub_agent.messages.append({"role": "user", "content": "earlier turn"})
+    history = list(sub_agent.messages)
+    PlannerTool(sub_agent=sub_agent, pool_size=2).run("plan transformers")
+    assert sub_agent.messages == history
+def test_compound_instructions_run_every_branch(mock_llm):
+    planner = PlannerTool(sub_agent=AgentPro(tools=[], client_details={"api_key": "test"}), pool_size=3)
+    result = planner.run("plan + recommend + notes graph theory")
+    assert [line for line in result.splitlines() if line.startswith("## ")] == ["## Learning Plan", "## Recommended Videos", "## Notes"]
+    assert "step-by-step learning plan" in result and "YouTube videos to learn about graph theory" in result
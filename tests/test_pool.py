@@ -0,0 +1,67 @@
+import threading
+import time
+import pytest
+from agentpro import AgentPro
+from agentpro.pool import AgentPool
+class CountingAgent:
+    """Stand-in agent that remembers its prompts until its history is cleared."""
+    def __init__(self):
+        self.messages = []
+    def __call__(self, prompt: str) -> str:
+        self.messages.append(prompt)
+        time.sleep(0.05)
+        return f"{prompt}:{len(self.messages)}"
+    def clear_history(self):
+        self.messages = []
+    def fork(self):
+        return CountingAgent()
+def test_agents_are_created_on_demand_up_to_size():
+    pool = AgentPool(CountingAgent, size=2)
+    assert pool.map(["a", "b", "c", "d"]) == ["a:1", "b:1", "c:1", "d:1"]
+    assert pool.info()["created"] == 2 and pool.info()["idle"] == 2
+def test_history_is_cleared_between_callers():
+    pool = AgentPool(CountingAgent, size=1)
+    with pool.acquire() as agent:
+        agent("first")
+    with pool.acquire() as again:
+        assert again is agent and again.messages == []
+def test_acquire_times_out_when_all_agents_are_busy():
+    pool = AgentPool(CountingAgent, size=1)
+    with pool.acquire():
+        with pytest.raises(TimeoutError):
+            with pool.acquire(timeout=0.05):
+                pass
+    assert pool.stats["waited"] == 1
+def test_failed_factory_frees_its_slot():
+    calls = []
+    def factory():
+        calls.append(1)
+        if len(calls) == 1: raise RuntimeError("boom")
+        return CountingAgent()
+    pool = AgentPool(factory, size=1)
+    with pytest.raises(RuntimeError):
+        pool.run("x")
+    assert pool.run("x") == "x:1"
+def test_from_agent_leaves_the_source_agent_alone():
+    source = AgentPro(tools=[], client_details={"api_key": "test"})
+    source.messages.append({"role": "user", "content": "keep me"})
+    history = list(source.messages)
+    pool = AgentPool.from_agent(source, size=2)
+    pool.prefill()
+    agents = pool.idle_agents()
+    assert source.messages == history and source not in agents
+    assert all(agent.messages != history and agent.tools is source.tools for agent in agents)
+def test_concurrent_callers_never_share_an_agent():
+    pool = AgentPool(CountingAgent, size=3)
+    in_use, overlaps, lock = set(), [], threading.Lock()
+    def worker():
+        with pool.acquire() as agent:
+            with lock:
+                if id(agent) in in_use: overlaps.append(agent)
+                in_use.add(id(agent))
+            time.sleep(0.02)
+            with lock: in_use.discard(id(agent))
+    threads = [threading.Thread(target=worker) for _ in range(12)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert not overlaps and pool.info()["in_use"] == 0
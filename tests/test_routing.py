@@ -0,0 +1,47 @@
+import asyncio
+import pytest
+from agentpro import AgentPro, ModelRouter, agent as agent_module
+from test_streaming import EchoTool
+@pytest.fixture
+def requests(monkeypatch):
+    """(model, max_tokens) of every completion the agent requests."""
+    sent, chat_completion = [], agent_module.chat_completion
+    monkeypatch.setattr(agent_module, "chat_completion", lambda client, **request: sent.append((request["model"], request["max_tokens"])) or chat_completion(client, **request))
+    return sent
+def make_agent(router: ModelRouter, **options) -> AgentPro:
+    return AgentPro(tools=[EchoTool()], client_details={"api_key": "test", "MODEL": "main"}, max_tokens=1000, router=router, **options)
+def test_from_env(monkeypatch):
+    for name in ("AGENTPRO_ROUTER_MODEL", "AGENTPRO_STEP_MAX_TOKENS", "AGENTPRO_FINAL_MAX_TOKENS"): monkeypatch.delenv(name, raising=False)
+    assert ModelRouter.from_env() is None
+    monkeypatch.setenv("AGENTPRO_STEP_MAX_TOKENS", "200")
+    router = ModelRouter.from_env()
+    assert (router.small_model, router.step_max_tokens, router.final_max_tokens, router.replaces_final) == (None, 200, None, False)
+    monkeypatch.setenv("AGENTPRO_ROUTER_MODEL", "small")
+    monkeypatch.setenv("AGENTPRO_FINAL_MAX_TOKENS", "900")
+    router = ModelRouter.from_env()
+    assert (router.small_model, router.final_tokens(1000), router.replaces_final) == ("small", 900, True)
+def test_token_caps_and_escalation_policy():
+    router = ModelRouter("small", step_max_tokens=100)
+    assert router.step_tokens(1000) == 100 and router.step_tokens(50) == 50 and router.final_tokens(1000) == 1000
+    assert router.escalation(final=False, parsed=False) == "parse_failure" and router.escalation(final=True, parsed=True) == "final_answer"
+    assert router.escalation(final=False, parsed=True) is None and ModelRouter("small", escalate_final=False).escalation(True, True) is None
+def test_steps_are_drafted_and_final_answers_escalated(mock_llm, requests):
+    mock_llm["[test:route]"] = ["Action: echo\nAction Input: hi", "Final Answer: small draft", "Final Answer: strong answer"]
+    agent = make_agent(ModelRouter("small", step_max_tokens=64, final_max_tokens=300))
+    assert agent("[test:route] go") == "strong answer"
+    assert requests == [("small", 64), ("small", 64), ("main", 300)]
+    assert [usage["model"] for usage in agent.token_usage] == ["small", "small", "main"] and agent.token_usage[1]["escalated"] == "final_answer"
+    assert "small draft" not in str(agent.messages)
+def test_unparseable_drafts_are_retried_on_the_main_model(mock_llm, requests):
+    mock_llm["[test:garbled]"] = ["I am not sure what to do", "Final Answer: fixed"]
+    agent = make_agent(ModelRouter("small", escalate_final=False))
+    assert asyncio.run(agent.arun("[test:garbled] go")) == "fixed"
+    assert agent.token_usage[0]["escalated"] == "parse_failure"
+def test_drafted_final_answers_can_be_kept(mock_llm, requests):
+    mock_llm["[test:keep]"] = ["Final Answer: small but fine"]
+    agent = make_agent(ModelRouter("small", escalate_final=False), tool_calling="native")
+    assert agent("[test:keep] go") == "Final Answer: small but fine" and requests == [("small", 512)]
+def test_without_a_small_model_only_the_caps_apply(mock_llm, requests):
+    mock_llm["[test:caps]"] = ["Action: echo\nAction Input: hi", "Final Answer: done"]
+    assert make_agent(ModelRouter(step_max_tokens=128))("[test:caps] go") == "done"
+    assert requests == [("main", 128), ("main", 128)]
@@ -0,0 +1,66 @@
+import threading
+import time
+import pytest
+from agentpro.sandbox import SandboxPool, _Worker
+@pytest.fixture
+def pool():
+    pool = SandboxPool(workers=1, timeout=5.0, memory_limit_mb=1024, preload=())
+    yield pool
+    pool.shutdown()
+def test_runs_code_and_captures_output(pool):
+    result = pool.run("print('hi')\nimport sys\nprint('oops', file=sys.stderr)")
+    assert result.ok and result.stdout == "hi\n" and result.stderr == "oops\n"
+def test_errors_are_reported_and_the_worker_is_kept(pool):
+    result = pool.run("raise ValueError('bad')")
+    assert result.error.startswith("ValueError: bad") and not result.timed_out
+    assert pool.run("print(1)").stdout == "1\n"
+    assert pool.stats["errors"] == 1 and pool.stats["crashes"] == 0
+def test_timeout_replaces_the_worker(pool):
+    result = pool.run("import time\ntime.sleep(10)", timeout=0.5)
+    assert result.timed_out and pool.stats["timeouts"] == 1
+    assert pool.run("print('again')").stdout == "again\n"
+def test_crashed_worker_is_replaced(pool):
+    result = pool.run("import os\nos._exit(3)")
+    assert "exit code 3" in result.error and pool.stats["crashes"] == 1
+    assert pool.run("print('again')").ok
+def test_memory_limit(pool):
+    result = pool.run("x = bytearray(2 * 1024 ** 3)")
+    assert not result.ok and "MemoryError" in result.error
+    assert pool.run("print('again')").ok
+def test_worker_that_never_gets_ready_counts_as_a_crash(pool, monkeypatch):
+    monkeypatch.setattr(_Worker, "wait_ready", lambda self, timeout=None: False)
+    result = pool.run("print('never sent')")
+    assert "did not start" in result.error and pool.stats["crashes"] == 1
+    monkeypatch.undo()
+    assert pool.run("print('again')").stdout == "again\n"
+def test_late_ready_message_is_not_taken_as_a_result(monkeypatch):
+    # A worker marked ready before its "ready" message was read would hand that string back as the result.
+    monkeypatch.setattr(_Worker, "wait_ready", lambda self, timeout=None: True)
+    pool = SandboxPool(workers=1, preload=())
+    try:
+        result = pool.run("print('x')")
+        assert "unexpected reply (str)" in result.error and pool.stats["crashes"] == 1
+    finally:
+        pool.shutdown()
+def test_run_after_shutdown_raises(pool):
+    pool.shutdown()
+    with pytest.raises(RuntimeError):
+        pool.run("print(1)")
+def test_shutdown_wakes_callers_waiting_for_a_worker(pool):
+    busy = threading.Thread(target=pool.run, args=("import time\ntime.sleep(1)",))
+    busy.start()
+    time.sleep(0.3)
+    errors = []
+    def waiting():
+        try:
+            pool.run("print(1)")
+        except RuntimeError as e:
+            errors.append(e)
+    waiter = threading.Thread(target=waiting)
+    waiter.start()
+    time.sleep(0.2)
+    pool.shutdown()
+    busy.join(5)
+    waiter.join(5)
+    assert not waiter.is_alive() and len(errors) == 1
+    assert pool._idle.empty()
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from agentpro import scheduler
+from agentpro.scheduler import PRIORITY_AGENT, PRIORITY_BACKGROUND, RateLimited, RequestScheduler, TokenBucket, is_rate_limit, provider_for, retry_after
+class StatusError(Exception):
+    def __init__(self, status_code: int, headers: dict = None):
+        super().__init__(f"status {status_code}")
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+def test_rate_limit_detection_and_retry_after():
+    assert is_rate_limit(RateLimited()) and is_rate_limit(StatusError(429)) and not is_rate_limit(StatusError(500))
+    assert retry_after(RateLimited(retry_after=3)) == 3.0
+    assert retry_after(StatusError(429, {"retry-after-ms": "1500"})) == 1.5 and retry_after(StatusError(429, {"retry-after": "2"})) == 2.0
+    assert retry_after(StatusError(429, {"retry-after": "soon"})) is None and retry_after(ValueError()) is None
+def test_provider_is_the_base_url_host():
+    assert provider_for(SimpleNamespace(base_url="https://api.openai.com/v1/")) == "api.openai.com"
+    assert provider_for(SimpleNamespace(url="http://127.0.0.1:8000/search")) == "127.0.0.1" and provider_for(object()) == "default"
+def test_limits_from_env(monkeypatch):
+    monkeypatch.setenv("AGENTPRO_RATE_LIMITS", "api.openai.com:gpt-4o-mini=500/200000, openrouter.ai=200")
+    assert scheduler._limits_from_env() == {"api.openai.com:gpt-4o-mini": {"rpm": 500.0, "tpm": 200000.0}, "openrouter.ai": {"rpm": 200.0, "tpm": None}}
+def test_token_bucket_delay():
+    bucket = TokenBucket(60, capacity=2)
+    assert bucket.delay(2) == 0.0
+    bucket.consume(2)
+    assert bucket.delay(1) == pytest.approx(1.0, abs=0.05) and bucket.delay(100) == pytest.approx(2.0, abs=0.05)
+def test_requests_wait_for_every_applicable_bucket():
+    limiter = RequestScheduler({"host": {"rpm": 6000}, "host:big": {"tpm": 600, "rpm": None}})
+    limiter.acquire("host", "big", tokens=600)
+    assert limiter.acquire("host", "small", tokens=600) < 0.05
+    assert limiter.acquire("host", "big", tokens=5) == pytest.approx(0.5, abs=0.15)
+def test_waiting_requests_are_admitted_by_priority():
+    limiter = RequestScheduler({"host": {"rpm": 240}})
+    limiter.buckets["host"][0][1].capacity = 1
+    limiter.acquire("host")
+    order = []
+    def worker(name, priority):
+        limiter.acquire("host", priority=priority)
+        order.append(name)
+    background = threading.Thread(target=worker, args=("background", PRIORITY_BACKGROUND))
+    background.start()
+    while not limiter._queues["host"]: time.sleep(0.001)
+    agent = threading.Thread(target=worker, args=("agent", PRIORITY_AGENT))
+    agent.start()
+    background.join()
+    agent.join()
+    assert order == ["agent", "background"] and limiter.metrics()["queue_depth"] == {"host": 0}
+def test_rate_limits_are_retried():
+    limiter, calls = RequestScheduler(max_retries=3), []
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3: raise RateLimited(retry_after=0)
+        return "ok"
+    assert limiter.call(flaky) == "ok" and limiter.stats["retries"] == 2
+    def always():
+        raise RateLimited(retry_after=0)
+    with pytest.raises(RateLimited):
+        limiter.call(always)
+    assert limiter.stats["failed"] == 1 and limiter.stats["retries"] == 4
+def test_other_errors_are_not_retried():
+    limiter, calls = RequestScheduler(), []
+    with pytest.raises(ValueError):
+        limiter.call(lambda: calls.append(1) or int("x"))
+    assert calls == [1] and limiter.stats["retries"] == 0
+def test_backoff_grows_and_is_capped():
+    limiter = RequestScheduler(base_delay=1.0, max_delay=4.0)
+    assert 0.5 <= limiter._backoff(ValueError(), 0) <= 1.5 and 2.0 <= limiter._backoff(ValueError(), 2) <= 6.0
+    assert limiter._backoff(ValueError(), 10) <= 6.0 and limiter._backoff(RateLimited(retry_after=7), 0) == 7.0
+def test_cancelled_async_requests_leave_the_queue():
+    limiter = RequestScheduler({"host": {"rpm": 60}})
+    limiter.buckets["host"][0][1].capacity = 1
+    limiter.acquire("host")
+    async def main():
+        waiting = asyncio.ensure_future(limiter.aacquire("host"))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+    asyncio.run(main())
+    assert limiter._queues["host"] == []
+def test_async_calls_retry_too():
+    limiter, calls = RequestScheduler(), []
+    async def flaky():
+        calls.append(1)
+        if len(calls) == 1: raise RateLimited(retry_after=0)
+        return "ok"
+    assert asyncio.run(limiter.acall(flaky)) == "ok" and limiter.stats["retries"] == 1
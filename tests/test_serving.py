@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+import urllib.request
+import pytest
+from agentpro import AgentPro
+from agentpro.serving import AgentService, QueueTimeout, ServiceOverloaded, make_http_server
+class BlockingAgent:
+    """Stand-in agent whose calls wait until `release` is set."""
+    def __init__(self, release: threading.Event):
+        self.release = release
+        self.tools = {}
+        self.messages = []
+    def fork(self):
+        return BlockingAgent(self.release)
+    def clear_history(self):
+        self.messages = []
+    def __call__(self, prompt: str, **kwargs) -> str:
+        self.release.wait(5)
+        return prompt
+def mock_agent() -> AgentPro:
+    return AgentPro(tools=[], client_details={"api_key": "test"})
+def test_factory_builds_one_agent_and_the_pool_shares_its_tools(mock_llm):
+    built = []
+    service = AgentService(lambda: built.append(mock_agent()) or built[-1], pool_size=3)
+    agents = service.pool.idle_agents()
+    assert len(built) == 1 and len(agents) == 3
+    assert len({id(agent.tools) for agent in agents}) == 1 and len({id(agent.client) for agent in agents}) == 1
+    assert len({id(agent._executor) for agent in agents}) == 1 and agents[0]._executor is not None
+    assert len({id(agent.messages) for agent in agents}) == 3 and len({id(agent.history) for agent in agents}) == 3
+def test_run_and_sessions(mock_llm):
+    service = AgentService.from_agent(mock_agent(), pool_size=2)
+    result = service.run("first question", session_id="s1")
+    assert result["response"] == "Mock answer to: first question" and result["session_id"] == "s1"
+    service.run("second question", session_id="s1")
+    prompts = [m["content"] for m in service._sessions["s1"]["messages"] if m["role"] == "user"]
+    assert prompts == ["first question", "second question"]
+    assert service.run("alone")["session_id"] is None
+    assert service.end_session("s1") and "s1" not in service._sessions
+    assert service.metrics()["completed"] == 3
+def test_full_queue_is_rejected_and_waits_time_out():
+    release = threading.Event()
+    service = AgentService.from_agent(BlockingAgent(release), pool_size=1, max_queue=1, queue_timeout=0.3)
+    busy = threading.Thread(target=service.run, args=("busy",))
+    busy.start()
+    time.sleep(0.1)
+    with pytest.raises(QueueTimeout):
+        service.run("waits too long")
+    queued = []
+    waiting = threading.Thread(target=lambda: queued.append(service.run("queued")["response"]))
+    waiting.start()
+    time.sleep(0.1)
+    with pytest.raises(ServiceOverloaded):
+        service.run("no room")
+    release.set()
+    busy.join(5)
+    waiting.join(5)
+    assert queued == ["queued"]
+    assert service.stats["rejected"] == 1 and service.stats["timed_out"] == 1
+    assert service.health()["status"] == "ok"
+def test_http_server(mock_llm):
+    service = AgentService.from_agent(mock_agent(), pool_size=1)
+    server = make_http_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        request = urllib.request.Request(f"{url}/v1/run", data=json.dumps({"prompt": "over http"}).encode(), method="POST")
+        with urllib.request.urlopen(request) as response:
+            assert json.load(response)["response"] == "Mock answer to: over http"
+        with urllib.request.urlopen(f"{url}/healthz") as response:
+            assert json.load(response)["status"] == "ok"
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            assert b"agentpro_service_completed_total 1" in response.read()
+    finally:
+        server.shutdown()
+        server.server_close()
+def test_app_builds_its_service_on_first_use(monkeypatch):
+    pytest.importorskip("gradio")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+    from agentpro import app
+    assert app._service is None
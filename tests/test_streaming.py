@@ -0,0 +1,104 @@
+import pytest
+from agentpro import AgentPro, ModelRouter
+from agentpro.streaming import ActionStreamParser
+from agentpro.tools.base import Tool
+COMPLETIONS = [
+    "Thought: I know this\nFinal Answer: Paris",
+    "Thought: I know this\nFinal Answer: line one\nline two\n\nline four",
+    "Final Answer:   spaced answer",
+    'Thought: search\nAction: Echo\nAction Input: {"query": "transformers"}',
+    'Action: echo\nAction Input: {"query": "multi\nline"}\ntrailing words\nAction: other\nAction Input: plain text',
+    "Action: echo\nAction Input: first line\nsecond line\nObservation: ignored\nmore ignored",
+    "Action: echo\nAction Input: before thought\nThought: this ends the input\nAction: echo\nAction Input: second",
+    "Action: echo\nAction Input: [1, 2, 3]\nAction: echo\nAction Input: \"quoted\"",
+    "Action: echo\nAction Input: done\nFinal Answer: after an action",
+    "Final Answer: answer first\nAction: echo\nAction Input: never run",
+    "Action: echo\nThought: no input yet\nAction Input: late",
+    "Thought: nothing to do",
+    "",
+]
+@pytest.fixture(scope="module")
+def agent():
+    return AgentPro(tools=[], client_details={"api_key": "test"})
+def stream_parse(agent, text: str, size: int) -> ActionStreamParser:
+    parser = ActionStreamParser(agent.safe_parse_input)
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(parser.feed(text[start:start + size]))
+    events.extend(parser.close())
+    assert [event[1] for event in events if event[0] == "action"] == parser.actions
+    assert "".join(event[1] for event in events if event[0] == "final_token") == parser.final_text
+    return parser
+@pytest.mark.parametrize("text", COMPLETIONS)
+@pytest.mark.parametrize("size", [1, 2, 5, 16, 10_000])
+def test_streamed_actions_match_parse_actions(agent, text, size):
+    parser = stream_parse(agent, text, size)
+    assert parser.actions == agent.parse_actions(text)
+    assert parser.text == text
+@pytest.mark.parametrize("text", [t for t in COMPLETIONS if "Final Answer:" in t])
+def test_streamed_final_answer_matches_the_reply(agent, text):
+    parser = stream_parse(agent, text, 3)
+    if parser.actions: assert parser.final_text == ""
+    else: assert parser.final_text.strip() == text.split("Final Answer:")[-1].strip()
+def test_parse_actions_grammar(agent):
+    assert agent.parse_actions(COMPLETIONS[3]) == [("echo", {"query": "transformers"})]
+    assert agent.parse_actions(COMPLETIONS[6]) == [("echo", "before thought"), ("echo", "second")]
+    assert agent.parse_actions(COMPLETIONS[9]) == []
+class EchoTool(Tool):
+    name: str = "echo"
+    description: str = "Repeats its input."
+    arg: str = "Any text."
+    calls: list = []
+    def run(self, prompt, *args) -> str:
+        self.calls.append(prompt)
+        return f"echo: {prompt}"
+SCRIPT = ["Thought: look it up\nAction: echo\nAction Input: hello", "Thought: I now know the final answer\nFinal Answer: it said hello"]
+def test_stream_and_call_agree_and_record_usage(mock_llm):
+    mock_llm["[test:echo]"] = SCRIPT
+    called = AgentPro(tools=[EchoTool()], client_details={"api_key": "test"})
+    answer = called("[test:echo] call")
+    streamed = AgentPro(tools=[EchoTool()], client_details={"api_key": "test"})
+    events = list(streamed.stream("[test:echo] stream"))
+    assert answer == "it said hello"
+    assert events[-1] == ("final", answer)
+    assert ("observation", "Observation: echo: hello") in events
+    replies = lambda agent: [m["content"] for m in agent.messages if m["role"] not in ("system", "user")]
+    assert replies(streamed) == replies(called)
+    for usage in (called.token_usage, streamed.token_usage):
+        assert len(usage) == 2
+        assert all(step["prompt_tokens"] > 0 and step["completion_tokens"] > 0 and "seconds" in step for step in usage)
+def make_agent(**options) -> AgentPro:
+    return AgentPro(tools=[EchoTool(calls=[])], client_details={"api_key": "test"}, **options)
+def test_run_stops_an_action_input_at_a_thought(mock_llm):
+    mock_llm["[test:thought]"] = ["Action: echo\nAction Input: hello\nThought: wait for the result", SCRIPT[1]]
+    agent = make_agent()
+    assert agent("[test:thought]") == "it said hello"
+    assert agent.tools["echo"].calls == ["hello"]
+def test_run_does_not_act_after_a_final_answer(mock_llm):
+    mock_llm["[test:final_first]"] = ["Final Answer: done already\nAction: echo\nAction Input: hello"]
+    agent = make_agent()
+    assert agent("[test:final_first]").startswith("done already")
+    assert agent.tools["echo"].calls == []
+def tokens(events) -> str:
+    return "".join(text for kind, text in events if kind == "token")
+def test_escalated_draft_tokens_are_not_streamed(mock_llm):
+    mock_llm["[test:escalate]"] = ["Final Answer: small draft", "Final Answer: strong answer"]
+    agent = make_agent(router=ModelRouter(small_model="small"))
+    events = list(agent.stream("[test:escalate]"))
+    assert events[-1] == ("final", "strong answer")
+    assert "draft" not in tokens(events) and "strong answer" in tokens(events)
+    assert agent.token_usage[0]["escalated"] == "final_answer"
+def test_kept_draft_tokens_are_streamed_with_its_action(mock_llm):
+    mock_llm["[test:kept]"] = ["Action: echo\nAction Input: hello", "Final Answer: small draft", "Final Answer: strong answer"]
+    agent = make_agent(router=ModelRouter(small_model="small"))
+    events = list(agent.stream("[test:kept]"))
+    kinds = [kind for kind, _ in events]
+    assert kinds.index("token") < kinds.index("action") < kinds.index("observation")
+    assert tokens(events).startswith("Action: echo\nAction Input: hello")
+    assert "draft" not in tokens(events) and events[-1] == ("final", "strong answer")
+def test_escalated_native_draft_tokens_are_not_streamed(mock_llm):
+    mock_llm["[test:native]"] = [{"tool_calls": [{"name": "echo", "arguments": {"input": "hello"}}]}, {"content": "small draft"}, {"content": "strong answer"}]
+    agent = make_agent(router=ModelRouter(small_model="small"), tool_calling="native")
+    events = list(agent.stream("[test:native]"))
+    assert agent.tools["echo"].calls == ["hello"]
+    assert "draft" not in tokens(events) and events[-1] == ("final", "strong answer")
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from agentpro import AgentPro, tracing
+from agentpro.tracing import NOOP_SPAN, Tracer, current_span, in_current_context
+from test_streaming import SCRIPT, EchoTool
+@pytest.fixture
+def spans():
+    """Installs a tracer with metrics that also collects every finished span."""
+    tracer, finished = Tracer(metrics=True), []
+    tracer.add_exporter(finished.append)
+    tracing.set_tracer(tracer)
+    yield finished
+    tracing.set_tracer(None)
+def test_disabled_tracers_hand_out_the_noop_span():
+    tracer = Tracer()
+    assert not tracer.enabled and tracer.span("x") is NOOP_SPAN and current_span() is NOOP_SPAN
+    with tracer.span("x") as span:
+        assert span.set(a=1).add("b") is NOOP_SPAN
+def test_spans_nest_across_threads_and_tasks(spans):
+    tracer = tracing.get_tracer()
+    def record(name):
+        with tracer.span(name): pass
+    with tracer.span("outer") as outer:
+        with ThreadPoolExecutor(1) as executor:
+            executor.submit(in_current_context(record, "thread")).result()
+        unlinked = threading.Thread(target=record, args=("unlinked",))
+        unlinked.start()
+        unlinked.join()
+        async def task():
+            with tracer.span("task"): current_span().add("tokens", 2).add("tokens", 3)
+        asyncio.run(task())
+    by_name = {span.name: span for span in spans}
+    assert by_name["thread"].parent_id == outer.span_id and by_name["task"].parent_id == outer.span_id
+    assert by_name["unlinked"].parent_id is None and by_name["task"].attributes["tokens"] == 5
+    assert by_name["thread"].trace_id == outer.trace_id and spans[-1] is outer
+def test_errors_are_recorded_and_reraised(spans):
+    with pytest.raises(KeyError):
+        with tracing.get_tracer().span("failing"):
+            raise KeyError("k")
+    assert spans[0].attributes["error"] == "KeyError: 'k'"
+def test_jsonl_export(tmp_path):
+    tracer = Tracer(path=str(tmp_path / "trace.jsonl"))
+    with tracer.span("parent", model="m"):
+        with tracer.span("child"): pass
+    lines = [json.loads(line) for line in (tmp_path / "trace.jsonl").read_text().splitlines()]
+    assert [line["name"] for line in lines] == ["child", "parent"] and lines[0]["parent_id"] == lines[1]["span_id"]
+    assert lines[1]["attributes"] == {"model": "m"} and lines[1]["seconds"] >= 0
+def test_prometheus_rendering():
+    tracer = Tracer(metrics=True)
+    with tracer.span("llm.call", model="m", prompt_tokens=10, completion_tokens=4, cache_hit=True): pass
+    with tracer.span("llm.call", model="m", prompt_tokens=5, error="boom"): pass
+    text = tracer.render_prometheus(gauges={"agentpro_queue_depth": 2}, counters={"agentpro_requests_total": 7})
+    assert 'agentpro_span_seconds_count{span="llm.call",model="m"} 2' in text
+    assert 'agentpro_span_seconds_bucket{span="llm.call",model="m",le="+Inf"} 2' in text
+    assert 'agentpro_llm_prompt_tokens_total{span="llm.call",model="m"} 15' in text and 'agentpro_errors_total{span="llm.call",model="m"} 1' in text
+    assert "# TYPE agentpro_queue_depth gauge\nagentpro_queue_depth 2" in text and "agentpro_requests_total 7" in text
+    assert [{**span, "seconds": None} for span in tracer.metrics.snapshot()["spans"]] == [{"span": "llm.call", "model": "m", "count": 2, "seconds": None}]
+def test_agent_runs_produce_a_span_tree(spans, mock_llm):
+    mock_llm["[test:echo]"] = SCRIPT
+    assert AgentPro(tools=[EchoTool()], client_details={"api_key": "test"})("[test:echo] trace") == "it said hello"
+    names = [span.name for span in spans]
+    assert names.count("agent.step") == 2 and names.count("llm.call") == 2 and names.count("tool.call") == 1 and names[-1] == "agent.run"
+    run = spans[-1]
+    steps = [span for span in spans if span.name == "agent.step"]
+    assert all(step.parent_id == run.span_id for step in steps) and all(span.trace_id == run.trace_id for span in spans)
+    tool = next(span for span in spans if span.name == "tool.call")
+    assert tool.attributes["tool"] == "echo" and tool.parent_id == steps[0].span_id
+    assert next(span for span in spans if span.name == "llm.call").attributes["completion_tokens"] > 0
+def test_tool_errors_returned_as_text_are_recorded(spans):
+    class Failing(EchoTool):
+        def run(self, prompt, *args) -> str:
+            return "Error: no such thing"
+    Failing().run("x")
+    assert spans[0].name == "tool.call" and spans[0].attributes["error"] == "Error: no such thing"
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+faiss = pytest.importorskip("faiss")
+from agentpro.tools.vector_store import FAISSVectorDB, NoteStore
+def unit_vectors(count: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+def texts(count: int) -> list:
+    return [f"note {i}" for i in range(count)]
+def test_note_store_updates_and_deletes_keep_ids(tmp_path):
+    store = NoteStore(str(tmp_path))
+    assert store.add([{"text": "a"}, {"text": "b"}]) == [0, 1]
+    store.update(0, {"text": "a2"})
+    store.delete(1)
+    store.delete(1)
+    assert store[0] == {"text": "a2"} and store.get(1) is None and len(store) == 1 and store.count == 2
+    store.close()
+    reopened = NoteStore(str(tmp_path), count=2)
+    assert reopened[0] == {"text": "a2"} and len(reopened) == 1 and reopened.live_ids().tolist() == [0]
+def test_search_returns_notes_with_metadata():
+    db, vectors = FAISSVectorDB(dim=16), unit_vectors(10)
+    ids = db.add(texts(10), vectors, [{"source": i} for i in range(10)])
+    hit = db.similarity_search(vectors[3], k=2)[0]
+    assert ids == list(range(10)) and hit["id"] == 3 and hit["text"] == "note 3" and hit["source"] == 3
+    assert [hits[0]["id"] for hits in db.similarity_search(vectors[[1, 7]], k=1)] == [1, 7]
+def test_mismatched_inputs_are_rejected():
+    with pytest.raises(ValueError):
+        FAISSVectorDB(dim=16).add(texts(2), unit_vectors(3))
+def test_deleted_and_updated_notes_keep_their_ids():
+    db, vectors = FAISSVectorDB(dim=16), unit_vectors(10)
+    db.add(texts(10), vectors)
+    assert db.delete([3, 3, 42]) == 1 and len(db) == 9
+    assert all(hit["id"] != 3 for hit in db.similarity_search(vectors[3], k=9))
+    db.update(5, "moved", vectors[0])
+    assert {hit["id"] for hit in db.similarity_search(vectors[0], k=2)} == {0, 5} and db.get(5)["text"] == "moved"
+    with pytest.raises(KeyError):
+        db.update(3, "gone", vectors[0])
+@pytest.mark.parametrize("index_type", ["hnsw", "ivf"])
+def test_indexes_that_need_training_or_cannot_remove(index_type):
+    db, vectors = FAISSVectorDB(dim=16, index_type=index_type, nlist=4, train_size=200), unit_vectors(300)
+    db.add(texts(150), vectors[:150])
+    assert db.similarity_search(vectors[7], k=1)[0]["id"] == 7
+    db.add(texts(150), vectors[150:])
+    assert db.trained and db.info()["indexed"] == 300
+    db.set_search_params(nprobe=4, ef_search=64)
+    db.update(7, "moved", vectors[200])
+    assert [hit["id"] for hit in db.similarity_search(vectors[200], k=2)] in ([7, 200], [200, 7])
+    db.delete([250])
+    assert db.similarity_search(vectors[251], k=1)[0]["id"] == 251 and all(hit["id"] != 250 for hit in db.similarity_search(vectors[250], k=5))
+    db.rebuild()
+    assert db.info()["stale"] == 0 and db.similarity_search(vectors[9], k=1)[0]["id"] == 9
+def test_stores_reopen_from_disk(tmp_path):
+    path, vectors = str(tmp_path / "store"), unit_vectors(20)
+    db = FAISSVectorDB(dim=16, path=path)
+    db.add(texts(20), vectors)
+    db.delete([4])
+    db.close()
+    reopened = FAISSVectorDB.load(path)
+    assert len(reopened) == 19 and reopened.similarity_search(vectors[11], k=1)[0]["text"] == "note 11"
+    assert reopened.get(4) is None and reopened.add(["new"], vectors[4]) == [20]
+    with pytest.raises(FileNotFoundError):
+        FAISSVectorDB.load(str(tmp_path / "missing"))
+def test_saves_are_batched(tmp_path, monkeypatch):
+    db, saves = FAISSVectorDB(dim=16, path=str(tmp_path), autosave_every=5), []
+    save = db.save
+    monkeypatch.setattr(db, "save", lambda path=None: saves.append(1) or save(path))
+    for vector in unit_vectors(12): db.add(["x"], vector)
+    assert len(saves) == 2
+    db.flush()
+    db.flush()
+    assert len(saves) == 3
+def test_rebuild_as_another_index_type():
+    db, vectors = FAISSVectorDB(dim=16), unit_vectors(50)
+    db.add(texts(50), vectors)
+    db.rebuild("sq8")
+    assert db.info()["factory"] == "SQ8" and db.similarity_search(vectors[20], k=1)[0]["id"] == 20
+def test_plain_faiss_indexes_are_migrated():
+    vectors = unit_vectors(5)
+    index = faiss.IndexFlatIP(16)
+    index.add(vectors)
+    db = FAISSVectorDB(index, [{"text": t} for t in texts(5)])
+    assert len(db) == 5 and db.similarity_search(vectors[2], k=1)[0]["text"] == "note 2"
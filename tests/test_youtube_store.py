@@ -0,0 +1,49 @@
+import pytest
+from agentpro.tools import youtube_store, youtube_tool
+from agentpro.tools.youtube_store import TranscriptStore
+from agentpro.tools.youtube_tool import YouTubeSearchTool
+SEGMENTS = [{"text": "hello", "start": 0.0, "duration": 1.5}, {"text": "world", "start": 1.5, "duration": 2.0}]
+@pytest.fixture
+def default_store(monkeypatch, tmp_path):
+    """Points the shared store at tmp_path; yields the path it would be created at."""
+    path = tmp_path / "youtube.sqlite"
+    monkeypatch.setenv("AGENTPRO_YOUTUBE_STORE", str(path))
+    monkeypatch.setattr(youtube_store, "_default_store", None)
+    return path
+def test_segments_and_summaries_round_trip(tmp_path):
+    store = TranscriptStore(str(tmp_path / "s.sqlite"))
+    assert store.get_segments("v1") is None
+    store.put_segments("v1", SEGMENTS)
+    store.put_summary("v1", "m", "short")
+    assert store.get_segments("v1") == SEGMENTS and store.get_summary("v1", "m") == "short" and store.get_summary("v1", "other") is None
+    assert store.stats["transcript_hits"] == 1 and store.stats["summary_misses"] == 1
+    assert TranscriptStore(str(tmp_path / "s.sqlite")).get_segments("v1") == SEGMENTS
+def test_least_recently_read_entries_are_evicted_first(tmp_path):
+    store = TranscriptStore(str(tmp_path / "s.sqlite"))
+    store.put_segments("a", SEGMENTS)
+    store.max_bytes = store.size() * 2
+    store.put_segments("b", SEGMENTS)
+    store.get_segments("a")
+    store.put_segments("c", SEGMENTS)
+    assert store.get_segments("b") is None and store.get_segments("a") == SEGMENTS and store.stats["evictions"] == 1
+def test_warm_fetches_only_missing_videos(tmp_path):
+    store = TranscriptStore(str(tmp_path / "s.sqlite"))
+    store.put_segments("a", SEGMENTS)
+    fetched = []
+    report = store.warm(["a", "b", "b", "gone"], lambda video_id: fetched.append(video_id) or (SEGMENTS if video_id != "gone" else None), summarize=lambda video_id, segments: f"summary of {video_id}", model="m")
+    assert report == {"fetched": 1, "summarized": 2, "cached": 1, "failed": 1} and sorted(fetched) == ["b", "gone"]
+    assert store.get_summary("b", "m") == "summary of b"
+def test_the_tool_opens_the_store_on_first_use(default_store, monkeypatch):
+    monkeypatch.setattr(youtube_tool, "fetch_transcript_segments", lambda video_id: SEGMENTS)
+    tool = YouTubeSearchTool(client_details={"api_key": "test"})
+    assert tool.store is None and not default_store.exists()
+    assert tool.get_transcript_segments("v1") == SEGMENTS
+    assert default_store.exists() and tool.store.get_segments("v1") == SEGMENTS
+def test_a_disabled_store_is_never_created(default_store, monkeypatch):
+    monkeypatch.setenv("AGENTPRO_YOUTUBE_STORE", "off")
+    monkeypatch.setattr(youtube_tool, "fetch_transcript_segments", lambda video_id: SEGMENTS)
+    tool = YouTubeSearchTool(client_details={"api_key": "test"})
+    assert tool.get_transcript_segments("v1") == SEGMENTS and tool._store_summary("v1", "s") == "s"
+    assert tool.get_store() is None and tool._stored_summary("v1") is None
+    with pytest.raises(SystemExit):
+        youtube_store.main(["stats"])
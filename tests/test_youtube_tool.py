@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+import pytest
+from agentpro.tools.youtube_tool import MAP_PROMPT, REDUCE_PROMPT, YouTubeSearchTool
+VIDEOS = [{"video_id": name, "title": f"Video {name}", "url": f"https://youtu.be/{name}"} for name in ("fast", "slow", "other")]
+class FakeYouTube(YouTubeSearchTool):
+    """Summaries without an LLM: every request is recorded and answered with `reply(prompt, text)`."""
+    requests: list = []
+    reply: object = None
+    def _summarize(self, prompt, text, max_tokens=2000):
+        self.requests.append((prompt, text))
+        return self.reply(prompt, text) if self.reply else f"summary of {len(text)} chars"
+    async def _asummarize(self, prompt, text, max_tokens=2000):
+        return self._summarize(prompt, text, max_tokens)
+    def search_videos(self, query, max_results=5):
+        return VIDEOS
+    def get_transcript_segments(self, video_id):
+        if video_id == "slow": time.sleep(1.0)
+        return [{"text": f"{video_id} says hello", "start": 0.0, "duration": 1.0}]
+@pytest.fixture(autouse=True)
+def no_store(monkeypatch):
+    monkeypatch.setenv("AGENTPRO_YOUTUBE_STORE", "off")
+def make_tool(**options) -> FakeYouTube:
+    return FakeYouTube(client_details={"api_key": "test"}, model_name="m", **options)
+def segments(count: int, words: int = 50) -> list:
+    return [{"text": " ".join(["word"] * words), "start": 10.0 * i, "duration": 10.0} for i in range(count)]
+def test_chunks_split_at_segment_boundaries_with_time_ranges():
+    chunks = make_tool().chunk_segments(segments(7, words=40), max_tokens=100)
+    assert len(chunks) == 4 and chunks[0].startswith("[00:00-00:20] ") and chunks[-1].startswith("[01:00-01:10] ")
+def test_reduce_groups_hold_at_least_two_summaries():
+    tool = make_tool(chunk_tokens=10)
+    groups = tool._reduce_groups(["x " * 40] * 5)
+    assert len(groups) == 2 and [group.count("\n\n") for group in groups] == [1, 2]
+def test_short_transcripts_take_one_request():
+    tool = make_tool()
+    assert tool.summarize_segments(segments(2)) and [prompt for prompt, _ in tool.requests] == ["Create a concise summary of the following video transcript"]
+def test_long_transcripts_are_map_reduced():
+    tool = make_tool(chunk_tokens=100)
+    assert tool.summarize_segments(segments(16, words=40)).startswith("summary of")
+    prompts = [prompt for prompt, _ in tool.requests]
+    assert prompts.count(MAP_PROMPT) == 8 and prompts[-1] == REDUCE_PROMPT
+    assert asyncio.run(make_tool(chunk_tokens=100).asummarize_segments(segments(16, words=40))).startswith("summary of")
+def test_reduce_stops_after_max_rounds_even_if_summaries_do_not_shrink():
+    tool = make_tool(chunk_tokens=100, reply=lambda prompt, text: "word " * 200)
+    assert tool.summarize_segments(segments(64))
+    prompts = [prompt for prompt, _ in tool.requests]
+    assert prompts.count(MAP_PROMPT) == 64 and prompts.count(REDUCE_PROMPT) == 32 + 16 + 8 + 4 + 1
+def test_cancelled_summaries_make_no_requests():
+    tool, cancelled = make_tool(chunk_tokens=100), threading.Event()
+    cancelled.set()
+    assert tool.summarize_segments(segments(16), cancelled=cancelled) is None and tool.requests == []
+def test_slow_videos_are_dropped_and_flagged():
+    seen = {}
+    class Tracking(FakeYouTube):
+        def process_video(self, video, cancelled=None):
+            seen[video["video_id"]] = cancelled
+            return super().process_video(video, cancelled)
+    tool = Tracking(client_details={"api_key": "test"}, model_name="m", video_timeout=0.3)
+    start = time.monotonic()
+    results = tool.process_videos(VIDEOS)
+    assert [result["video"]["video_id"] for result in results] == ["fast", "other"] and time.monotonic() - start < 0.9
+    assert seen["slow"].is_set() and not seen["fast"].is_set()
+def test_deadline_bounds_the_whole_batch():
+    tool = make_tool(video_timeout=10, deadline=0.3, max_workers=1)
+    start = time.monotonic()
+    assert [result["video"]["video_id"] for result in tool.process_videos([VIDEOS[1], VIDEOS[0]])] == [] and time.monotonic() - start < 0.9
+def test_async_run_drops_slow_videos():
+    result = asyncio.run(make_tool(video_timeout=0.3).arun("hello"))
+    assert "Video Title: Video fast" in result and "Video other" in result and "Video slow" not in result
+def test_run_reports_when_no_video_could_be_processed(monkeypatch):
+    monkeypatch.setattr(FakeYouTube, "get_transcript_segments", lambda self, video_id: None)
+    assert make_tool().run("hello") == "Could not process any videos. Try a different search query."